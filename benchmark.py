@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Ingestion benchmark for the dashboard generator.
+
+Builds a synthetic multi-sheet workbook and times read_excel_data on it in a
+fresh interpreter, reporting wall time and peak RSS. With --stream, records
+are streamed into the JSON serializer instead (iter_records), as the
+dashboard generator does.
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import openpyxl
+from openpyxl.comments import Comment
+
+from parsers import ENGINES, read_excel_data
+from records import SLOTS, Record
+
+
+HEADER = ['#', 'Date', 'Event Type', 'Project', 'Hourly Rate', 'Additional Rate', 'Hours', 'Amount', 'Comment']
+EVENT_TYPES = ['Working Time', 'PO', 'Invoice', 'Purchase', 'T&L', 'Deferment', 'Financial Record']
+
+# Runs in a child interpreter so peak RSS covers a single read only. On Linux
+# it is read from VmHWM: ru_maxrss would include this (forking) process.
+CHILD_SCRIPT = """
+import json, os, resource, sys, time
+sys.path.insert(0, {repo!r})
+from calculations import RecordStats, write_json_data
+from parsers import iter_records, read_excel_data
+start = time.perf_counter()
+if {stream!r}:
+    stats = RecordStats()
+    with open(os.devnull, 'w') as f:
+        write_json_data(stats.track(iter_records({path!r}, engine={engine!r}, batch_size={batch_size!r})), f)
+    count = stats.count
+else:
+    count = len(read_excel_data({path!r}, jobs={jobs}, engine={engine!r}, batch_size={batch_size!r}))
+wall = time.perf_counter() - start
+try:
+    with open('/proc/self/status') as status:
+        rss_kb = int(next(line.split()[1] for line in status if line.startswith('VmHWM:')))
+except OSError:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'records': count, 'wall': wall, 'rss_kb': rss_kb}}))
+"""
+
+
+def make_workbook(path, sheets, rows, comment_every=50, seed=0):
+    """Write a synthetic tracking workbook with the expected columns."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for s in range(sheets):
+        ws = wb.create_sheet(f'Sheet{s + 1}')
+        ws.append(HEADER)
+        for i in range(rows):
+            event_type = rng.choice(EVENT_TYPES)
+            working = event_type == 'Working Time'
+            ws.append([
+                i + 1,
+                start + timedelta(days=rng.randrange(730)),
+                event_type,
+                f'Project_{rng.randrange(40)}',
+                rng.choice([45, 50, 55]) if working else None,
+                0.05 if working else None,
+                rng.randrange(1, 200) if working else None,
+                None if working else f'€{rng.randrange(100, 100000):,}',
+                'note' if i % 7 == 0 else None,
+            ])
+            if comment_every and i % comment_every == 0:
+                ws.cell(row=i + 2, column=8).comment = Comment('checked', 'bench')
+    wb.save(path)
+
+
+def run_once(path, jobs=1, engine='openpyxl', batch_size=None, stream=False):
+    """Time one read_excel_data call (or streamed read) in a child interpreter."""
+    script = CHILD_SCRIPT.format(repo=str(Path(__file__).parent.resolve()), path=str(path), jobs=jobs,
+                                 engine=engine, batch_size=batch_size, stream=stream)
+    out = subprocess.run([sys.executable, '-c', script], check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _fresh(value):
+    """Return an equal but distinct str/float object, as each parsed row used to get."""
+    if isinstance(value, str) and len(value) > 1:
+        return (value + ' ')[:-1]
+    if isinstance(value, float):
+        return value + 0.0
+    return value
+
+
+def _traced_bytes(build):
+    """Bytes still allocated by ``build()`` once it returns."""
+    tracemalloc.start()
+    try:
+        result = build()
+        return tracemalloc.get_traced_memory()[0], result
+    finally:
+        tracemalloc.stop()
+
+
+def record_memory(records):
+    """Bytes per record as plain dicts with per-row strings vs interned Records."""
+    intern = sys.intern
+
+    def as_dicts():
+        return [{name: _fresh(value) for name, value in zip(SLOTS, r.astuple())} for r in records]
+
+    def as_records():
+        return [Record(*(intern(_fresh(v)) if name in ('date', 'event_type', 'project', 'sheet',
+                                                        'source', 'year_month') and v else _fresh(v)
+                         for name, v in zip(SLOTS, r.astuple())))
+                for r in records]
+
+    dict_bytes, dicts = _traced_bytes(as_dicts)
+    del dicts
+    record_bytes, _ = _traced_bytes(as_records)
+    return dict_bytes / len(records), record_bytes / len(records)
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sheets', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=2000, help='rows per sheet')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--jobs', type=int, default=1, help='worker processes for read_excel_data')
+    parser.add_argument('--engine', choices=ENGINES, default='openpyxl', help='xlsx reader engine')
+    parser.add_argument('--batch-size', type=int, help='rows cleaned per batch (default: whole sheets)')
+    parser.add_argument('--stream', action='store_true',
+                        help='stream records into the JSON serializer instead of building a list')
+    parser.add_argument('--record-memory', action='store_true',
+                        help='also report bytes per record: plain dicts vs compact Records')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'bench.xlsx'
+        print(f"Building workbook: {args.sheets} sheets × {args.rows} rows")
+        make_workbook(path, args.sheets, args.rows)
+
+        results = [run_once(path, args.jobs, args.engine, args.batch_size, args.stream) for _ in range(args.repeat)]
+        best = min(results, key=lambda r: r['wall'])
+        print(f"Records:   {best['records']}")
+        print(f"Wall time: {best['wall']:.3f} s (best of {args.repeat})")
+        print(f"Peak RSS:  {max(r['rss_kb'] for r in results) / 1024:.1f} MB")
+
+        if args.record_memory:
+            per_dict, per_record = record_memory(read_excel_data(str(path), engine=args.engine))
+            print(f"Per record: {per_dict:.0f} B as dict, {per_record:.0f} B as Record "
+                  f"({per_dict / per_record:.1f}x smaller)")
+
+
+if __name__ == '__main__':
+    main()
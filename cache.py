@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of parsed records for the dashboard generator.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'talaria'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+ENTRY_SUFFIX = '.bin'
+
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RecordCache:
+    """Size-bounded LRU cache of parsed records, stored one entry per file.
+
+    Entries are pickled and zlib-compressed. Reading an entry refreshes its
+    mtime, and the least recently used entries are evicted once the cache
+    directory grows past ``max_bytes``. Entries are unpickled on read, so
+    the cache directory should only be writable by the user running the
+    generator.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(*parts):
+        """Build a cache key from strings such as a content hash and parser version."""
+        return hashlib.sha256('\0'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / (key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Return the cached value for ``key``, or None on a miss."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+
+        try:
+            value = pickle.loads(zlib.decompress(data))
+        except Exception:
+            # Truncated or foreign entry: drop it and treat as a miss
+            path.unlink(missing_ok=True)
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        """Store ``value`` under ``key`` and evict old entries if over budget."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for path in self.cache_dir.glob('*' + ENTRY_SUFFIX):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+class MemoryCache:
+    """In-process counterpart of RecordCache for long-running processes.
+
+    Same key/get/put interface, so read_excel_data can re-parse only the
+    sheets that changed between runs in watch mode. Values are kept pickled,
+    so callers get fresh copies they may modify, and the least recently used
+    entries are dropped once the total grows past ``max_bytes``.
+    """
+
+    key = staticmethod(RecordCache.key)
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+
+    def get(self, key):
+        """Return the cached value for ``key``, or None on a miss."""
+        data = self._entries.get(key)
+        if data is None:
+            return None
+        self._entries.move_to_end(key)  # mark as recently used
+        return pickle.loads(data)
+
+    def put(self, key, value):
+        """Store ``value`` under ``key`` and evict old entries if over budget."""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old)
+        self._entries[key] = data
+        self._size += len(data)
+
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
@@ -1,32 +1,329 @@
 #!/usr/bin/env python3
 """
 Calculations and data preparation for the dashboard generator.
+
+Every function here takes its records (records.Record) in a single pass,
+so they also work on a record stream such as parsers.iter_records.
 """
 
+import base64
+import io
 import json
+import math
+import sys
+import zlib
+from array import array
+from datetime import date
+from itertools import islice
+
+from records import FIELDS, Record, json_default
+
+
+class RecordStats:
+    """Statistics and date range gathered in one pass over a record stream."""
+
+    def __init__(self):
+        self.count = 0
+        self.event_types = set()
+        self.date_from = ''
+        self.date_to = ''
+
+    def add(self, record):
+        """Account for one record."""
+        self.count += 1
+        if record['event_type']:
+            self.event_types.add(record['event_type'])
+        date = record['date']
+        if date:
+            if not self.date_from or date < self.date_from:
+                self.date_from = date
+            if date > self.date_to:
+                self.date_to = date
+
+    def track(self, records):
+        """Yield ``records`` unchanged, accounting for each on the way through."""
+        for record in records:
+            self.add(record)
+            yield record
+
+    def statistics(self):
+        return {
+            'event_types': list(self.event_types)
+        }
+
+    def date_range(self):
+        return {
+            'date_from': self.date_from,
+            'date_to': self.date_to
+        }
+
+
+def _collect(records):
+    stats = RecordStats()
+    for record in records:
+        stats.add(record)
+    return stats
 
 
 def calculate_statistics(records):
     """Calculate statistics from records."""
-    event_types = list(set(r['event_type'] for r in records if r['event_type']))
-
-    return {
-        'event_types': event_types
-    }
+    return _collect(records).statistics()
 
 
 def calculate_date_range(records):
     """Calculate date range from records."""
-    dates = [r['date'] for r in records if r['date']]
-    date_from = min(dates) if dates else ''
-    date_to = max(dates) if dates else ''
+    return _collect(records).date_range()
+
+
+# Record fields whose values repeat across many records but take few distinct
+# values; the dashboard receives them as integer codes into a dictionary
+CATEGORICAL_FIELDS = ('event_type', 'project', 'sheet')
+
+
+class Categories:
+    """Dictionaries of the categorical record fields, built in one pass.
+
+    Each distinct value of a field gets the next integer code the first time
+    it is seen, so the dictionaries fill in while records stream past the
+    serializer. ``values[field][code]`` is the value a code stands for.
+    """
+
+    def __init__(self, fields=CATEGORICAL_FIELDS):
+        self.fields = tuple(fields)
+        self.values = {field: [] for field in self.fields}
+        self._codes = {field: {} for field in self.fields}
+
+    def code(self, field, value):
+        """The integer code of ``value`` in ``field``'s dictionary."""
+        codes = self._codes[field]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self.values[field].append(value)
+        return code
+
+    def encode(self, obj):
+        """``default`` hook for json.dumps: a Record as a dict with coded categorical fields."""
+        if not isinstance(obj, Record):
+            return json_default(obj)
+        data = obj.to_dict()
+        for field in self.fields:
+            data[field] = self.code(field, data[field])
+        return data
+
+
+# Payload encodings: a JSON array of record objects, one array per field, or
+# one array per field with the numbers and dates packed as typed arrays
+ENCODINGS = ('records', 'columnar', 'typed')
+
+# Fields dictionary-encoded in the columnar payload: every text field
+DICTIONARY_FIELDS = ('date', 'event_type', 'project', 'comment', 'sheet', 'source', 'year_month')
+NUMERIC_FIELDS = ('billing_rate', 'surcharge_rate', 'hours', 'amount', 'billable_amount')
+
+
+# Formats the embedded payload can be compressed in, as the browser's
+# DecompressionStream names them, with their zlib window bits
+COMPRESSIONS = {'gzip': 31, 'deflate': 15}
+
+
+class CompressedWriter:
+    """Text file that compresses what is written to it into another one.
+
+    Pass it to write_json_data as ``f``: the JSON is compressed as it is
+    written, in ``compression`` ('gzip' or 'deflate', the zlib format), and
+    passed on to the text file ``out`` as base64, ready to embed in the
+    page. Call ``finish()`` after the last write.
+    """
+
+    def __init__(self, out, compression):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.out = out
+        self.compression = compression
+        self._compressor = zlib.compressobj(9, zlib.DEFLATED, COMPRESSIONS[compression])
+        self._pending = b''
+
+    def write(self, text):
+        self._encode(self._compressor.compress(text.encode('utf-8')))
+
+    def finish(self):
+        """Flush the compressor and write out the last of the base64."""
+        self._encode(self._compressor.flush())
+        self.out.write(base64.b64encode(self._pending).decode('ascii'))
+        self._pending = b''
+
+    def _encode(self, data):
+        # base64 maps 3 bytes to 4 characters, so a remainder waits for the next chunk
+        data = self._pending + data
+        cut = len(data) - len(data) % 3
+        if cut:
+            self.out.write(base64.b64encode(data[:cut]).decode('ascii'))
+        self._pending = data[cut:]
+
+
+def prepare_json_data(records, categories=None, encoding='records'):
+    """Prepare record data for JavaScript as a JSON string.
+
+    With ``categories`` (a Categories), the categorical fields are written
+    as codes into its dictionaries, which fill in as a side effect.
+
+    ``encoding='columnar'`` returns the compact form instead: records in
+    batches of one array per field, every text field coded into a
+    dictionary, and no indentation (see write_json_data). ``'typed'`` is
+    the same with the numeric and date columns as binary arrays.
+    """
+    if encoding in ('columnar', 'typed'):
+        buffer = io.StringIO()
+        write_json_data(records, buffer, categories=categories, encoding=encoding)
+        return buffer.getvalue()
+    if encoding != 'records':
+        raise ValueError(f"Unknown payload encoding: {encoding}")
+    return json.dumps(records, indent=2, default=json_default if categories is None else categories.encode)
+
+
+def write_json_data(records, f, batch_size=1000, categories=None, encoding='records'):
+    """Stream records to a text file as JSON, ``batch_size`` records at a time.
+
+    Writes exactly what prepare_json_data returns, without holding all the
+    records or the whole string in memory.
+
+    The columnar encoding is an object with the record ``fields``, a list
+    of ``batches`` (``length`` and one array per field in ``columns``) and
+    the ``dictionaries`` that the coded fields index into. These are
+    DICTIONARY_FIELDS unless ``categories`` says otherwise, and come last
+    because they fill in as the batches are written. Within a batch, a
+    column holding one value throughout is written as that value, and two
+    columns are left out when they follow from the rest: ``index`` if it
+    counts up from the batch's ``index_start``, and ``year_month`` if it is
+    the start of every ``date``.
+
+    The typed encoding packs the other NUMERIC_FIELDS columns as
+    little-endian float64 arrays in base64, ``{"float64": ...}``, with NaN
+    for null (and, as null, for infinities); and ``date`` as int32 days since 1970-01-01, ``{"days": ...}``,
+    with -2**31 for no date. A batch whose dates are not all ISO dates
+    codes them into the dictionary as usual.
+    """
+    if encoding in ('columnar', 'typed'):
+        _write_columnar(records, f, batch_size, categories, typed=encoding == 'typed')
+        return
+    if encoding != 'records':
+        raise ValueError(f"Unknown payload encoding: {encoding}")
+
+    default = json_default if categories is None else categories.encode
+    records = iter(records)
+    first = True
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        # Drop the batch's own '[\n' and '\n]' and splice it into one array
+        f.write('[\n' if first else ',\n')
+        f.write(json.dumps(batch, indent=2, default=default)[2:-2])
+        first = False
+    f.write('[]' if first else '\n]')
+
+
+def _is_run(values):
+    """True for consecutive integers, such as the indexes of a batch of records."""
+    first = values[0]
+    return type(first) is int and values == list(range(first, first + len(values)))
+
+
+EPOCH = date(1970, 1, 1).toordinal()
+NO_DAY = -2 ** 31
+
+
+def _pack(typecode, values):
+    """``values`` as a little-endian array of ``typecode``, in base64."""
+    packed = array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode('ascii')
+
+
+def _day_numbers(dates, days):
+    """Days since 1970-01-01 of ISO ``dates`` (NO_DAY for ''), or None if one is not.
+
+    ``days`` caches the day number of each date string seen so far.
+    """
+    result = []
+    for value in dates:
+        day = days.get(value)
+        if day is None:
+            if value == '':
+                day = NO_DAY
+            else:
+                try:
+                    parsed = date.fromisoformat(value)
+                except (TypeError, ValueError):
+                    return None
+                if parsed.isoformat() != value:
+                    return None
+                day = parsed.toordinal() - EPOCH
+            days[value] = day
+        result.append(day)
+    return result
+
+
+def _json_number(value):
+    """A numeric field as written to the columnar payload.
+
+    JSON numbers carry no type, so an integral float is written as an int
+    (50 reads back as 50.0), and JSON has no infinity or NaN, so those are
+    written as null, which JSON.parse accepts as the compressed page needs.
+    """
+    if type(value) is float:
+        if value.is_integer():
+            return int(value)
+        if not math.isfinite(value):
+            return None
+    return value
 
-    return {
-        'date_from': date_from,
-        'date_to': date_to
-    }
 
+def _write_columnar(records, f, batch_size, categories, typed=False):
+    if categories is None:
+        categories = Categories(DICTIONARY_FIELDS)
+    code = categories.code
+    compact = {'separators': (',', ':'), 'allow_nan': False}
+    days = {}
+    nan = float('nan')
 
-def prepare_json_data(records):
-    """Prepare record data for JavaScript as a JSON string."""
-    return json.dumps(records, indent=2)
+    f.write(f'{{"encoding":"{"typed" if typed else "columnar"}","fields":{json.dumps(FIELDS, **compact)},'
+            f'"batches":[')
+    records = iter(records)
+    first = True
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        encoded = {'length': len(batch)}
+        columns = encoded['columns'] = {}
+        for field in FIELDS:
+            values = [record[field] for record in batch]
+            if field == 'index' and _is_run(values):
+                encoded['index_start'] = values[0]
+                continue
+            if field == 'year_month' and all(ym == (r['date'][:7] if r['date'] else '') and ym.isascii()
+                                             for ym, r in zip(values, batch)):
+                continue  # derived from the date when decoding
+            constant = values.count(values[0]) == len(values)
+            if typed and not constant:
+                if field in NUMERIC_FIELDS:
+                    columns[field] = {'float64': _pack('d', [nan if v is None or not math.isfinite(v) else v for v in values])}
+                    continue
+                if field == 'date':
+                    day_numbers = _day_numbers(values, days)
+                    if day_numbers is not None:
+                        columns[field] = {'days': _pack('i', day_numbers)}
+                        continue
+            if field in categories.fields:
+                values = [code(field, value) for value in values]
+            elif field in NUMERIC_FIELDS:
+                values = [_json_number(v) for v in values]
+            # A column with one value throughout (the sheet, say) is that value
+            columns[field] = values[0] if constant else values
+        if not first:
+            f.write(',')
+        f.write(json.dumps(encoded, **compact))
+        first = False
+    f.write(f'],"dictionaries":{json.dumps(categories.values, **compact)}}}')
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Shared test helpers: a minimal raw xlsx writer."""
+
+import zipfile
+from collections import namedtuple
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+
+HEADER = ['Date', 'Event Type', 'Project', 'Hourly Rate', 'Additional Rate', 'Hours', 'Amount']
+
+# A formula cell with the value Excel cached for it on save
+Formula = namedtuple('Formula', ['expression', 'cached'])
+
+_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_CT = 'application/vnd.openxmlformats-officedocument.spreadsheetml'
+
+
+def _column_letter(idx):
+    letters = ''
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def write_xlsx(path, sheets):
+    """Write a minimal xlsx whose strings all live in the shared string table.
+
+    ``sheets`` maps sheet names to lists of rows. String cells become shared
+    string references, numbers stay numeric, datetimes are stored as serials
+    with a date number format (style 1) and Formula cells carry a cached
+    value.
+    """
+    strings = []
+
+    def shared(value):
+        if value not in strings:
+            strings.append(value)
+        return strings.index(value)
+
+    def cell(ref, value):
+        if isinstance(value, Formula):
+            return f'<c r="{ref}"><f>{escape(value.expression)}</f><v>{value.cached}</v></c>'
+        if isinstance(value, str):
+            return f'<c r="{ref}" t="s"><v>{shared(value)}</v></c>'
+        if isinstance(value, datetime):
+            serial = (value - datetime(1899, 12, 30)).total_seconds() / 86400
+            return f'<c r="{ref}" s="1"><v>{serial:g}</v></c>'
+        return f'<c r="{ref}"><v>{value}</v></c>'
+
+    sheet_xml = []
+    for rows in sheets.values():
+        body = ''.join(
+            f'<row r="{r}">' + ''.join(cell(f'{_column_letter(c)}{r}', v) for c, v in enumerate(row)
+                                      if v is not None) + '</row>'
+            for r, row in enumerate(rows, start=1)
+        )
+        sheet_xml.append(f'<worksheet xmlns="{_MAIN}"><sheetData>{body}</sheetData></worksheet>')
+
+    names = list(sheets)
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('[Content_Types].xml',
+                    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                    '<Default Extension="xml" ContentType="application/xml"/>'
+                    f'<Override PartName="/xl/workbook.xml" ContentType="{_CT}.sheet.main+xml"/>'
+                    f'<Override PartName="/xl/styles.xml" ContentType="{_CT}.styles+xml"/>'
+                    f'<Override PartName="/xl/sharedStrings.xml" ContentType="{_CT}.sharedStrings+xml"/>'
+                    + ''.join(f'<Override PartName="/xl/worksheets/sheet{i + 1}.xml" ContentType="{_CT}.worksheet+xml"/>'
+                              for i in range(len(names)))
+                    + '</Types>')
+        zf.writestr('_rels/.rels',
+                    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    f'<Relationship Id="rId1" Type="{_REL}/officeDocument" Target="xl/workbook.xml"/>'
+                    '</Relationships>')
+        zf.writestr('xl/workbook.xml',
+                    f'<workbook xmlns="{_MAIN}" xmlns:r="{_REL}"><sheets>'
+                    + ''.join(f'<sheet name="{escape(n)}" sheetId="{i + 1}" r:id="rId{i + 1}"/>'
+                              for i, n in enumerate(names))
+                    + '</sheets></workbook>')
+        zf.writestr('xl/_rels/workbook.xml.rels',
+                    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    + ''.join(f'<Relationship Id="rId{i + 1}" Type="{_REL}/worksheet" Target="worksheets/sheet{i + 1}.xml"/>'
+                              for i in range(len(names)))
+                    + f'<Relationship Id="rIdST" Type="{_REL}/styles" Target="styles.xml"/>'
+                    + f'<Relationship Id="rIdSS" Type="{_REL}/sharedStrings" Target="sharedStrings.xml"/>'
+                    '</Relationships>')
+        zf.writestr('xl/styles.xml',
+                    f'<styleSheet xmlns="{_MAIN}">'
+                    '<fonts count="1"><font/></fonts><fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+                    '<borders count="1"><border/></borders>'
+                    '<cellStyleXfs count="1"><xf numFmtId="0"/></cellStyleXfs>'
+                    '<cellXfs count="2"><xf numFmtId="0" xfId="0"/>'
+                    '<xf numFmtId="14" xfId="0" applyNumberFormat="1"/></cellXfs>'
+                    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+                    '</styleSheet>')
+        for i, xml in enumerate(sheet_xml):
+            zf.writestr(f'xl/worksheets/sheet{i + 1}.xml', xml)
+        zf.writestr('xl/sharedStrings.xml',
+                    f'<sst xmlns="{_MAIN}">' + ''.join(f'<si><t>{escape(s)}</t></si>' for s in strings) + '</sst>')
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Duplicate and changed-row detection over parsed records, in one hashing pass.
+"""
+
+from collections import deque
+
+from records import FIELDS
+
+
+# Fields that identify a row's content regardless of where it was read from
+CONTENT_FIELDS = tuple(f for f in FIELDS if f not in ('index', 'sheet', 'source'))
+
+
+def duplicate_key(record):
+    """Normalized (date, project, event type, amount, hours) of a record.
+
+    Names are compared without case or surrounding spaces, and amounts and
+    hours to the cent, so a row copied to another tab matches its original
+    even if its text was retyped or its figures recomputed.
+    """
+    return (
+        record.date,
+        record.project.strip().casefold(),
+        record.event_type.strip().casefold(),
+        round(record.amount or 0.0, 2),
+        round(record.hours or 0.0, 2),
+    )
+
+
+def content(record):
+    """All serialized values of a record except its index, sheet and source."""
+    return tuple(getattr(record, f) for f in CONTENT_FIELDS)
+
+
+def location(record):
+    return {'index': record.index, 'source': record.source, 'sheet': record.sheet, 'row': record.row}
+
+
+class DuplicateFinder:
+    """Exact and near duplicates gathered in one pass over a record stream.
+
+    Records are bucketed by duplicate_key, which takes a dict lookup each,
+    so the pass is linear rather than a pairwise comparison. Only each
+    record's location and content hash are kept, not the record. A bucket
+    with more than one record is an ``exact`` duplicate if all its records
+    have the same content (rates and comment included), and ``near``
+    otherwise.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._buckets = {}
+
+    def add(self, record):
+        """Account for one record."""
+        self.count += 1
+        key = duplicate_key(record)
+        entry = (hash(content(record)), location(record))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [entry]
+        else:
+            bucket.append(entry)
+
+    def track(self, records):
+        """Yield ``records`` unchanged, accounting for each on the way through."""
+        for record in records:
+            self.add(record)
+            yield record
+
+    def groups(self):
+        """Duplicate groups, in the order their first record was seen.
+
+        Each group is a dict with ``kind`` ('exact' or 'near'), the key
+        fields ``date``, ``project``, ``event_type``, ``amount`` and
+        ``hours`` (normalized), and ``rows``: the location (index, source,
+        sheet, row) of every record in the group.
+        """
+        result = []
+        for (date, project, event_type, amount, hours), bucket in self._buckets.items():
+            if len(bucket) < 2:
+                continue
+            result.append({
+                'kind': 'exact' if len({digest for digest, _ in bucket}) == 1 else 'near',
+                'date': date,
+                'project': project,
+                'event_type': event_type,
+                'amount': amount,
+                'hours': hours,
+                'rows': [loc for _, loc in bucket],
+            })
+        return result
+
+
+def find_duplicates(records):
+    """Return the duplicate groups of ``records`` (see DuplicateFinder.groups)."""
+    finder = DuplicateFinder()
+    for record in records:
+        finder.add(record)
+    return finder.groups()
+
+
+def _described(record):
+    described = record.to_dict()
+    described['row'] = record.row
+    return described
+
+
+def diff_records(old, new):
+    """Compare two versions of a workbook's records.
+
+    Rows are matched on their content and sheet first, wherever they moved
+    to, then leftover rows with the same sheet, date, project and event
+    type are paired as changed. Source file names are ignored, so two
+    differently named versions compare as expected. Returns a dict with
+    ``added`` and ``removed`` records, ``changed`` pairs (``old``, ``new``
+    and the ``fields`` that differ) and the ``unchanged`` count; records
+    are plain dicts that also carry their Excel ``row``.
+    """
+    by_content = {}
+    for record in old:
+        by_content.setdefault((record.sheet,) + content(record), deque()).append(record)
+
+    unchanged = 0
+    unmatched = []
+    for record in new:
+        same = by_content.get((record.sheet,) + content(record))
+        if same:
+            same.popleft()
+            unchanged += 1
+        else:
+            unmatched.append(record)
+
+    by_identity = {}
+    for records in by_content.values():
+        for record in records:
+            by_identity.setdefault((record.sheet, record.date, record.project, record.event_type), []).append(record)
+    for key, records in by_identity.items():
+        by_identity[key] = deque(sorted(records, key=lambda r: r.index))
+
+    added, changed = [], []
+    for record in unmatched:
+        candidates = by_identity.get((record.sheet, record.date, record.project, record.event_type))
+        if candidates:
+            previous = candidates.popleft()
+            changed.append({
+                'old': _described(previous),
+                'new': _described(record),
+                'fields': [f for f in CONTENT_FIELDS if getattr(previous, f) != getattr(record, f)],
+            })
+        else:
+            added.append(_described(record))
+
+    removed = sorted((r for records in by_identity.values() for r in records), key=lambda r: r.index)
+    return {
+        'added': added,
+        'removed': [_described(r) for r in removed],
+        'changed': changed,
+        'unchanged': unchanged,
+    }
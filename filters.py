@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Ingestion-time filters for the dashboard generator.
+"""
+
+from fnmatch import fnmatchcase
+
+
+def _is_iso_date(value):
+    return len(value) == 10 and value[4] == '-' and value[7] == '-'
+
+
+class RecordFilter:
+    """Predicates pushed down into parsing, so pruned rows are never built.
+
+    ``sheets`` holds glob patterns (case-sensitive) and sheets matching none
+    of them are not read at all. The row predicates are checked right after
+    a row's date, event type and project are cleaned, before amounts or
+    records are computed: ``date_from``/``date_to`` bound an inclusive
+    YYYY-MM-DD window (rows without a recognised date fall outside any
+    window), and ``projects``/``event_types`` list the exact values to keep.
+    Unset criteria match everything.
+    """
+
+    def __init__(self, date_from=None, date_to=None, projects=None, event_types=None, sheets=None):
+        self.date_from = date_from or None
+        self.date_to = date_to or None
+        self.projects = frozenset(projects) if projects else None
+        self.event_types = frozenset(event_types) if event_types else None
+        self.sheets = tuple(sheets) if sheets else None
+
+    @property
+    def filters_rows(self):
+        """True if any row predicate is set."""
+        return any(c is not None for c in (self.date_from, self.date_to, self.projects, self.event_types))
+
+    def key(self):
+        """Canonical description of the filter, for cache keys."""
+        return repr((self.date_from, self.date_to,
+                     sorted(self.projects) if self.projects else None,
+                     sorted(self.event_types) if self.event_types else None,
+                     self.sheets))
+
+    def wants_sheet(self, sheet_name):
+        return self.sheets is None or any(fnmatchcase(sheet_name, pattern) for pattern in self.sheets)
+
+    def matches(self, date, event_type, project):
+        """Check a row's cleaned date, event type and project."""
+        if self.projects is not None and project not in self.projects:
+            return False
+        if self.event_types is not None and event_type not in self.event_types:
+            return False
+        if self.date_from is not None or self.date_to is not None:
+            if not _is_iso_date(date):
+                return False
+            if self.date_from is not None and date < self.date_from:
+                return False
+            if self.date_to is not None and date > self.date_to:
+                return False
+        return True
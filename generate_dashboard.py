@@ -1,70 +1,412 @@
 #!/usr/bin/env python3
 """
 Project Tracking Dashboard Generator
-Reads an Excel file and generates an interactive static HTML dashboard.
+Reads one or more Excel files and generates an interactive static HTML dashboard.
 """
 
+import argparse
+import glob
+import io
+import json
+import os
+import shutil
 import sys
+import tempfile
+import time
+from datetime import datetime
 from pathlib import Path
 
-from parsers import read_excel_data
-from calculations import (
-    calculate_statistics,
-    calculate_date_range,
-    prepare_json_data
-)
-from templates import get_html_template
+from parsers import DELIMITED_BATCH_ROWS, DELIMITERS, ENGINES, iter_workbooks, read_workbooks, scan_schemas
+from cache import MemoryCache, RecordCache, DEFAULT_MAX_BYTES
+from filters import RecordFilter
+from calculations import COMPRESSIONS, CompressedWriter, RecordStats, write_json_data
+from duplicates import DuplicateFinder, diff_records, find_duplicates
+from store import RecordStore
+from templates import get_duplicates_panel, get_html_parts
 
 
-def generate_html(records):
-    """Generate static HTML dashboard with embedded data."""
+# Payloads longer than this many characters are spooled to a temporary file
+# rather than memory while the page head waits for their statistics
+SPOOL_MAX_CHARS = 8 * 1024 * 1024
 
-    # Calculate statistics
-    stats = calculate_statistics(records)
-    event_types = stats['event_types']
 
-    # Find date range
-    date_range = calculate_date_range(records)
-    date_from = date_range['date_from']
-    date_to = date_range['date_to']
+def write_html(f, records, stats=None, duplicates=None, compression=None, encoding='columnar'):
+    """Write a static HTML dashboard with embedded data to the text file ``f``.
 
-    # Prepare JSON data for JavaScript
-    data_json = prepare_json_data(records)
+    ``records`` may be a list or a one-shot stream (see parsers.iter_records):
+    statistics and date range are gathered while the records are serialized,
+    so the stream is consumed once and no record outlives its JSON. Pass a
+    calculations.RecordStats as ``stats`` to read the totals afterwards, and
+    a duplicates.DuplicateFinder as ``duplicates`` to find duplicate rows in
+    the same pass and add a panel listing them. With ``compression``
+    ('gzip' or 'deflate'), the data is embedded compressed, as base64, and
+    the page decompresses it when it loads. ``encoding='typed'`` embeds the
+    numeric and date columns as typed arrays (see calculations.write_json_data).
 
-    # Generate HTML template
-    html_template = get_html_template(
-        event_types=event_types,
-        date_from=date_from,
-        date_to=date_to,
-        data_json=data_json
+    The page is written in chunks and never held as one string. Its head
+    shows the event types and date range, which are only known once the
+    last record is serialized, so the payload is spooled first (to a
+    temporary file beyond SPOOL_MAX_CHARS), then copied in between the head
+    and the tail.
+    """
+    if stats is None:
+        stats = RecordStats()
+    if duplicates is not None:
+        records = duplicates.track(records)
+
+    with tempfile.SpooledTemporaryFile(SPOOL_MAX_CHARS, mode='w+', encoding='utf-8') as payload:
+        # Serialize the data for JavaScript in a compact columnar encoding,
+        # gathering statistics on the way
+        if compression is None:
+            write_json_data(stats.track(records), payload, encoding=encoding)
+        else:
+            writer = CompressedWriter(payload, compression)
+            write_json_data(stats.track(records), writer, encoding=encoding)
+            writer.finish()
+
+        head, tail = get_html_parts(
+            event_types=stats.statistics()['event_types'],
+            date_from=stats.date_from,
+            date_to=stats.date_to,
+            duplicates_html=get_duplicates_panel(duplicates.groups()) if duplicates is not None else '',
+            compression=compression,
+        )
+        quote = '' if compression is None else '"'
+        f.write(head + quote)
+        payload.seek(0)
+        shutil.copyfileobj(payload, f)
+        f.write(quote + tail)
+
+
+def generate_html(records, stats=None, duplicates=None, compression=None, encoding='columnar'):
+    """Generate static HTML dashboard with embedded data, as a string (see write_html)."""
+    buffer = io.StringIO()
+    write_html(buffer, records, stats, duplicates, compression, encoding)
+    return buffer.getvalue()
+
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+INPUT_EXTENSIONS = EXCEL_EXTENSIONS + tuple(DELIMITERS)
+HTML_EXTENSIONS = ('.html', '.htm')
+
+
+def expand_inputs(inputs):
+    """Expand input arguments (files, directories or glob patterns) to files.
+
+    Directories contribute their Excel and CSV/TSV files, sorted by name. Excel lock files
+    (``~$...``) are skipped. Raises FileNotFoundError for an argument that
+    matches nothing.
+    """
+    files = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            matches = sorted(p for p in path.iterdir() if p.suffix.lower() in INPUT_EXTENSIONS)
+        elif glob.has_magic(item):
+            matches = sorted(Path(p) for p in glob.glob(item, recursive=True))
+        else:
+            matches = [path] if path.exists() else []
+        matches = [p for p in matches if p.is_file() and not p.name.startswith('~$')]
+        if not matches:
+            raise FileNotFoundError(item)
+        files += [str(p) for p in matches if str(p) not in files]
+    return files
+
+
+def _is_input_name(item):
+    """True if ``item`` can only name input files (see expand_inputs)."""
+    path = Path(item)
+    return path.is_dir() or glob.has_magic(item) or path.suffix.lower() in INPUT_EXTENSIONS
+
+
+def iso_date(value):
+    """argparse type for YYYY-MM-DD dates."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD") from None
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Generate an interactive HTML dashboard from one or more Excel files.',
+        epilog='Example: python generate_dashboard.py data.xlsx dashboard.html'
     )
+    parser.add_argument('inputs', nargs='*', metavar='excel_file',
+                        help='Excel or CSV/TSV file, directory or glob pattern; may be repeated '
+                             '(optional with --store, to build from the stored records alone)')
+    parser.add_argument('-o', '--output', dest='output_file',
+                        help='HTML file to write (default: dashboard.html)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='load workbooks (or sheets of a single workbook) in N worker processes (default: 1)')
+    parser.add_argument('--batch-size', type=int, metavar='ROWS',
+                        help='clean sheets ROWS rows at a time, so memory stays flat however long a sheet is '
+                             '(default: whole sheets; %d rows for CSV/TSV)' % DELIMITED_BATCH_ROWS)
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help='cache parsed records in DIR, keyed by workbook content')
+    parser.add_argument('--cache-size', type=int, metavar='MB', default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help='maximum cache size in MB before LRU eviction (default: %(default)s)')
+    parser.add_argument('--scan', action='store_true',
+                        help='only check the header row of every sheet, print the column diagnostics '
+                             'and exit with status 1 if any expected column is missing')
+    parser.add_argument('--scan-format', choices=('text', 'json'), default='text',
+                        help='output format of --scan (default: %(default)s)')
+    parser.add_argument('--duplicates', action='store_true',
+                        help='only report exact and near duplicate rows (same date, project, event type, '
+                             'amount and hours) and exit with status 1 if there are any')
+    parser.add_argument('--duplicates-format', choices=('text', 'json'), default='text',
+                        help='output format of --duplicates (default: %(default)s)')
+    parser.add_argument('--diff', metavar='OLD', action='append',
+                        help='only report the rows added, removed and changed from the OLD workbook '
+                             '(file, directory or glob; may be repeated) to the inputs, '
+                             'and exit with status 1 if they differ')
+    parser.add_argument('--diff-format', choices=('text', 'json'), default='text',
+                        help='output format of --diff (default: %(default)s)')
+    parser.add_argument('--show-duplicates', action='store_true',
+                        help='add a panel listing duplicate rows to the dashboard')
+    parser.add_argument('--compress', action='store_true',
+                        help='embed the data compressed for a smaller file; '
+                             'the page decompresses it in the browser')
+    parser.add_argument('--compress-format', choices=tuple(COMPRESSIONS), default='gzip',
+                        help='compression of --compress (default: %(default)s)')
+    parser.add_argument('--encoding', choices=('columnar', 'typed'), default='columnar',
+                        help="embedded data encoding: 'columnar' (JSON arrays) or 'typed' (numeric and date "
+                             "columns as binary typed arrays, larger but quicker to load) (default: %(default)s)")
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running and regenerate the dashboard whenever an input changes')
+    parser.add_argument('--interval', type=float, default=0.25, metavar='SECONDS',
+                        help='polling interval for --watch (default: %(default)s)')
+    parser.add_argument('--store', metavar='DB',
+                        help='keep records in the SQLite database DB: inputs are upserted into it, '
+                             'and the dashboard is built from a query of everything stored')
+    parser.add_argument('--engine', choices=ENGINES, default='openpyxl',
+                        help="xlsx reader: 'openpyxl' (pandas cleaning) or 'stdlib' "
+                             "(zipfile + XML only, no pandas) (default: %(default)s)")
+
+    filters = parser.add_argument_group('filters', 'keep only matching rows; others are dropped while parsing')
+    filters.add_argument('--date-from', type=iso_date, metavar='YYYY-MM-DD', help='first date to include')
+    filters.add_argument('--date-to', type=iso_date, metavar='YYYY-MM-DD', help='last date to include')
+    filters.add_argument('--project', dest='projects', action='append', metavar='NAME',
+                         help='include this project; may be repeated')
+    filters.add_argument('--event-type', dest='event_types', action='append', metavar='TYPE',
+                         help='include this event type; may be repeated')
+    filters.add_argument('--sheet', dest='sheets', action='append', metavar='GLOB',
+                         help='include sheets whose name matches GLOB; may be repeated')
+    args = parser.parse_args(argv)
+    if not args.inputs and not args.store:
+        parser.error('at least one excel_file is required unless --store is given')
+    if args.batch_size is not None and args.batch_size < 1:
+        parser.error('--batch-size must be at least 1')
+
+    # Backwards compatible form: <excel_file> [output_file]. A last name
+    # ending in .html is the output; so is the second of two names unless
+    # it can only be an input (a directory, a glob or an Excel/CSV file)
+    if args.output_file is None and len(args.inputs) > 1:
+        last = args.inputs[-1]
+        if last.lower().endswith(HTML_EXTENSIONS) or (len(args.inputs) == 2 and not _is_input_name(last)):
+            args.output_file = args.inputs.pop()
+    if args.output_file is None:
+        args.output_file = 'dashboard.html'
+    return args
+
+
+def build_filter(args):
+    """Return the RecordFilter for the filter options, or None if none are given."""
+    row_filter = RecordFilter(date_from=args.date_from, date_to=args.date_to, projects=args.projects,
+                              event_types=args.event_types, sheets=args.sheets)
+    if row_filter.filters_rows or row_filter.sheets:
+        return row_filter
+    return None
+
 
-    return html_template
+def format_scan_result(result):
+    """One line of --scan text output for a scan_schema entry."""
+    if result.get('error'):
+        return f"{result['source']}: ERROR {result['error']}"
+    line = f"{result['source']} [{result['sheet']}] row {result['header_row']}: "
+    line += 'OK' if result['ok'] else 'missing ' + ', '.join(result['missing'])
+    if result['extra']:
+        line += f"; extra columns: {', '.join(result['extra'])}"
+    return line
 
 
-def main():
+def format_duplicate_group(group):
+    """One line of --duplicates text output for a duplicate group."""
+    places = ', '.join(f"{loc['source']} [{loc['sheet']}] row {loc['row']}" for loc in group['rows'])
+    return (f"{group['kind']}: {group['date']} {group['project']} / {group['event_type']} "
+            f"amount {group['amount']:g} hours {group['hours']:g}: {places}")
+
+
+def format_diff(diff):
+    """--diff text output: one line per added, removed or changed row, then a summary."""
+    lines = [f"+ [{r['sheet']}] row {r['row']}: {r['date']} {r['project']} / {r['event_type']}"
+             for r in diff['added']]
+    lines += [f"- [{r['sheet']}] row {r['row']}: {r['date']} {r['project']} / {r['event_type']}"
+              for r in diff['removed']]
+    for change in diff['changed']:
+        old, new = change['old'], change['new']
+        fields = ', '.join(f"{f} {old[f]!r} -> {new[f]!r}" for f in change['fields'])
+        lines.append(f"~ [{new['sheet']}] row {old['row']} -> {new['row']}: {new['date']} {new['project']} / "
+                     f"{new['event_type']}: {fields}")
+    lines.append(f"{len(diff['added'])} added, {len(diff['removed'])} removed, "
+                 f"{len(diff['changed'])} changed, {diff['unchanged']} unchanged")
+    return '\n'.join(lines)
+
+
+def write_output(output_file, records, **options):
+    """Write the dashboard (see write_html) via a temporary file, so readers never see a partial page."""
+    tmp_file = f'{output_file}.tmp'
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            write_html(f, records, **options)
+    except BaseException:
+        Path(tmp_file).unlink(missing_ok=True)
+        raise
+    os.replace(tmp_file, output_file)
+
+
+def load_records(args, input_files, cache=None, row_filter=None):
+    """Read the input files, as a list or (serial and uncached) a record stream."""
+    for input_file in input_files:
+        print(f"Reading Excel file: {input_file}")
+    if args.jobs > 1 or cache is not None:
+        return read_workbooks(input_files, jobs=args.jobs, cache=cache, engine=args.engine,
+                              row_filter=row_filter, batch_size=args.batch_size)
+    # Serial, uncached runs stream records straight into the JSON
+    return iter_workbooks(input_files, engine=args.engine, row_filter=row_filter, batch_size=args.batch_size)
+
+
+def build_dashboard(args, input_files, cache=None, row_filter=None):
+    """Read the input files and write the dashboard; return the record count.
+
+    With ``args.store``, the inputs are parsed unfiltered and upserted into
+    the store one by one, replacing what it held for them, and the
+    dashboard is built from a query of the store with ``row_filter``.
+    """
+    stats = RecordStats()
+    duplicates = DuplicateFinder() if args.show_duplicates else None
+    compression = args.compress_format if args.compress else None
+    options = {'stats': stats, 'duplicates': duplicates, 'compression': compression, 'encoding': args.encoding}
+    if args.store:
+        with RecordStore(args.store) as store:
+            if input_files:
+                # Each workbook is keyed by its resolved path, so same-named
+                # archives from different folders do not replace each other
+                written = sum(store.upsert(load_records(args, [input_file], cache), replace=True,
+                                           path=os.path.realpath(input_file))
+                              for input_file in input_files)
+                print(f"Stored {written} records in {args.store}")
+            print(f"Generating HTML dashboard: {args.output_file}")
+            write_output(args.output_file, store.query(row_filter), **options)
+    else:
+        records = load_records(args, input_files, cache, row_filter)
+        print(f"Generating HTML dashboard: {args.output_file}")
+        write_output(args.output_file, records, **options)
+    print(f"Found {stats.count} records")
+    return stats.count
+
+
+def input_signature(inputs):
+    """Expand the inputs and map each file to its (mtime, size), or None if unavailable."""
+    try:
+        files = expand_inputs(inputs)
+    except FileNotFoundError:
+        return None
+    signature = {}
+    for file_path in files:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        signature[file_path] = (st.st_mtime_ns, st.st_size)
+    return signature
+
+
+def watch(args, cache, row_filter=None):
+    """Regenerate the dashboard whenever an input file changes, until interrupted.
+
+    Inputs are polled every ``args.interval`` seconds by mtime and size, and
+    re-expanded each time so files added to a watched directory or glob are
+    picked up. A change is built once it has held for two consecutive polls,
+    so files still being saved are not read. ``cache`` (a MemoryCache unless
+    --cache-dir is given) keeps the parsed sheets between builds, so only
+    the sheets that changed are parsed again.
+    """
+    built = None
+    previous = input_signature(args.inputs)
+    print(f"Watching {len(previous or {})} file(s) every {args.interval:g}s; press Ctrl+C to stop.")
+    try:
+        while True:
+            current = input_signature(args.inputs)
+            if current is not None and current != built and current == previous:
+                started = time.perf_counter()
+                try:
+                    build_dashboard(args, list(current), cache, row_filter)
+                except SystemExit:
+                    # The reader has reported the error; try again on the next change
+                    print("Dashboard not updated; waiting for the next change.")
+                else:
+                    print(f"Dashboard updated in {time.perf_counter() - started:.2f}s: {args.output_file}")
+                built = current
+            previous = current
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+
+def main(argv=None):
     """Main function."""
-    if len(sys.argv) < 2:
-        print("Usage: python generate_dashboard.py <excel_file> [output_file]")
-        print("Example: python generate_dashboard.py data.xlsx dashboard.html")
+    args = parse_args(argv)
+    output_file = args.output_file
+
+    try:
+        input_files = expand_inputs(args.inputs)
+    except FileNotFoundError as e:
+        print(f"Error: File '{e}' not found.")
         sys.exit(1)
 
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else 'dashboard.html'
+    if args.scan:
+        results = scan_schemas(input_files)
+        if args.scan_format == 'json':
+            print(json.dumps(results, indent=2))
+        else:
+            for result in results:
+                print(format_scan_result(result))
+        sys.exit(0 if all(result['ok'] for result in results) else 1)
 
-    if not Path(input_file).exists():
-        print(f"Error: File '{input_file}' not found.")
-        sys.exit(1)
+    row_filter = build_filter(args)
+
+    if args.duplicates:
+        groups = find_duplicates(iter_workbooks(input_files, engine=args.engine, row_filter=row_filter))
+        if args.duplicates_format == 'json':
+            print(json.dumps(groups, indent=2))
+        else:
+            for group in groups:
+                print(format_duplicate_group(group))
+            print(f"{len(groups)} duplicate groups")
+        sys.exit(1 if groups else 0)
+
+    if args.diff:
+        try:
+            old_files = expand_inputs(args.diff)
+        except FileNotFoundError as e:
+            print(f"Error: File '{e}' not found.")
+            sys.exit(1)
+        diff = diff_records(iter_workbooks(old_files, engine=args.engine, row_filter=row_filter),
+                            iter_workbooks(input_files, engine=args.engine, row_filter=row_filter))
+        print(json.dumps(diff, indent=2) if args.diff_format == 'json' else format_diff(diff))
+        sys.exit(1 if diff['added'] or diff['removed'] or diff['changed'] else 0)
 
-    print(f"Reading Excel file: {input_file}")
-    records = read_excel_data(input_file)
-    print(f"Found {len(records)} records")
+    cache = None
+    if args.cache_dir:
+        cache = RecordCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024)
 
-    print(f"Generating HTML dashboard: {output_file}")
-    html_content = generate_html(records)
+    if args.watch:
+        watch(args, cache if cache is not None else MemoryCache(), row_filter)
+        return
 
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    build_dashboard(args, input_files, cache, row_filter)
 
     print(f"Dashboard generated successfully: {output_file}")
     print(f"Open {output_file} in your browser to view the dashboard.")
@@ -1,17 +1,48 @@
 #!/usr/bin/env python3
 """
-Excel file parsing functions for the dashboard generator.
+Excel file parsing functions for the dashboard generator. CSV/TSV exports
+with the same columns are read through the same cleaning.
+
+pandas, numpy and openpyxl are imported lazily, only by the code paths that
+use them, so the stdlib engine runs without ever importing them.
 """
 
-import pandas as pd
-import openpyxl
+import bisect
+import csv
+import hashlib
+import re
 import sys
-from datetime import datetime
+import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import chain, islice, repeat
+from pathlib import Path
+
+from cache import MemoryCache, file_digest
+from records import Record
+from xlsx_reader import XlsxReader, extract_comments, related_part, sheet_parts, workbook_part
+
+
+# Bump whenever parsing changes the records produced, to invalidate caches
+PARSER_VERSION = 8
+
+ENGINES = ('openpyxl', 'stdlib')
+
+
+def _is_missing(value):
+    """pd.isna for a scalar, without importing pandas."""
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return value != value
+    pd = sys.modules.get('pandas')
+    return pd is not None and pd.isna(value) is True
 
 
 def parse_amount(value):
     """Parse amount values that may contain currency symbols and formatting."""
-    if pd.isna(value) or value == '':
+    if _is_missing(value) or value == '':
         return 0.0
 
     # Convert to string and clean
@@ -31,7 +62,7 @@ def parse_amount(value):
 
 def parse_hours(value):
     """Parse hours values."""
-    if pd.isna(value) or value == '':
+    if _is_missing(value) or value == '':
         return 0.0
 
     if isinstance(value, (int, float)):
@@ -45,7 +76,7 @@ def parse_hours(value):
 
 def parse_rate(value):
     """Parse rate values (hourly rate or percentage)."""
-    if pd.isna(value) or value == '':
+    if _is_missing(value) or value == '':
         return None
 
     value_str = str(value).strip()
@@ -66,154 +97,858 @@ def parse_rate(value):
         return None
 
 
-def _find_column_index(header_row, name):
+def _coerce_numbers(values, strip_pattern=None, bools=True):
+    """Coerce a Series of raw cell values to floats (NaN where unparseable).
+
+    Numbers and plain numeric strings go through pd.to_numeric directly;
+    only the leftover strings get the symbol stripping. With bools=False,
+    TRUE/FALSE cells are leftovers too and read as text, as parse_rate does.
+    """
+    import numpy as np
+    import pandas as pd
+
+    numbers = pd.to_numeric(values, errors='coerce').astype(float)
+    if not bools and values.dtype.kind in 'bO':
+        numbers[values.map(type).isin((bool, np.bool_)).to_numpy()] = np.nan
+    if strip_pattern:
+        leftover = numbers.isna() & values.notna()
+        if leftover.any():
+            text = values[leftover].astype(str).str.replace(strip_pattern, '', regex=True)
+            numbers[leftover] = pd.to_numeric(text, errors='coerce').astype(float)
+    return numbers
+
+
+def clean_amounts(values):
+    """Vectorized parse_amount over a Series."""
+    return _coerce_numbers(values, r'[€$,]').fillna(0.0)
+
+
+def clean_hours(values):
+    """Vectorized parse_hours over a Series."""
+    return _coerce_numbers(values).fillna(0.0)
+
+
+def clean_rates(values):
+    """Vectorized parse_rate over a Series; missing or unparseable rates are NaN."""
+    return _coerce_numbers(values, r'[€$,%]', bools=False)
+
+
+def clean_text(values):
+    """Vectorized stripped-string conversion; missing values become ''."""
+    return values.where(values.notna(), '').astype(str).str.strip()
+
+
+def _nullable(values):
+    """Convert a float Series to a list with None in place of NaN."""
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+EXPECTED_COLUMNS = ['Date', 'Event Type', 'Project', 'Hourly Rate', 'Additional Rate', 'Hours', 'Amount']
+MAPPED_COLUMNS = ['#'] + EXPECTED_COLUMNS + ['Comment']
+
+
+def _find_column_index(header_values, name):
     """Find column index by header name (case-insensitive, stripped)."""
-    for i, cell in enumerate(header_row):
-        if cell.value and str(cell.value).strip().lower() == name.lower():
+    for i, value in enumerate(header_values):
+        if value and str(value).strip().lower() == name.lower():
             return i
     return None
 
 
-def _extract_comments(ws, col_map, header_row_idx):
-    """Extract all cell comments from a worksheet, keyed by (row, col_name)."""
-    comments = {}
-    for row_idx in range(header_row_idx + 1, ws.max_row + 1):
-        row_comments = {}
-        for col_name, col_idx in col_map.items():
-            cell = ws.cell(row=row_idx, column=col_idx + 1)  # openpyxl is 1-indexed
-            if cell.comment:
-                row_comments[col_name] = cell.comment.text.strip()
-        if row_comments:
-            comments[row_idx] = row_comments
-    return comments
+def _missing_columns(col_map):
+    """Expected columns absent from a column map, in EXPECTED_COLUMNS order."""
+    return [c for c in EXPECTED_COLUMNS if c not in col_map]
+
+
+def _map_columns(header_values):
+    """Map each known column name to its index in the header row."""
+    col_map = {}
+    for name in MAPPED_COLUMNS:
+        idx = _find_column_index(header_values, name)
+        if idx is not None:
+            col_map[name] = idx
+    return col_map
+
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d']
+
 
+def _normalize_date(value):
+    """Normalize a raw date cell to a YYYY-MM-DD string where possible."""
+    if _is_missing(value):
+        return ''
 
-def read_excel_data(file_path):
-    """Read and parse Excel file, reading all sheets."""
+    date = str(value)
+    if not date:
+        return ''
+
+    date_str = date.strip()
+    if ' ' in date_str:
+        date_str = date_str.split(' ')[0]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return date
+
+
+# Per-format regexes accepting what strptime accepts for DATE_FORMATS (ASCII
+# digits only), as (pattern, group order of year, month, day)
+_Y, _M, _D = r'([0-9]{4})', r'(1[0-2]|0[1-9]|[1-9])', r'(3[01]|[12][0-9]|0[1-9]|[1-9])'
+_DATE_PATTERNS = [
+    (re.compile(f'{_Y}-{_M}-{_D}'), (0, 1, 2)),
+    (re.compile(f'{_D}/{_M}/{_Y}'), (2, 1, 0)),
+    (re.compile(f'{_M}/{_D}/{_Y}'), (2, 0, 1)),
+    (re.compile(f'{_Y}/{_M}/{_D}'), (0, 1, 2)),
+]
+
+# Strings looked at to infer a column's dominant format
+_DATE_SAMPLE = 50
+
+
+def _match_date(text, fmt_idx):
+    """Parse ``text`` with DATE_FORMATS[fmt_idx] to YYYY-MM-DD, or None."""
+    pattern, (y, m, d) = _DATE_PATTERNS[fmt_idx]
+    match = pattern.fullmatch(text)
+    if match is None:
+        return None
+    parts = match.groups()
+    year, month, day = int(parts[y]), int(parts[m]), int(parts[d])
+    if year < 1000:
+        return None  # strftime('%Y') does not zero-pad these; leave to strptime
     try:
-        # Use openpyxl to get sheet names and comments
-        wb = openpyxl.load_workbook(file_path)
-        sheet_names = wb.sheetnames
-
-        all_records = []
-        global_index = 1
-
-        for sheet_name in sheet_names:
-            ws = wb[sheet_name]
-
-            # Find header row (first row with expected column names)
-            header_row_idx = 0
-            header_row = list(ws.iter_rows(min_row=1, max_row=1))[0]
-
-            expected_cols = ['Date', 'Event Type', 'Project', 'Hourly Rate', 'Additional Rate', 'Hours', 'Amount']
-            col_map = {}
-            for name in ['#'] + expected_cols + ['Comment']:
-                idx = _find_column_index(header_row, name)
-                if idx is not None:
-                    col_map[name] = idx
-
-            missing_cols = [c for c in expected_cols if c not in col_map]
-            if missing_cols:
-                print(f"Warning: Sheet '{sheet_name}' missing columns: {missing_cols}")
-                available = [str(c.value).strip() for c in header_row if c.value]
-                print(f"  Available columns: {available}")
-
-            # Extract cell comments from this sheet
-            cell_comments = _extract_comments(ws, col_map, 1)
-
-            # Read data with pandas for the actual parsing
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
-            df.columns = df.columns.str.strip()
-
-            for idx, row in df.iterrows():
-                # Skip empty rows
-                if pd.isna(row.get('Project', '')) or str(row.get('Project', '')).strip() == '':
-                    continue
+        datetime(year, month, day)
+    except ValueError:
+        return None
+    return f'{year:04d}-{month:02d}-{day:02d}'
+
+
+def _infer_date_format(values):
+    """Return the index in DATE_FORMATS that most sampled strings parse with first."""
+    counts = [0] * len(DATE_FORMATS)
+    sampled = 0
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        text = value.strip().split(' ')[0]
+        for fmt_idx in range(len(DATE_FORMATS)):
+            if _match_date(text, fmt_idx) is not None:
+                counts[fmt_idx] += 1
+                break
+        sampled += 1
+        if sampled == _DATE_SAMPLE:
+            break
+    return max(range(len(counts)), key=counts.__getitem__)
+
+
+def normalize_dates(values):
+    """Column version of _normalize_date: one YYYY-MM-DD string per value.
+
+    Date and datetime cells are formatted directly. For text cells the
+    column's dominant format is inferred once from a sample, and each string
+    is matched against that format and only the formats listed before it in
+    DATE_FORMATS (which win on ambiguous day/month strings). Everything else
+    goes through _normalize_date, so the result is identical.
+    """
+    values = list(values)
+    fmt_idx = _infer_date_format(values)
+
+    # Text dates repeat a lot down a column; each distinct string is parsed once
+    seen = {}
+    out = []
+    for value in values:
+        if isinstance(value, date):
+            # datetime, pd.Timestamp and date; NaT and years < 1000 fall through
+            if value.year >= 1000:
+                out.append(f'{value.year:04d}-{value.month:02d}-{value.day:02d}')
+                continue
+        elif isinstance(value, str):
+            result = seen.get(value)
+            if result is None:
+                result = seen[value] = _normalize_text_date(value, fmt_idx)
+            out.append(result)
+            continue
+        out.append(_normalize_date(value))
+    return out
+
+
+def _normalize_text_date(value, fmt_idx):
+    """_normalize_date for a string, trying DATE_FORMATS[fmt_idx] with regexes first."""
+    text = value.strip().split(' ')[0]
+    # An earlier format wins when it also matches, as in _normalize_date
+    for earlier in range(fmt_idx):
+        result = _match_date(text, earlier)
+        if result is not None:
+            return result
+    result = _match_date(text, fmt_idx)
+    if result is not None:
+        return result
+    return _normalize_date(value)
+
+
+def _text(value):
+    """Scalar clean_text: stripped string, missing values as ''."""
+    return '' if _is_missing(value) else str(value).strip()
+
+
+def _billable_amount(event_type, hours, billing_rate, surcharge_rate):
+    """Billable amount for Working Time: hours × billing_rate × (1 + surcharge_rate)."""
+    if event_type == 'Working Time' and billing_rate is not None and hours > 0:
+        multiplier = 1.0
+        if surcharge_rate is not None:
+            multiplier = 1.0 + surcharge_rate
+        return hours * billing_rate * multiplier
+    return None
+
+
+def _clean_dates(values):
+    """Vectorized normalize_dates over a Series; datetime columns convert in bulk."""
+    import pandas as pd
+
+    values = values.infer_objects()
+    if pd.api.types.is_datetime64_any_dtype(values):
+        missing = values.isna()
+        if (missing | (values.dt.year >= 1000)).all():
+            return values.dt.strftime('%Y-%m-%d').where(~missing, '').tolist()
+    return normalize_dates(values.tolist())
+
+
+def _clean_columns_vectorized(rows, col_map, row_filter=None):
+    """Clean the mapped columns of a sheet with pandas, whole columns at a time.
+
+    Returns the positions of the rows that have a project and pass
+    ``row_filter``, and a dict of cleaned column lists for those rows.
+    """
+    import numpy as np
+    import pandas as pd
+
+    # Columns keep their cell values as they are: a column type inferred
+    # from the rows would differ from batch to batch, and an integer cell
+    # in a column with an empty cell would turn into text like '1001.0'
+    frame = pd.DataFrame(rows, dtype=object)
+
+    def column(name):
+        idx = col_map.get(name)
+        if idx is None or idx not in frame.columns:
+            return pd.Series(None, index=frame.index, dtype=object)
+        return frame[idx]
+
+    # Skip empty rows
+    project = clean_text(column('Project'))
+    keep = (project != '').to_numpy()
+    frame, project = frame[keep], project[keep]
+    positions = keep.nonzero()[0]
+
+    event_type = clean_text(column('Event Type'))
+    date = _clean_dates(column('Date'))
+
+    # Filtered-out rows are dropped before anything else is computed
+    if row_filter is not None and row_filter.filters_rows:
+        wanted = np.fromiter(map(row_filter.matches, date, event_type.tolist(), project.tolist()),
+                             dtype=bool, count=len(date))
+        frame, project, event_type = frame[wanted], project[wanted], event_type[wanted]
+        positions = positions[wanted]
+        date = [d for d, w in zip(date, wanted) if w]
+
+    billing_rate = clean_rates(column('Hourly Rate'))
+    surcharge_rate = clean_rates(column('Additional Rate'))
+    hours = clean_hours(column('Hours'))
+
+    # Calculate billable amount for Working Time: hours × billing_rate × (1 + surcharge_rate)
+    working = (event_type == 'Working Time') & billing_rate.notna() & (hours > 0)
+    billable_amount = (hours * billing_rate * (1.0 + surcharge_rate.fillna(0.0))).where(working)
+
+    return positions.tolist(), {
+        'date': date,
+        'event_type': event_type.tolist(),
+        'project': project.tolist(),
+        'billing_rate': _nullable(billing_rate),
+        'surcharge_rate': _nullable(surcharge_rate),
+        'hours': hours.tolist(),
+        'amount': clean_amounts(column('Amount')).tolist(),
+        'billable_amount': _nullable(billable_amount),
+        'comment': clean_text(column('Comment')).tolist(),
+    }
+
+
+def _clean_columns_scalar(rows, col_map, row_filter=None):
+    """Clean the mapped columns of a sheet row by row with the parse_* functions.
+
+    Same contract as _clean_columns_vectorized, without pandas.
+    """
+    def column(name):
+        idx = col_map.get(name)
+        if idx is None:
+            return [None] * len(rows)
+        return [row[idx] if idx < len(row) else None for row in rows]
+
+    # Skip empty rows
+    project = [_text(v) for v in column('Project')]
+    keep = [pos for pos, p in enumerate(project) if p]
+    rows = [rows[pos] for pos in keep]
+    project = [project[pos] for pos in keep]
+
+    event_type = [_text(v) for v in column('Event Type')]
+    date = normalize_dates(column('Date'))
+
+    # Filtered-out rows are dropped before anything else is computed
+    if row_filter is not None and row_filter.filters_rows:
+        wanted = list(map(row_filter.matches, date, event_type, project))
+        keep, rows, project, event_type, date = (
+            [v for v, w in zip(values, wanted) if w] for values in (keep, rows, project, event_type, date))
+
+    billing_rate = [parse_rate(v) for v in column('Hourly Rate')]
+    surcharge_rate = [parse_rate(v) for v in column('Additional Rate')]
+    hours = [parse_hours(v) for v in column('Hours')]
+
+    return keep, {
+        'date': date,
+        'event_type': event_type,
+        'project': project,
+        'billing_rate': billing_rate,
+        'surcharge_rate': surcharge_rate,
+        'hours': hours,
+        'amount': [parse_amount(v) for v in column('Amount')],
+        'billable_amount': list(map(_billable_amount, event_type, hours, billing_rate, surcharge_rate)),
+        'comment': [_text(v) for v in column('Comment')],
+    }
+
+
+def _build_records(rows, row_numbers, col_map, cell_comments, sheet_name, vectorized=True, row_filter=None,
+                   comment_rows=None):
+    """Clean a sheet's raw rows and build their records.
+
+    ``rows`` are tuples of raw cell values and ``row_numbers`` their Excel
+    row numbers, ascending; ``cell_comments`` is keyed by Excel row in
+    ascending order, and ``comment_rows`` may give those keys as a list, so
+    a sheet cleaned in batches lists them once. Rows without a project, or
+    rejected by ``row_filter`` (a filters.RecordFilter), are dropped.
+    Cleaning runs column-wise through pandas, or through the scalar
+    parse_* functions when ``vectorized`` is False.
+    """
+    if not rows or 'Project' not in col_map:
+        return []
+
+    clean = _clean_columns_vectorized if vectorized else _clean_columns_scalar
+    keep, columns = clean(rows, col_map, row_filter)
+    row_numbers = [row_numbers[pos] for pos in keep]
+
+    # Build comment: combine explicit Comment column + cell comments, of
+    # which only those within this batch's rows are visited
+    comments = columns['comment']
+    if comment_rows is None:
+        comment_rows = list(cell_comments)
+    first = bisect.bisect_left(comment_rows, row_numbers[0]) if row_numbers else 0
+    last = bisect.bisect_right(comment_rows, row_numbers[-1]) if row_numbers else 0
+    for excel_row in comment_rows[first:last]:
+        row_comments = cell_comments[excel_row]
+        pos = bisect.bisect_left(row_numbers, excel_row)
+        if pos < len(row_numbers) and row_numbers[pos] == excel_row:
+            parts = [comments[pos]] if comments[pos] else []
+            parts += [f"{col_name}: {comment_text}" for col_name, comment_text in row_comments.items()]
+            comments[pos] = ' | '.join(parts)
+
+    # Repeated strings are interned so every row shares one copy
+    intern = sys.intern
+    sheet_name = intern(sheet_name)
+    return [
+        Record(
+            index=None,
+            date=intern(date),
+            event_type=intern(et),
+            project=intern(proj),
+            billing_rate=br,
+            surcharge_rate=sr,
+            hours=h,
+            amount=amt,
+            billable_amount=ba,
+            comment=comment,
+            sheet=sheet_name,
+            source=None,
+            # Year-month for monthly summaries
+            year_month=intern(date[:7]) if date else '',
+            row=excel_row
+        )
+        for date, et, proj, br, sr, h, amt, ba, comment, excel_row in zip(
+            columns['date'], columns['event_type'], columns['project'], columns['billing_rate'],
+            columns['surcharge_rate'], columns['hours'], columns['amount'],
+            columns['billable_amount'], comments, row_numbers)
+    ]
+
+
+# Leading rows searched for the header, to skip title blocks above it
+HEADER_SEARCH_ROWS = 20
+
+
+def _find_header(rows, limit=HEADER_SEARCH_ROWS):
+    """Locate the header among the first ``limit`` rows of a row stream.
+
+    ``rows`` yields (Excel row number, tuple of values). The header is the
+    first row naming the most known columns; the search stops early at a
+    row with every expected column. Returns (header row number, header
+    values, remaining rows), where the remaining rows continue the same
+    stream right after the header. If no row names a known column, row 1
+    is the header, as before.
+    """
+    window = []
+    best, best_score = None, 0
+    for row_number, values in rows:
+        window.append((row_number, values))
+        col_map = _map_columns(values)
+        if len(col_map) > best_score:
+            best, best_score = len(window) - 1, len(col_map)
+            if not _missing_columns(col_map):
+                break
+        if len(window) == limit:
+            break
+
+    if not window:
+        return 1, (), rows
+    if best is None:
+        best = 0
+    header_row_idx, header_values = window[best]
+    return header_row_idx, header_values, chain(window[best + 1:], rows)
+
+
+def _iter_sheet_batches(rows, sheet_name, load_comments, vectorized=True, row_filter=None, batch_size=None):
+    """Parse one worksheet in a single pass, yielding the records of every ``batch_size`` rows as a list.
+
+    ``rows`` yields (Excel row number, tuple of values) and
+    ``load_comments(col_map, header_row_idx)`` returns the sheet's cell
+    comments. The header is looked for in the leading rows of the same
+    stream (see _find_header), and rows above it are skipped. The header
+    and column map are found once; each batch of raw rows is then cleaned
+    and built on its own, so only one batch of rows is held at a time.
+    Without a ``batch_size`` the whole sheet is one batch. Records come in
+    row order with ``index`` and ``source`` left unset; the caller fills
+    them in across sheets and files.
+    """
+    header_row_idx, header_values, rows = _find_header(rows)
+
+    col_map = _map_columns(header_values)
+    missing_cols = _missing_columns(col_map)
+    if missing_cols:
+        print(f"Warning: Sheet '{sheet_name}' missing columns: {missing_cols}")
+        available = [str(v).strip() for v in header_values if v]
+        print(f"  Available columns: {available}")
+
+    cell_comments = load_comments(col_map, header_row_idx)
+    comment_rows = list(cell_comments)
+
+    while True:
+        row_numbers, data = [], []
+        for excel_row, values in islice(rows, batch_size):
+            row_numbers.append(excel_row)
+            data.append(values)
+        if not data:
+            return
+        yield _build_records(data, row_numbers, col_map, cell_comments, sheet_name, vectorized, row_filter,
+                             comment_rows)
+        if batch_size is None:
+            return
+
+
+def _header_diagnostics(header_values):
+    """Describe a header row: its columns, which are mapped and which are missing."""
+    col_map = _map_columns(header_values)
+    known = {name.lower() for name in MAPPED_COLUMNS}
+    columns = ['' if _is_missing(v) else str(v).strip() for v in header_values]
+    missing = _missing_columns(col_map)
+    return {
+        'columns': columns,
+        'mapped': col_map,
+        'missing': missing,
+        'extra': [c for c in columns if c and c.lower() not in known],
+        'ok': not missing,
+    }
+
+
+def scan_schema(file_path):
+    """Check the header row of every sheet without parsing any data.
+
+    Only the leading rows of each sheet are streamed, with the stdlib reader,
+    up to the header (see _find_header), and only as much of the shared
+    string table as those rows use. Returns
+    one dict per sheet with ``source``, ``sheet``, ``header_row``,
+    ``columns`` (header cells as text), ``mapped`` (column name to 0-based
+    index), ``missing`` and ``extra`` column names, and ``ok`` when no
+    expected column is missing. A workbook that cannot be read yields a
+    single entry with ``sheet`` None and an ``error`` message.
+    """
+    source = Path(file_path).name
+    try:
+        with _open_workbook(file_path, 'stdlib') as reader:
+            results = []
+            for sheet_name in reader.sheet_parts:
+                rows = reader.iter_rows(sheet_name)
+                header_row, header_values, _ = _find_header(rows)
+                rows.close()
+                results.append({'source': source, 'sheet': sheet_name, 'header_row': header_row,
+                                **_header_diagnostics(header_values)})
+            return results
+    except Exception as e:
+        return [{'source': source, 'sheet': None, 'ok': False, 'error': str(e)}]
+
+
+def scan_schemas(file_paths):
+    """scan_schema over several files, concatenated in the order given."""
+    return [result for file_path in file_paths for result in scan_schema(file_path)]
+
+
+_SHARED_STRING_REF = re.compile(rb'<(?:\w+:)?c\b[^>]*\bt="s"[^>]*>\s*<(?:\w+:)?v>(\d+)<')
+_SHARED_STRING_ITEM = re.compile(rb'<(?:\w+:)?si\b[^>]*>(.*?)</(?:\w+:)?si>', re.DOTALL)
+
+
+def _sheet_fingerprints(zf, parts):
+    """Fingerprint each sheet from the package parts its records depend on.
+
+    A sheet's fingerprint covers its own XML part, its comments part and the
+    shared strings it references, plus the workbook and styles parts that
+    affect every sheet. Editing one tab leaves the other tabs' fingerprints
+    unchanged, even though the shared string table as a whole changes.
+    """
+    def read(part):
+        return zf.read(part) if part and part in zf.NameToInfo else b''
+
+    wb_part = workbook_part(zf)
+
+    common = hashlib.sha256()
+    common.update(read(wb_part))
+    common.update(read(related_part(zf, wb_part, '/styles')))
+    common = common.hexdigest()
+
+    shared_strings = None
+    fingerprints = {}
+    for sheet_name, sheet_part in parts.items():
+        sheet_xml = read(sheet_part)
+        digest = hashlib.sha256()
+        for part in (sheet_name.encode('utf-8'), sheet_xml, read(related_part(zf, sheet_part, '/comments'))):
+            digest.update(hashlib.sha256(part).digest())
 
-                billing_rate = parse_rate(row.get('Hourly Rate'))
-                surcharge_rate = parse_rate(row.get('Additional Rate'))
-                hours = parse_hours(row.get('Hours'))
-                amount = parse_amount(row.get('Amount'))
-                event_type = str(row.get('Event Type', '')).strip() if pd.notna(row.get('Event Type')) else ''
-
-                # Calculate billable amount for Working Time: hours × billing_rate × (1 + surcharge_rate)
-                billable_amount = None
-                if event_type == 'Working Time' and billing_rate is not None and hours > 0:
-                    multiplier = 1.0
-                    if surcharge_rate is not None:
-                        multiplier = 1.0 + surcharge_rate
-                    billable_amount = hours * billing_rate * multiplier
-
-                # Build comment: combine explicit Comment column + cell comments
-                comment_parts = []
-                # Explicit Comment column value
-                comment_val = row.get('Comment')
-                if pd.notna(comment_val) and str(comment_val).strip():
-                    comment_parts.append(str(comment_val).strip())
-                # Cell-level comments from openpyxl (row in Excel is idx+2: +1 for 0-index, +1 for header)
-                excel_row = idx + 2
-                if excel_row in cell_comments:
-                    for col_name, comment_text in cell_comments[excel_row].items():
-                        comment_parts.append(f"{col_name}: {comment_text}")
-
-                comment = ' | '.join(comment_parts) if comment_parts else ''
-
-                record = {
-                    'index': global_index,
-                    'date': str(row.get('Date', '')) if pd.notna(row.get('Date')) else '',
-                    'event_type': event_type,
-                    'project': str(row.get('Project', '')).strip() if pd.notna(row.get('Project')) else '',
-                    'billing_rate': billing_rate,
-                    'surcharge_rate': surcharge_rate,
-                    'hours': hours,
-                    'amount': amount,
-                    'billable_amount': billable_amount,
-                    'comment': comment,
-                    'sheet': sheet_name
-                }
-                global_index += 1
-
-                # Parse date
-                if record['date']:
-                    try:
-                        if hasattr(record['date'], 'strftime'):
-                            record['date'] = record['date'].strftime('%Y-%m-%d')
-                        elif isinstance(record['date'], datetime):
-                            record['date'] = record['date'].strftime('%Y-%m-%d')
-                        elif isinstance(record['date'], str):
-                            date_str = record['date'].strip()
-                            if ' ' in date_str:
-                                date_str = date_str.split(' ')[0]
-                            for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d']:
-                                try:
-                                    dt = datetime.strptime(date_str, fmt)
-                                    record['date'] = dt.strftime('%Y-%m-%d')
-                                    break
-                                except ValueError:
-                                    continue
-                            if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
-                                try:
-                                    datetime.strptime(date_str, '%Y-%m-%d')
-                                    record['date'] = date_str
-                                except ValueError:
-                                    pass
-                    except Exception:
-                        pass
-
-                # Extract year-month for monthly summaries
-                if record['date']:
-                    try:
-                        record['year_month'] = record['date'][:7]
-                    except:
-                        record['year_month'] = ''
-                else:
-                    record['year_month'] = ''
-
-                all_records.append(record)
-
-        wb.close()
+        refs = sorted({int(i) for i in _SHARED_STRING_REF.findall(sheet_xml)})
+        if refs:
+            if shared_strings is None:
+                shared_strings = _SHARED_STRING_ITEM.findall(read(related_part(zf, wb_part, '/sharedStrings')))
+            for i in refs:
+                digest.update(b'%d\0' % i)
+                digest.update(shared_strings[i] if i < len(shared_strings) else b'')
+                digest.update(b'\0')
+
+        fingerprints[sheet_name] = f'{common}:{digest.hexdigest()}'
+    return fingerprints
+
+
+# Delimited text inputs, by extension, and the rows cleaned per batch
+DELIMITERS = {'.csv': ',', '.tsv': '\t'}
+DELIMITED_BATCH_ROWS = 50000
+
+
+def is_delimited(file_path):
+    """True for a CSV or TSV file, read as text rather than as a workbook."""
+    return Path(file_path).suffix.lower() in DELIMITERS
+
+
+class _DelimitedFile:
+    """CSV/TSV file with the same row interface as XlsxReader.
+
+    The file is one sheet, named after the file's stem, and is streamed
+    with the csv module rather than loaded. Cells are the raw strings; the
+    same cleaning as for workbook cells turns them into numbers and dates.
+    """
+
+    zf = None
+
+    def __init__(self, file_path, vectorized=True):
+        self.file_path = file_path
+        self.delimiter = DELIMITERS[Path(file_path).suffix.lower()]
+        self.vectorized = vectorized
+        self.sheet_parts = {Path(file_path).stem: None}
+
+    def iter_rows(self, sheet_name):
+        # utf-8-sig drops the byte order mark spreadsheet exports start with
+        with open(self.file_path, newline='', encoding='utf-8-sig') as f:
+            yield from enumerate(csv.reader(f, delimiter=self.delimiter), start=1)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _OpenpyxlWorkbook:
+    """openpyxl read-only workbook with the same row interface as XlsxReader."""
+
+    vectorized = True
+
+    def __init__(self, file_path):
+        import openpyxl
+
+        self.wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        self.zf = zipfile.ZipFile(file_path)
+        self.sheet_parts = sheet_parts(self.zf)
+
+    def iter_rows(self, sheet_name):
+        ws = self.wb[sheet_name]
+        ws.reset_dimensions()  # don't trust the stored dimension when streaming
+        return enumerate(ws.iter_rows(values_only=True), start=1)
+
+    def close(self):
+        self.wb.close()
+        self.zf.close()
+
+
+def _open_workbook(file_path, engine='openpyxl'):
+    """Open a workbook (or a CSV/TSV file) for streaming with the given engine."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown parser engine: {engine}")
+    if is_delimited(file_path):
+        return _DelimitedFile(file_path, vectorized=engine == 'openpyxl')
+    if engine == 'stdlib':
+        return XlsxReader(file_path)
+    if engine == 'openpyxl':
+        return _OpenpyxlWorkbook(file_path)
+    raise ValueError(f"Unknown parser engine: {engine}")
+
+
+def _read_sheet(workbook, sheet_name, row_filter=None, batch_size=None):
+    """Parse one sheet of a workbook opened with _open_workbook."""
+    return [record for batch in _iter_sheet(workbook, sheet_name, row_filter, batch_size) for record in batch]
+
+
+def _iter_sheet(workbook, sheet_name, row_filter=None, batch_size=None):
+    """Parse one sheet of a workbook opened with _open_workbook, in batches of records.
+
+    Rows are cleaned ``batch_size`` at a time. By default CSV/TSV files are
+    cleaned DELIMITED_BATCH_ROWS rows at a time and a workbook sheet is a
+    single batch.
+    """
+    sheet_part = workbook.sheet_parts.get(sheet_name)
+
+    def load_comments(col_map, header_row_idx):
+        if not sheet_part:
+            return {}
+        return extract_comments(workbook.zf, sheet_part, col_map, header_row_idx)
+
+    if batch_size is None and isinstance(workbook, _DelimitedFile):
+        batch_size = DELIMITED_BATCH_ROWS
+    # The stdlib engine stays pandas-free all the way through
+    vectorized = getattr(workbook, 'vectorized', False)
+    return _iter_sheet_batches(workbook.iter_rows(sheet_name), sheet_name, load_comments, vectorized, row_filter,
+                               batch_size)
+
+
+# Workbook opened once per worker process by _init_worker
+_worker_workbook = None
+
+
+def _init_worker(file_path, engine):
+    """Process pool initializer: open the workbook once per worker."""
+    global _worker_workbook
+    _worker_workbook = _open_workbook(file_path, engine)
+
+
+def _read_sheet_in_worker(sheet_name, row_filter, batch_size):
+    """Process pool task: parse one sheet of the worker's workbook."""
+    return _read_sheet(_worker_workbook, sheet_name, row_filter, batch_size)
+
+
+def _parse_sheets(file_path, sheet_names, jobs=1, engine='openpyxl', row_filter=None, batch_size=None):
+    """Parse the named sheets, serially or in a process pool.
+
+    Returns one record list per sheet, in the order given.
+    """
+    if jobs > 1 and len(sheet_names) > 1:
+        workers = min(jobs, len(sheet_names))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(file_path, engine)) as executor:
+            return list(executor.map(_read_sheet_in_worker, sheet_names, repeat(row_filter),
+                                     repeat(batch_size)))
+
+    workbook = _open_workbook(file_path, engine)
+    try:
+        return [_read_sheet(workbook, sheet_name, row_filter, batch_size) for sheet_name in sheet_names]
+    finally:
+        workbook.close()
+
+
+def source_names(file_paths):
+    """The ``source`` tag of each file: its name, unless another file shares it.
+
+    Files that share a name are tagged with the shortest trailing part of
+    their paths that tells them apart, such as ``2024/units.xlsx`` and
+    ``2025/units.xlsx``. The same path given twice keeps one tag.
+    """
+    parts = [Path(file_path).parts for file_path in file_paths]
+    depths = {path: 1 for path in parts}
+    while True:
+        names = {path: Path(*path[-depth:]).as_posix() for path, depth in depths.items()}
+        counts = Counter(names.values())
+        clashing = [path for path, name in names.items() if counts[name] > 1 and depths[path] < len(path)]
+        if not clashing:
+            return [sys.intern(names[path]) for path in parts]
+        for path in clashing:
+            depths[path] += 1
+
+
+def read_excel_data(file_path, jobs=1, cache=None, engine='openpyxl', row_filter=None, batch_size=None,
+                    source=None):
+    """Read and parse Excel file, reading all sheets.
+
+    The workbook is opened once in read-only mode and every sheet's rows are
+    streamed a single time. Cell comments come from the comments parts of
+    the xlsx package, which read-only worksheets do not expose.
+
+    ``engine`` selects how sheets are read: 'openpyxl' (cleaned with pandas)
+    or 'stdlib', which reads the xlsx zip directly with xlsx_reader and never
+    imports pandas or openpyxl. Both produce the same records.
+
+    A ``.csv`` or ``.tsv`` file is read as a single sheet named after the
+    file, streamed and cleaned in batches of DELIMITED_BATCH_ROWS rows
+    (with pandas or, for the 'stdlib' engine, with the parse_* functions).
+
+    With a ``row_filter`` (a filters.RecordFilter), sheets it excludes are
+    not read and rows it rejects are dropped during parsing, before their
+    amounts or records are computed.
+
+    With a ``batch_size``, each sheet is cleaned that many rows at a time,
+    so the raw rows and cleaning buffers of a long sheet are never held all
+    at once. The records are the same.
+
+    With ``jobs`` > 1, sheets are parsed concurrently in a process pool and
+    merged back in sheet order before records are numbered.
+
+    With a ``cache`` (a cache.RecordCache), records are looked up by the
+    file's content hash and parser version first; a hit returns without
+    opening the workbook. On a miss, each sheet is looked up by its
+    fingerprint, only the changed sheets are parsed, and their records are
+    spliced in with the cached ones before numbering.
+
+    Records are tagged with ``source``, by default the file name.
+    """
+    source = sys.intern(source or Path(file_path).name)
+    try:
+        if cache is not None:
+            filter_key = row_filter.key() if row_filter is not None else None
+            cache_key = cache.key('workbook', PARSER_VERSION, engine, filter_key, file_digest(file_path))
+            cached = cache.get(cache_key)
+            if cached is not None:
+                for record in cached:
+                    record.source = source
+                return cached
+
+        if is_delimited(file_path):
+            # One sheet, cached only as a whole file
+            parts, fingerprints = {Path(file_path).stem: None}, {}
+            if row_filter is not None:
+                parts = {name: part for name, part in parts.items() if row_filter.wants_sheet(name)}
+        else:
+            with zipfile.ZipFile(file_path) as zf:
+                parts = sheet_parts(zf)
+                if row_filter is not None:
+                    parts = {name: part for name, part in parts.items() if row_filter.wants_sheet(name)}
+                fingerprints = _sheet_fingerprints(zf, parts) if cache is not None else {}
+        sheet_names = list(parts)
+
+        sheet_records = {}
+        for sheet_name, fingerprint in fingerprints.items():
+            cached = cache.get(cache.key('sheet', PARSER_VERSION, engine, filter_key, fingerprint))
+            if cached is not None:
+                sheet_records[sheet_name] = cached
+
+        stale = [sheet_name for sheet_name in sheet_names if sheet_name not in sheet_records]
+        if stale:
+            for sheet_name, records in zip(stale, _parse_sheets(file_path, stale, jobs, engine, row_filter,
+                                                                             batch_size)):
+                sheet_records[sheet_name] = records
+                fingerprint = fingerprints.get(sheet_name)
+                if fingerprint is not None:
+                    cache.put(cache.key('sheet', PARSER_VERSION, engine, filter_key, fingerprint), records)
+
+        all_records = [record for sheet_name in sheet_names for record in sheet_records[sheet_name]]
+        for global_index, record in enumerate(all_records, start=1):
+            record.index = global_index
+            record.source = source
+
+        if cache is not None:
+            cache.put(cache_key, all_records)
         return all_records
 
     except Exception as e:
         print(f"Error reading Excel file: {e}")
         sys.exit(1)
+
+
+def iter_records(file_path, engine='openpyxl', start=1, row_filter=None, batch_size=None, source=None):
+    """Yield the records of an Excel file as its sheets are scanned.
+
+    Yields the same records as read_excel_data, numbered from ``start``,
+    but only the sheet being parsed is held in memory: each sheet's records
+    are handed out before the next sheet is read. With a ``batch_size``,
+    only that many rows are: each batch's records are handed out before
+    the next batch is read, so memory stays flat however long a sheet is.
+    """
+    source = sys.intern(source or Path(file_path).name)
+    try:
+        workbook = _open_workbook(file_path, engine)
+        try:
+            index = start
+            for sheet_name in workbook.sheet_parts:
+                if row_filter is not None and not row_filter.wants_sheet(sheet_name):
+                    continue
+                for batch in _iter_sheet(workbook, sheet_name, row_filter, batch_size):
+                    for record in batch:
+                        record.index = index
+                        record.source = source
+                        index += 1
+                        yield record
+        finally:
+            workbook.close()
+
+    except Exception as e:
+        print(f"Error reading Excel file: {e}")
+        sys.exit(1)
+
+
+def iter_workbooks(file_paths, engine='openpyxl', row_filter=None, batch_size=None):
+    """Stream the records of several Excel files, numbered across all of them (see source_names)."""
+    index = 1
+    for file_path, source in zip(file_paths, source_names(file_paths)):
+        for record in iter_records(file_path, engine, start=index, row_filter=row_filter, batch_size=batch_size,
+                                   source=source):
+            index += 1
+            yield record
+
+
+def read_workbooks(file_paths, jobs=1, cache=None, engine='openpyxl', row_filter=None, batch_size=None):
+    """Read several Excel files into one dataset.
+
+    Records keep their ``source`` file (see source_names) and ``sheet`` and
+    are numbered across all files in the order given. With ``jobs`` > 1 the workbooks are loaded
+    concurrently in a process pool; a single file uses ``jobs`` for its
+    sheets instead. So do the files with a cache.MemoryCache: workers would
+    only fill pickled copies of it, so the files are read in this process
+    and only their stale sheets are parsed in the pool.
+    """
+    if len(file_paths) == 1:
+        return read_excel_data(file_paths[0], jobs=jobs, cache=cache, engine=engine, row_filter=row_filter,
+                               batch_size=batch_size)
+
+    if jobs > 1 and not isinstance(cache, MemoryCache):
+        workers = min(jobs, len(file_paths))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            per_file = list(executor.map(read_excel_data, file_paths, repeat(1), repeat(cache), repeat(engine),
+                                         repeat(row_filter), repeat(batch_size), source_names(file_paths)))
+    else:
+        per_file = [read_excel_data(file_path, jobs=jobs, cache=cache, engine=engine, row_filter=row_filter,
+                                    batch_size=batch_size, source=source)
+                    for file_path, source in zip(file_paths, source_names(file_paths))]
+
+    all_records = [record for records in per_file for record in records]
+    for global_index, record in enumerate(all_records, start=1):
+        record.index = global_index
+    return all_records
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Compact record type shared by the parser and the calculations.
+"""
+
+
+FIELDS = (
+    'index', 'date', 'event_type', 'project', 'billing_rate', 'surcharge_rate', 'hours',
+    'amount', 'billable_amount', 'comment', 'sheet', 'source', 'year_month',
+)
+
+# Slots: the serialized FIELDS plus the record's Excel row number
+SLOTS = FIELDS + ('row',)
+
+
+class Record:
+    """One parsed spreadsheet row.
+
+    A slotted object instead of a dict: no per-record hash table, and the
+    parser interns the strings that repeat across rows (date, event type,
+    project, sheet, year-month), so a record costs a fraction of the dict
+    it replaces. Fields are read as attributes, or by name like a dict for
+    code that still indexes records. Convert with to_dict() only where
+    plain data is needed, such as JSON serialization. ``row``, the Excel
+    row the record came from, identifies it in its sheet but is not part
+    of the serialized fields.
+    """
+
+    __slots__ = SLOTS
+
+    def __init__(self, index, date, event_type, project, billing_rate, surcharge_rate, hours,
+                 amount, billable_amount, comment, sheet, source, year_month, row=None):
+        self.index = index
+        self.date = date
+        self.event_type = event_type
+        self.project = project
+        self.billing_rate = billing_rate
+        self.surcharge_rate = surcharge_rate
+        self.hours = hours
+        self.amount = amount
+        self.billable_amount = billable_amount
+        self.comment = comment
+        self.sheet = sheet
+        self.source = source
+        self.year_month = year_month
+        self.row = row
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def astuple(self):
+        return tuple(getattr(self, name) for name in SLOTS)
+
+    def to_dict(self):
+        """Return the record as a plain dict, with keys in FIELDS order."""
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def __eq__(self, other):
+        if not isinstance(other, Record):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    __hash__ = None  # mutable
+
+    def __repr__(self):
+        return f"Record({', '.join(f'{name}={getattr(self, name)!r}' for name in SLOTS)})"
+
+    def __reduce__(self):
+        # Pickle as a plain tuple of values, for compact cache entries
+        return Record, self.astuple()
+
+
+def json_default(obj):
+    """``default`` hook for json.dumps: serialize Records as plain dicts."""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+SQLite store of parsed records, for dashboards spanning archived workbooks.
+"""
+
+import sqlite3
+import sys
+from fnmatch import fnmatchcase
+from itertools import groupby
+
+from parsers import source_names
+from records import Record
+
+
+# Record fields stored per row, besides the (path, sheet, row) key and source
+_VALUE_COLUMNS = (
+    'date', 'event_type', 'project', 'billing_rate', 'surcharge_rate', 'hours',
+    'amount', 'billable_amount', 'comment', 'year_month',
+)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS records (
+    path TEXT NOT NULL,
+    source TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    project TEXT NOT NULL,
+    billing_rate REAL,
+    surcharge_rate REAL,
+    hours REAL NOT NULL,
+    amount REAL NOT NULL,
+    billable_amount REAL,
+    comment TEXT NOT NULL,
+    year_month TEXT NOT NULL,
+    PRIMARY KEY (path, sheet, row)
+);
+CREATE INDEX IF NOT EXISTS records_project ON records (project);
+CREATE INDEX IF NOT EXISTS records_date ON records (date);
+CREATE INDEX IF NOT EXISTS records_event_type ON records (event_type);
+'''
+
+
+class RecordStore:
+    """Records kept in a SQLite database, one row per spreadsheet row.
+
+    Rows are keyed by (workbook path, sheet, Excel row), so ingesting a
+    workbook again updates its rows in place rather than duplicating them,
+    and same-named workbooks from different folders (yearly archives of
+    one ledger, say) are kept apart. Queries return records ordered by
+    path, then in workbook order, and push filters down to SQL, where
+    project, date and event type are indexed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.create_function('fnmatchcase', 2, fnmatchcase, deterministic=True)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def upsert(self, records, replace=False, path=None):
+        """Insert or update records by (path, sheet, row); return the number written.
+
+        ``records`` come from read_excel_data or read_workbooks, whose
+        records carry their Excel ``row``. ``path`` is the workbook they
+        were all read from; use a stable one, such as the resolved file
+        path. Without it, records are keyed by their ``source`` file name,
+        which two workbooks in different folders can share.
+
+        With ``replace``, rows of the workbooks being written that are not
+        among ``records`` are deleted, so a re-ingested workbook also loses
+        the rows removed from it. With a ``path``, this includes a workbook
+        that no longer has any records.
+        """
+        columns = ('path', 'source', 'sheet', 'row', 'seq') + _VALUE_COLUMNS
+        updates = ', '.join(f'{c} = excluded.{c}' for c in ('source', 'seq') + _VALUE_COLUMNS)
+        sql = (f"INSERT INTO records ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+               f"ON CONFLICT (path, sheet, row) DO UPDATE SET {updates}")
+
+        if path is None:
+            groups = groupby(records, key=lambda r: r.source)
+        else:
+            groups = [(path, records)]
+        written = 0
+        with self.conn:
+            for key, group in groups:
+                rows = [(key, r.source, r.sheet, r.row, seq) + tuple(getattr(r, c) for c in _VALUE_COLUMNS)
+                        for seq, r in enumerate(group)]
+                if any(row[3] is None for row in rows):
+                    raise ValueError(f"Records from '{key}' have no row numbers")
+                if replace:
+                    self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS kept (sheet TEXT, row INTEGER)')
+                    self.conn.execute('DELETE FROM kept')
+                    self.conn.executemany('INSERT INTO kept VALUES (?, ?)', [(row[2], row[3]) for row in rows])
+                    self.conn.execute('DELETE FROM records WHERE path = ? AND (sheet, row) NOT IN '
+                                      '(SELECT sheet, row FROM kept)', (key,))
+                self.conn.executemany(sql, rows)
+                written += len(rows)
+        return written
+
+    def delete_source(self, path):
+        """Remove every row of a workbook (its upsert ``path`` or source name); return the number removed."""
+        with self.conn:
+            return self.conn.execute('DELETE FROM records WHERE path = ?', (path,)).rowcount
+
+    def sources(self):
+        """Workbook paths (or source names) in the store, sorted."""
+        return [path for path, in self.conn.execute('SELECT DISTINCT path FROM records ORDER BY path')]
+
+    def query(self, row_filter=None, sources=None):
+        """Yield stored records matching a filters.RecordFilter, numbered from 1.
+
+        ``sources`` optionally limits the query to some workbooks, as
+        listed by sources(). Records are tagged with a ``source`` that tells
+        apart the stored workbooks (see parsers.source_names), so archives
+        that share a file name are not merged on the dashboard.
+        The filter's criteria become SQL conditions, so the indexes on
+        project, date and event type do the selection.
+        """
+        conditions, params = [], []
+        if sources is not None:
+            conditions.append(f"path IN ({', '.join('?' * len(sources))})")
+            params += list(sources)
+        if row_filter is not None:
+            if row_filter.projects is not None:
+                conditions.append(f"project IN ({', '.join('?' * len(row_filter.projects))})")
+                params += sorted(row_filter.projects)
+            if row_filter.event_types is not None:
+                conditions.append(f"event_type IN ({', '.join('?' * len(row_filter.event_types))})")
+                params += sorted(row_filter.event_types)
+            if row_filter.date_from is not None or row_filter.date_to is not None:
+                # Same rule as RecordFilter.matches: only YYYY-MM-DD dates are in a window
+                conditions.append("length(date) = 10 AND substr(date, 5, 1) = '-' AND substr(date, 8, 1) = '-'")
+            if row_filter.date_from is not None:
+                conditions.append('date >= ?')
+                params.append(row_filter.date_from)
+            if row_filter.date_to is not None:
+                conditions.append('date <= ?')
+                params.append(row_filter.date_to)
+            if row_filter.sheets is not None:
+                conditions.append('(' + ' OR '.join('fnmatchcase(sheet, ?)' for _ in row_filter.sheets) + ')')
+                params += list(row_filter.sheets)
+
+        paths = self.sources()
+        names = dict(zip(paths, source_names(paths)))
+        sql = f"SELECT path, sheet, row, {', '.join(_VALUE_COLUMNS)} FROM records"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY path, seq'
+
+        intern = sys.intern
+        for index, (path, sheet, row, date, event_type, project, billing_rate, surcharge_rate, hours,
+                    amount, billable_amount, comment, year_month) in enumerate(self.conn.execute(sql, params),
+                                                                                start=1):
+            yield Record(
+                index=index,
+                date=intern(date),
+                event_type=intern(event_type),
+                project=intern(project),
+                billing_rate=billing_rate,
+                surcharge_rate=surcharge_rate,
+                hours=hours,
+                amount=amount,
+                billable_amount=billable_amount,
+                comment=comment,
+                sheet=intern(sheet),
+                source=names[path],
+                year_month=intern(year_month),
+                row=row
+            )
@@ -3,12 +3,260 @@
 HTML template for the dashboard generator.
 """
 
+import json
+import re
 from datetime import datetime
+from html import escape
+
+from calculations import CATEGORICAL_FIELDS, NUMERIC_FIELDS
+from records import FIELDS
 from styles import get_css
 
 
-def get_html_template(event_types, date_from, date_to, data_json):
-    """Generate HTML template with embedded data."""
+# Rebuilds the record objects from the embedded payload. Plain JavaScript,
+# not part of the f-string template, so braces are single.
+DATA_DECODER_JS = """
+        // The payload holds batches of one array per field, text fields coded
+        // into payload.dictionaries (see calculations.write_json_data). Each
+        // row gets its text values back for display, and the categorical
+        // fields (calculations.CATEGORICAL_FIELDS) keep their code as
+        // <field>_id for filters to compare.
+        //
+        // The numeric fields are gathered across batches into one
+        // Float64Array per field in dataColumns, with NaN for null. A row
+        // holds its position in them as row.pos and reads its numbers
+        // through getters, while the aggregations read the arrays directly.
+        // In the typed encoding these columns arrive as float64 bytes and
+        // the dates as int32 days since 1970-01-01, both little-endian (the
+        // byte order of every browser platform), so no number text is parsed.
+        const dataColumns = {};
+        const recordPrototype = {
+            toJSON() {
+                const data = {};
+                for (const field of recordFields) data[field] = this[field];
+                for (const field of categoricalFields) data[field + '_id'] = this[field + '_id'];
+                return data;
+            }
+        };
+
+        function decodePayload(payload) {
+            const dictionaries = payload.dictionaries;
+            const length = payload.batches.reduce((sum, batch) => sum + batch.length, 0);
+            for (const field of numericFields) {
+                const values = dataColumns[field] = new Float64Array(length);
+                Object.defineProperty(recordPrototype, field, {
+                    get() {
+                        const value = values[this.pos];
+                        return Number.isNaN(value) ? null : value;
+                    },
+                    configurable: true
+                });
+            }
+            const textFields = payload.fields.filter(field => !numericFields.includes(field));
+            const records = [];
+            for (const batch of payload.batches) {
+                const offset = records.length;
+                for (const field of numericFields) {
+                    fillNumbers(dataColumns[field], offset, batch.length, batch.columns[field]);
+                }
+                const columns = textFields.map(field => {
+                    let column = batch.columns[field];
+                    let dictionary = dictionaries[field];
+                    if (column && column.days !== undefined) {
+                        column = Array.from(new Int32Array(base64Bytes(column.days).buffer), dayToDate);
+                        dictionary = undefined;
+                    }
+                    return [field, column, dictionary, categoricalFields.includes(field)];
+                });
+                for (let i = 0; i < batch.length; i++) {
+                    const row = Object.create(recordPrototype);
+                    row.pos = offset + i;
+                    for (const [field, column, dictionary, categorical] of columns) {
+                        if (column === undefined) {
+                            // Left out when it follows from the rest of the row
+                            row[field] = field === 'index' ? batch.index_start + i
+                                : (row.date ? row.date.slice(0, 7) : '');
+                            continue;
+                        }
+                        // A column with the same value on every row is just that value
+                        const value = Array.isArray(column) ? column[i] : column;
+                        if (dictionary === undefined) {
+                            row[field] = value;
+                        } else {
+                            row[field] = dictionary[value];
+                            if (categorical) row[field + '_id'] = value;
+                        }
+                    }
+                    records.push(row);
+                }
+            }
+            return records;
+        }
+
+        // Copy one batch's numeric column into values from offset: typed
+        // float64 bytes, an array with null for missing numbers, or a single
+        // value for the whole batch
+        function fillNumbers(values, offset, length, column) {
+            if (column !== null && column.float64 !== undefined) {
+                values.set(new Float64Array(base64Bytes(column.float64).buffer), offset);
+            } else if (Array.isArray(column)) {
+                for (let i = 0; i < length; i++) values[offset + i] = column[i] === null ? NaN : column[i];
+            } else {
+                values.fill(column === null ? NaN : column, offset, offset + length);
+            }
+        }
+
+        const NO_DAY = -2147483648;
+        const dayDates = new Map();
+        function dayToDate(day) {
+            if (day === NO_DAY) return '';
+            let date = dayDates.get(day);
+            if (date === undefined) {
+                date = new Date(day * 86400000).toISOString().slice(0, 10);
+                dayDates.set(day, date);
+            }
+            return date;
+        }
+
+        function base64Bytes(text) {
+            const binary = atob(text);
+            const bytes = new Uint8Array(binary.length);
+            for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+            return bytes;
+        }
+
+        // The embedded payload: the JSON itself, or base64 text of the JSON
+        // compressed as gzip or deflate, which is decompressed as a stream
+        async function loadPayload(payload, compression) {
+            if (!compression) return payload;
+            const stream = new Blob([base64Bytes(payload)]).stream()
+                .pipeThrough(new DecompressionStream(compression));
+            return JSON.parse(await new Response(stream).text());
+        }
+
+        // Code of a categorical value, or -1 if no record has it
+        const categoryCodeMaps = {};
+        function categoryCode(field, value) {
+            if (!categoryCodeMaps[field]) {
+                categoryCodeMaps[field] = new Map(categories[field].map((v, code) => [v, code]));
+            }
+            const code = categoryCodeMaps[field].get(value);
+            return code === undefined ? -1 : code;
+        }
+"""
+
+
+def get_duplicates_panel(groups):
+    """Render duplicates.DuplicateFinder groups as a collapsible dashboard section."""
+    rows = []
+    for group in groups:
+        places = '<br>'.join(
+            escape(f"{loc['source']} › {loc['sheet']}" if loc['source'] else loc['sheet'])
+            + (f" row {loc['row']}" if loc['row'] is not None else '')
+            for loc in group['rows']
+        )
+        rows.append(f"""
+                            <tr>
+                                <td>{escape(group['kind'])}</td>
+                                <td>{escape(group['date'])}</td>
+                                <td>{escape(group['project'])}</td>
+                                <td>{escape(group['event_type'])}</td>
+                                <td>{group['amount']:,.2f}</td>
+                                <td>{group['hours']:g}</td>
+                                <td>{places}</td>
+                            </tr>""")
+    return f"""
+        <!-- Duplicate Rows -->
+        <details class="collapsible-section" id="sectionDuplicates" open>
+            <summary><h2>Duplicate Rows <span style="font-size: 0.7em; color: var(--color-text-muted); font-weight: normal;">({len(groups)} groups)</span></h2></summary>
+            <div class="table-section">
+                <div class="table-wrapper">
+                    <table id="duplicatesTable">
+                        <thead>
+                            <tr>
+                                <th>Kind</th>
+                                <th>Date</th>
+                                <th>Project</th>
+                                <th>Event Type</th>
+                                <th>Amount</th>
+                                <th>Hours</th>
+                                <th>Rows</th>
+                            </tr>
+                        </thead>
+                        <tbody>{''.join(rows)}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+        </details>"""
+
+
+def get_html_template(event_types, date_from, date_to, data_json, duplicates_html='', compression=None):
+    """Generate HTML template with embedded data.
+
+    ``data_json`` holds the records in the columnar encoding, with its
+    dictionaries (see calculations.write_json_data). With ``compression``
+    ('gzip' or 'deflate'), it is that JSON compressed and base64-encoded
+    (see calculations.CompressedWriter).
+    ``duplicates_html`` is an optional section (see get_duplicates_panel)
+    placed after the data table.
+    """
+    head, tail = get_html_parts(event_types, date_from, date_to, duplicates_html, compression)
+    return head + (data_json if compression is None else json.dumps(data_json)) + tail
+
+
+def get_html_parts(event_types, date_from, date_to, duplicates_html='', compression=None):
+    """The page before and after its embedded payload, as ``(head, tail)``.
+
+    The payload goes in between as a JavaScript expression: the JSON itself,
+    or with ``compression`` the base64 text in double quotes. Writing the
+    three in turn streams a page as get_html_template builds it.
+    """
+    return get_html_head(event_types, date_from, date_to, duplicates_html), get_html_tail(compression)
+
+
+def get_html_head(event_types, date_from, date_to, duplicates_html=''):
+    """The page up to its embedded payload (see get_html_parts)."""
+    return _fill(_HEAD, {
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'event_type_options': ''.join(f'<option value="{et}">{et}</option>' for et in sorted(event_types)),
+        'date_from': f'{date_from}',
+        'date_to': f'{date_to}',
+        'duplicates_html': duplicates_html,
+    })
+
+
+def get_html_tail(compression=None):
+    """The page after its embedded payload (see get_html_parts)."""
+    return _fill(_TAIL, {
+        'compression': json.dumps(compression),
+        'generation_date': datetime.now().strftime('%Y-%m-%d'),
+    })
+
+
+# The head and tail are rendered once, at import, with a marker in place of
+# each per-page value, and cut into static segments around the markers. A
+# page then only joins the segments with its values: the template f-strings
+# and get_css() are not evaluated again for every dashboard.
+_MARKER = re.compile(r'\x00(\w+)\x00')
+
+
+def _segments(render, fields):
+    """``render`` with a marker for each of ``fields``, as (static segments, field names)."""
+    parts = _MARKER.split(render(**{field: f'\x00{field}\x00' for field in fields}))
+    return tuple(parts[0::2]), tuple(parts[1::2])
+
+
+def _fill(template, values):
+    segments, fields = template
+    out = [segments[0]]
+    for field, segment in zip(fields, segments[1:]):
+        out.append(values[field])
+        out.append(segment)
+    return ''.join(out)
+
+
+def _render_head(generated_at, event_type_options, date_from, date_to, duplicates_html):
     return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -25,7 +273,7 @@ def get_html_template(event_types, date_from, date_to, data_json):
     <div class="container">
         <header>
             <h1><svg class="header-icon" viewBox="0 0 476 474" fill="currentColor" xmlns="http://www.w3.org/2000/svg"><g transform="translate(0,474) scale(0.1,-0.1)" stroke="none"><path d="M3935 4183 c-159 -63 -353 -138 -430 -168 -77 -30 -291 -113 -475 -185 -184 -73 -357 -140 -385 -150 -99 -36 -231 -92 -265 -113 -92 -55 -185 -161 -239 -272 -38 -79 -42 -95 -103 -417 -9 -49 -8 -61 6 -83 32 -49 104 -41 124 14 6 14 24 102 41 194 39 213 66 274 165 373 78 77 39 58 446 217 91 36 219 86 285 112 66 26 201 78 300 116 99 39 189 74 200 79 11 5 74 30 140 55 66 26 188 73 270 106 149 58 175 66 175 52 -1 -28 -54 -183 -75 -220 -32 -53 -101 -106 -175 -132 -30 -11 -86 -31 -125 -46 -67 -25 -187 -70 -380 -141 -49 -18 -182 -67 -295 -109 -113 -42 -272 -101 -355 -131 -82 -31 -159 -64 -169 -74 -38 -38 -10 -120 42 -120 14 0 230 78 652 235 444 165 582 215 596 215 18 0 18 -24 -1 -86 -21 -71 -70 -114 -180 -157 -49 -19 -151 -59 -225 -87 -212 -83 -455 -178 -575 -225 -60 -24 -141 -55 -180 -70 -38 -15 -76 -33 -84 -38 -39 -32 -31 -98 14 -119 20 -9 34 -9 63 1 53 19 313 120 337 131 11 5 90 36 175 69 85 33 226 87 313 121 87 34 161 60 164 57 3 -3 -3 -29 -13 -59 -12 -36 -33 -68 -68 -103 -54 -54 -51 -53 -461 -195 -60 -21 -155 -55 -211 -74 -91 -32 -129 -39 -375 -66 -151 -16 -341 -37 -422 -47 -167 -19 -152 -10 -226 -128 -95 -151 -350 -446 -610 -705 -226 -226 -275 -266 -426 -345 -136 -72 -201 -118 -221 -157 -15 -28 -14 -35 6 -92 66 -179 178 -236 370 -186 222 57 366 119 703 304 205 112 287 152 361 175 74 23 225 38 461 46 293 10 404 28 501 78 56 29 125 100 157 161 31 59 32 65 32 186 -1 112 -4 133 -29 200 -28 74 -89 198 -165 337 -63 116 -69 104 71 153 518 179 515 178 595 262 75 80 105 153 117 282 3 30 11 45 32 60 51 36 92 84 121 143 23 48 29 74 31 149 4 90 4 91 35 109 58 34 129 109 157 165 28 56 110 327 110 365 0 22 -24 62 -50 82 -31 25 -90 9 -375 -104z m-1065 -1621 c0 -4 -11 -42 -25 -85 -61 -195 -103 -430 -112 -635 l-6 -143 -45 3 -45 3 -13 64 c-43 209 -232 441 -480 587 -43 25 -81 48 -83 49 -1 2 7 22 20 44 26 47 6 42 284 72 110 11 247 26 305 34 125 15 200 18 200 7z m168 -249 c86 -166 105 -225 106 -328 1 -81 -2 -95 -26 -136 -32 -54 -83 -91 -159 -115 -71 -21 -89 -15 -89 29 0 168 81 647 110 647 4 0 30 -44 58 -97z m-995 -64 c175 -99 302 -221 385 -369 30 -54 68 -167 59 -176 -2 -2 -55 -9 -118 -15 -105 -9 -202 -23 -255 -35 -17 -4 -27 4 -47 39 -45 75 -159 188 -250 247 -48 30 -86 58 -87 62 0 3 30 42 68 85 37 43 90 106 117 141 28 34 51 62 53 62 1 0 35 -18 75 -41z m-343 -404 c36 -21 82 -52 104 -69 45 -34 146 -154 146 -172 0 -7 -48 -38 -107 -69 -147 -78 -232 -125 -268 -147 -16 -10 -34 -18 -40 -18 -5 0 -25 33 -43 74 -22 47 -51 91 -84 124 l-50 50 133 136 c73 74 136 133 139 132 3 -2 34 -20 70 -41z m-403 -369 c40 -35 97 -142 91 -172 -4 -18 -145 -83 -259 -119 -162 -51 -239 -43 -274 30 -21 46 -33 35 140 130 70 39 152 91 183 117 32 25 62 47 68 47 6 1 28 -14 51 -33z"/><path d="M3360 1610 c-30 -10 -262 -80 -515 -155 -253 -75 -471 -140 -485 -145 -14 -5 -97 -30 -185 -56 -88 -25 -212 -62 -275 -81 -63 -19 -173 -52 -245 -73 -137 -40 -337 -100 -520 -155 -60 -18 -144 -43 -185 -55 -201 -58 -219 -68 -220 -122 0 -34 32 -68 64 -68 14 0 82 17 153 39 70 21 200 60 288 86 88 26 239 71 335 100 261 79 712 213 1005 300 143 42 271 80 285 85 14 5 97 30 185 55 342 101 450 136 463 152 18 25 15 77 -6 96 -24 22 -72 20 -142 -3z"/></g></svg> Talaria - Project Tracking Dashboard</h1>
-            <span class="header-info">Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</span>
+            <span class="header-info">Generated on {generated_at}</span>
         </header>
         
         <div class="toolbar-strip">
@@ -47,7 +295,7 @@ def get_html_template(event_types, date_from, date_to, data_json):
                 <h2>Dashboard Guide</h2>
 
                 <h3>Data Source</h3>
-                <p>The dashboard reads <strong>all sheets/tabs</strong> from the input Excel file. Records from every sheet are merged into a single dataset. Each record tracks which sheet it originated from.</p>
+                <p>The dashboard reads <strong>all sheets/tabs</strong> from the input Excel files. Records from every sheet are merged into a single dataset. Each record tracks which sheet it originated from and, when several files are combined, which file (shown as <em>file &rsaquo; sheet</em>).</p>
 
                 <h3>Event Types</h3>
                 <ul>
@@ -84,7 +332,7 @@ def get_html_template(event_types, date_from, date_to, data_json):
                     <li><strong>Event Type Filter:</strong> Filter the table by event type (Working Time, PO, Invoice, etc.) using the dropdown above the table.</li>
                     <li><strong>Column Sorting:</strong> Click any column header to sort. Click again to toggle between ascending and descending order. The active sort column shows an arrow indicator.</li>
                     <li><strong>Pagination:</strong> Choose page size (25, 50, 100, 250, or All rows) to control how many records are displayed at once.</li>
-                    <li><strong>Sheet Filter:</strong> Filter the table to show records from a specific Excel sheet/tab.</li>
+                    <li><strong>Sheet Filter:</strong> Filter the table to show records from a specific Excel sheet/tab (or file &rsaquo; sheet when several files are combined).</li>
                     <li><strong>Search:</strong> Full-text search across all fields.</li>
                     <li><strong>Comment Column:</strong> A visible column showing comment text (truncated if long; hover to see the full text). Comments come from both a dedicated Comment column and cell-level Excel comments (sticky notes).</li>
                     <li><strong>Export:</strong> Export filtered data to CSV (includes Sheet and Comment columns).</li>
@@ -178,7 +426,7 @@ def get_html_template(event_types, date_from, date_to, data_json):
                         <label for="eventTypeFilter">Event Type:</label>
                         <select id="eventTypeFilter">
                             <option value="all">All Types</option>
-                            {''.join(f'<option value="{et}">{et}</option>' for et in sorted(event_types))}
+                            {event_type_options}
                         </select>
                     </div>
                     <div class="filter-group">
@@ -308,7 +556,7 @@ def get_html_template(event_types, date_from, date_to, data_json):
                     <button class="btn-secondary btn-sm" id="nextPage">&raquo; Next</button>
                 </div>
             </div>
-        </details>
+        </details>{duplicates_html}
 
         <!-- Monthly Working Time Summary -->
         <details class="collapsible-section" id="sectionMonthly" open>
@@ -403,12 +651,33 @@ def get_html_template(event_types, date_from, date_to, data_json):
         }}
 
         // Embedded data
-        const allData = {data_json};
-        const generationDate = '{datetime.now().strftime('%Y-%m-%d')}';
-        let filteredData = [...allData];
+{DATA_DECODER_JS}
+        const recordFields = {json.dumps(FIELDS)};
+        const categoricalFields = {json.dumps(CATEGORICAL_FIELDS)};
+        const numericFields = {json.dumps(NUMERIC_FIELDS)};
+        let categories, allData, filteredData, multipleSources;
+        // Settles once the payload is decompressed (if it was) and decoded
+        const dataReady = loadPayload("""
+
+
+def _render_tail(compression, generation_date):
+    return f""", {compression}).then(payload => {{
+            categories = payload.dictionaries;
+            allData = decodePayload(payload);
+            filteredData = [...allData];
+            multipleSources = new Set(allData.map(r => r.source)).size > 1;
+        }});
+        const generationDate = '{generation_date}';
+
+        // Records merged from several workbooks are labelled "file › sheet"
+        function sheetLabel(row) {{
+            if (!row.sheet) return '';
+            return multipleSources && row.source ? `${{row.source}} › ${{row.sheet}}` : row.sheet;
+        }}
 
         // Initialize dashboard
-        $(document).ready(function() {{
+        $(document).ready(async function() {{
+            await dataReady;
             // Theme toggle
             $('#themeToggle').on('click', toggleTheme);
             // Help modal functionality
@@ -440,7 +709,7 @@ def get_html_template(event_types, date_from, date_to, data_json):
             }}
             
             // Populate sheet filter dropdown
-            const sheets = [...new Set(allData.map(r => r.sheet).filter(Boolean))].sort();
+            const sheets = [...new Set(allData.map(sheetLabel).filter(Boolean))].sort();
             sheets.forEach(s => {{
                 $('#tableSheetFilter').append($('<option>').val(s).text(s));
             }});
@@ -471,15 +740,16 @@ def get_html_template(event_types, date_from, date_to, data_json):
                 const eventTypeFilter = $('#tableEventTypeFilter').val();
                 let tableData = filteredData;
                 if (sheetFilter !== 'all') {{
-                    tableData = tableData.filter(row => row.sheet === sheetFilter);
+                    tableData = tableData.filter(row => sheetLabel(row) === sheetFilter);
                 }}
                 if (eventTypeFilter !== 'all') {{
-                    tableData = tableData.filter(row => row.event_type === eventTypeFilter);
+                    const eventTypeId = categoryCode('event_type', eventTypeFilter);
+                    tableData = tableData.filter(row => row.event_type_id === eventTypeId);
                 }}
                 if (searchTerm) {{
                     tableData = tableData.filter(row => {{
-                        return Object.values(row).some(val =>
-                            String(val).toLowerCase().includes(searchTerm)
+                        return recordFields.some(field =>
+                            String(row[field]).toLowerCase().includes(searchTerm)
                         );
                     }});
                 }}
@@ -511,6 +781,8 @@ def get_html_template(event_types, date_from, date_to, data_json):
         // Compute forecast status (green/yellow/red) for every project, using the
         // full dataset so the classification stays stable regardless of filters.
         function computeProjectStatuses(data) {{
+            // Numbers come straight from the typed columns, at each row's position
+            const {{amount: amounts, billable_amount: billableAmounts}} = dataColumns;
             const projectStats = {{}};
             data.forEach(row => {{
                 const project = row.project || 'Unknown';
@@ -524,11 +796,12 @@ def get_html_template(event_types, date_from, date_to, data_json):
                     }};
                 }}
                 const eventType = row.event_type || '';
-                const amount = row.amount || 0;
+                const amount = amounts[row.pos] || 0;
+                const billableAmount = billableAmounts[row.pos] || 0;
                 if (eventType === 'PO') {{
                     projectStats[project].poCoverage += amount;
-                }} else if (eventType === 'Working Time' && row.billable_amount) {{
-                    projectStats[project].workingTimeFees += row.billable_amount;
+                }} else if (eventType === 'Working Time' && billableAmount) {{
+                    projectStats[project].workingTimeFees += billableAmount;
                 }} else if (eventType === 'Purchase') {{
                     projectStats[project].purchaseExpenses += amount;
                 }} else if (eventType === 'T&L') {{
@@ -551,11 +824,12 @@ def get_html_template(event_types, date_from, date_to, data_json):
                 stats.events.forEach(row => {{
                     const eventType = row.event_type || '';
                     const date = row.date || '';
-                    const amount = row.amount || 0;
+                    const amount = amounts[row.pos] || 0;
+                    const billableAmount = billableAmounts[row.pos] || 0;
                     if (date && date.length >= 7) {{
                         const month = date.substring(0, 7);
-                        if (eventType === 'Working Time' && row.billable_amount) {{
-                            monthlyCharges[month] = (monthlyCharges[month] || 0) + row.billable_amount;
+                        if (eventType === 'Working Time' && billableAmount) {{
+                            monthlyCharges[month] = (monthlyCharges[month] || 0) + billableAmount;
                         }} else if ((eventType === 'Purchase' || eventType === 'T&L') && amount) {{
                             monthlyCharges[month] = (monthlyCharges[month] || 0) + amount;
                         }}
@@ -635,10 +909,13 @@ def get_html_template(event_types, date_from, date_to, data_json):
             const dateFrom = $('#dateFrom').val();
             const dateTo = $('#dateTo').val();
 
+            // Categorical filters compare codes, not strings
+            const projectId = project !== 'all' ? categoryCode('project', String(project)) : null;
+            const eventTypeId = eventType !== 'all' ? categoryCode('event_type', eventType) : null;
             filteredData = allData.filter(row => {{
-                if (project !== 'all' && row.project !== project) return false;
+                if (projectId !== null && row.project_id !== projectId) return false;
                 if (status !== 'all' && projectStatuses[row.project || 'Unknown'] !== status) return false;
-                if (eventType !== 'all' && row.event_type !== eventType) return false;
+                if (eventTypeId !== null && row.event_type_id !== eventTypeId) return false;
                 if (dateFrom && row.date < dateFrom) return false;
                 if (dateTo && row.date > dateTo) return false;
                 return true;
@@ -945,8 +1222,10 @@ def get_html_template(event_types, date_from, date_to, data_json):
         }}
         
         function updateSummary(data) {{
+            // Numbers come straight from the typed columns, at each row's position
+            const {{amount: amounts, billable_amount: billableAmounts, hours}} = dataColumns;
             const projects = [...new Set(data.map(r => r.project).filter(p => p))];
-            const totalHours = data.reduce((sum, r) => sum + (r.hours || 0), 0);
+            const totalHours = data.reduce((sum, r) => sum + (hours[r.pos] || 0), 0);
             
             // Calculate financials from filtered data
             let poCoverage = 0;
@@ -961,16 +1240,17 @@ def get_html_template(event_types, date_from, date_to, data_json):
 
             data.forEach(row => {{
                 const eventType = row.event_type || '';
-                const amount = row.amount || 0;
+                const amount = amounts[row.pos] || 0;
+                const billableAmount = billableAmounts[row.pos] || 0;
                 const project = row.project || '';
 
                 if (eventType === 'PO') {{
                     poCoverage += amount;
                 }} else if (eventType === 'Invoice') {{
                     invoices += amount;  // Track for information
-                }} else if (eventType === 'Working Time' && row.billable_amount) {{
-                    workingTimeFees += row.billable_amount;
-                    if (project) chargesByProject[project] = (chargesByProject[project] || 0) + row.billable_amount;
+                }} else if (eventType === 'Working Time' && billableAmount) {{
+                    workingTimeFees += billableAmount;
+                    if (project) chargesByProject[project] = (chargesByProject[project] || 0) + billableAmount;
                 }} else if (eventType === 'Purchase') {{
                     purchaseExpenses += amount;
                     if (project) chargesByProject[project] = (chargesByProject[project] || 0) + amount;
@@ -1103,7 +1383,7 @@ def get_html_template(event_types, date_from, date_to, data_json):
                 tr.append($('<td>').text(row.date || ''));
                 tr.append($('<td>').text(row.event_type || ''));
                 tr.append($('<td>').text(row.project || ''));
-                tr.append($('<td>').text(row.sheet || ''));
+                tr.append($('<td>').text(sheetLabel(row)));
                 tr.append($('<td>').text(formatEUR(row.billing_rate)));
                 let surchargeRateDisplay = '';
                 if (row.surcharge_rate !== null && row.surcharge_rate !== undefined) {{
@@ -1194,6 +1474,9 @@ def get_html_template(event_types, date_from, date_to, data_json):
         }});
 
         function renderCharts(data) {{
+            // Numbers come straight from the typed columns, at each row's position
+            const {{amount: amounts, billable_amount: billableAmounts, hours}} = dataColumns;
+
             // Financials by Project
             const projectPOCoverage = {{}};
             const projectCharges = {{}};
@@ -1210,7 +1493,9 @@ def get_html_template(event_types, date_from, date_to, data_json):
                 const project = row.project || 'Unknown';
                 const eventType = row.event_type || 'Unknown';
                 const date = row.date || '';
-                const amount = row.amount || 0;
+                const amount = amounts[row.pos] || 0;
+                const billableAmount = billableAmounts[row.pos] || 0;
+                const rowHours = hours[row.pos] || 0;
                 
                 // PO Coverage by project (includes PO events and positive deferment)
                 if (eventType === 'PO' && amount) {{
@@ -1239,8 +1524,8 @@ def get_html_template(event_types, date_from, date_to, data_json):
                 }}
                 
                 // Charges by project (Working Time fees, Purchase/T&L expenses - Deferment is NOT a charge)
-                if (eventType === 'Working Time' && row.billable_amount) {{
-                    projectCharges[project] = (projectCharges[project] || 0) + row.billable_amount;
+                if (eventType === 'Working Time' && billableAmount) {{
+                    projectCharges[project] = (projectCharges[project] || 0) + billableAmount;
                 }} else if ((eventType === 'Purchase' || eventType === 'T&L') && amount) {{
                     projectCharges[project] = (projectCharges[project] || 0) + amount;
                 }}
@@ -1251,8 +1536,8 @@ def get_html_template(event_types, date_from, date_to, data_json):
                 }}
                 
                 // Hours by project
-                if (row.hours) {{
-                    projectHours[project] = (projectHours[project] || 0) + row.hours;
+                if (rowHours) {{
+                    projectHours[project] = (projectHours[project] || 0) + rowHours;
                 }}
                 
                 // Timeline: aggregate by month (YYYY-MM)
@@ -1272,8 +1557,8 @@ def get_html_template(event_types, date_from, date_to, data_json):
                     }}
 
                     // Monthly Charges (Deferment is NOT a charge)
-                    if (eventType === 'Working Time' && row.billable_amount) {{
-                        monthlyCharges[month] = (monthlyCharges[month] || 0) + row.billable_amount;
+                    if (eventType === 'Working Time' && billableAmount) {{
+                        monthlyCharges[month] = (monthlyCharges[month] || 0) + billableAmount;
                     }} else if ((eventType === 'Purchase' || eventType === 'T&L') && amount) {{
                         monthlyCharges[month] = (monthlyCharges[month] || 0) + amount;
                     }}
@@ -1285,13 +1570,14 @@ def get_html_template(event_types, date_from, date_to, data_json):
             const monthlyHoursMonthSet = new Set();
             const monthlyHoursProjectSet = new Set();
             data.forEach(row => {{
-                if (row.hours && row.date && row.date.length >= 7) {{
+                const rowHours = hours[row.pos];
+                if (rowHours && row.date && row.date.length >= 7) {{
                     const month = row.date.substring(0, 7);
                     const project = row.project || 'Unknown';
                     monthlyHoursMonthSet.add(month);
                     monthlyHoursProjectSet.add(project);
                     if (!monthlyHoursByProject[project]) monthlyHoursByProject[project] = {{}};
-                    monthlyHoursByProject[project][month] = (monthlyHoursByProject[project][month] || 0) + row.hours;
+                    monthlyHoursByProject[project][month] = (monthlyHoursByProject[project][month] || 0) + rowHours;
                 }}
             }});
 
@@ -1640,11 +1926,14 @@ def get_html_template(event_types, date_from, date_to, data_json):
             const monthlyPOCoverage = {{}};
             let closureMonth = null;
             let closureDate = null;
-            
+            // Numbers come straight from the typed columns, at each row's position
+            const {{amount: amounts, billable_amount: billableAmounts}} = dataColumns;
+
             projectData.forEach(row => {{
                 const eventType = row.event_type || '';
                 const date = row.date || '';
-                const amount = row.amount || 0;
+                const amount = amounts[row.pos] || 0;
+                const billableAmount = billableAmounts[row.pos] || 0;
                 
                 // Check for Closure event (project end date)
                 if (eventType === 'Closure' && date) {{
@@ -1672,8 +1961,8 @@ def get_html_template(event_types, date_from, date_to, data_json):
                     }}
 
                     // Charges (for forecast trend calculation) - Deferment is NOT a charge
-                    if (eventType === 'Working Time' && row.billable_amount) {{
-                        monthlyCharges[month] = (monthlyCharges[month] || 0) + row.billable_amount;
+                    if (eventType === 'Working Time' && billableAmount) {{
+                        monthlyCharges[month] = (monthlyCharges[month] || 0) + billableAmount;
                     }} else if ((eventType === 'Purchase' || eventType === 'T&L') && amount) {{
                         monthlyCharges[month] = (monthlyCharges[month] || 0) + amount;
                     }}
@@ -1861,7 +2150,8 @@ def get_html_template(event_types, date_from, date_to, data_json):
                 
                 // Calculate forecast for each project
                 projects.forEach(project => {{
-                    const projectData = allData.filter(row => row.project === project);
+                    const projectId = categoryCode('project', project);
+                    const projectData = allData.filter(row => row.project_id === projectId);
                     const forecast = calculateProjectForecast(projectData);
                     if (forecast) {{
                         projectForecasts[project] = forecast;
@@ -1901,7 +2191,8 @@ def get_html_template(event_types, date_from, date_to, data_json):
                 // Find months that have charge events (same logic as table)
                 monthsWithCharges = new Set();
                 projects.forEach(project => {{
-                    const projectData = allData.filter(row => row.project === project);
+                    const projectId = categoryCode('project', project);
+                    const projectData = allData.filter(row => row.project_id === projectId);
                     projectData.forEach(row => {{
                         const eventType = row.event_type || '';
                         const date = row.date || '';
@@ -1977,7 +2268,8 @@ def get_html_template(event_types, date_from, date_to, data_json):
             }} else {{
                 // For individual project: use existing logic
                 // Always use allData for calculations, not filtered data
-                const projectData = allData.filter(row => row.project === selectedProject);
+                const projectId = categoryCode('project', String(selectedProject));
+                const projectData = allData.filter(row => row.project_id === projectId);
                 forecast = calculateProjectForecast(projectData);
                 if (!forecast) {{
                     // No data - show empty chart
@@ -2336,6 +2628,8 @@ def get_html_template(event_types, date_from, date_to, data_json):
         function renderMonthlySummary(data, projectFilter) {{
             const tbody = $('#monthlySummaryBody');
             tbody.empty();
+            // Numbers come straight from the typed columns, at each row's position
+            const {{billable_amount: billableAmounts, hours}} = dataColumns;
             
             // Filter data by project if specified
             let filteredData = data;
@@ -2356,9 +2650,10 @@ def get_html_template(event_types, date_from, date_to, data_json):
                             projects: new Set()
                         }};
                     }}
-                    monthlySummary[month].hours += row.hours || 0;
-                    if (row.billable_amount) {{
-                        monthlySummary[month].fees += row.billable_amount;
+                    monthlySummary[month].hours += hours[row.pos] || 0;
+                    const billableAmount = billableAmounts[row.pos];
+                    if (billableAmount) {{
+                        monthlySummary[month].fees += billableAmount;
                     }}
                     if (row.project) {{
                         monthlySummary[month].projects.add(row.project);
@@ -2381,6 +2676,8 @@ def get_html_template(event_types, date_from, date_to, data_json):
         }}
         
         function renderProjectDetails(data) {{
+            // Numbers come straight from the typed columns, at each row's position
+            const {{amount: amounts, billable_amount: billableAmounts, hours}} = dataColumns;
             const projectStats = {{}};
             
             data.forEach(row => {{
@@ -2402,14 +2699,15 @@ def get_html_template(event_types, date_from, date_to, data_json):
                 }}
                 
                 const eventType = row.event_type || '';
-                const amount = row.amount || 0;
+                const amount = amounts[row.pos] || 0;
+                const billableAmount = billableAmounts[row.pos] || 0;
                 
                 if (eventType === 'PO') {{
                     projectStats[project].poCoverage += amount;
                 }} else if (eventType === 'Invoice') {{
                     projectStats[project].invoices += amount;  // Informational only
-                }} else if (eventType === 'Working Time' && row.billable_amount) {{
-                    projectStats[project].workingTimeFees += row.billable_amount;
+                }} else if (eventType === 'Working Time' && billableAmount) {{
+                    projectStats[project].workingTimeFees += billableAmount;
                 }} else if (eventType === 'Purchase') {{
                     projectStats[project].purchaseExpenses += amount;
                 }} else if (eventType === 'T&L') {{
@@ -2434,7 +2732,8 @@ def get_html_template(event_types, date_from, date_to, data_json):
                     }}
                 }}
                 
-                if (row.hours) projectStats[project].totalHours += row.hours;
+                const rowHours = hours[row.pos];
+                if (rowHours) projectStats[project].totalHours += rowHours;
                 if (row.event_type) projectStats[project].eventTypes.add(row.event_type);
                 projectStats[project].events.push(row);
             }});
@@ -2456,13 +2755,14 @@ def get_html_template(event_types, date_from, date_to, data_json):
                 stats.events.forEach(row => {{
                     const eventType = row.event_type || '';
                     const date = row.date || '';
-                    const amount = row.amount || 0;
+                    const amount = amounts[row.pos] || 0;
+                    const billableAmount = billableAmounts[row.pos] || 0;
 
                     if (date && date.length >= 7) {{
                         const month = date.substring(0, 7);
                         // Charges for forecast calculation - Deferment is NOT a charge
-                        if (eventType === 'Working Time' && row.billable_amount) {{
-                            monthlyCharges[month] = (monthlyCharges[month] || 0) + row.billable_amount;
+                        if (eventType === 'Working Time' && billableAmount) {{
+                            monthlyCharges[month] = (monthlyCharges[month] || 0) + billableAmount;
                         }} else if ((eventType === 'Purchase' || eventType === 'T&L') && amount) {{
                             monthlyCharges[month] = (monthlyCharges[month] || 0) + amount;
                         }}
@@ -2741,7 +3041,7 @@ def get_html_template(event_types, date_from, date_to, data_json):
                     row.date || '',
                     row.event_type || '',
                     row.project || '',
-                    row.sheet || '',
+                    sheetLabel(row),
                     formatEUR(row.billing_rate).replace('€', '') || '',
                     (() => {{
                         if (row.surcharge_rate !== null && row.surcharge_rate !== undefined) {{
@@ -2774,3 +3074,7 @@ def get_html_template(event_types, date_from, date_to, data_json):
 </body>
 </html>
 """
+
+
+_HEAD = _segments(_render_head, ('generated_at', 'event_type_options', 'date_from', 'date_to', 'duplicates_html'))
+_TAIL = _segments(_render_tail, ('compression', 'generation_date'))
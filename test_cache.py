@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Tests for cache.py"""
+
+import os
+import shutil
+import zipfile
+import pytest
+from pathlib import Path
+
+import openpyxl
+import parsers
+from cache import MemoryCache, RecordCache, file_digest
+from conftest import HEADER, write_xlsx
+from parsers import read_excel_data
+from xlsx_reader import sheet_parts
+
+
+TEST_FILE = Path(__file__).parent / 'test_input.xlsx'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RecordCache(tmp_path / 'cache', max_bytes=10 * 1024 * 1024)
+
+
+# ── RecordCache ───────────────────────────────────────────────────────────
+
+class TestRecordCache:
+    def test_miss(self, cache):
+        assert cache.get(cache.key('nothing')) is None
+
+    def test_round_trip(self, cache):
+        records = [{'index': 1, 'project': 'Alpha', 'billing_rate': None, 'hours': 1.5}]
+        cache.put('k', records)
+        assert cache.get('k') == records
+
+    def test_key_depends_on_all_parts(self):
+        assert RecordCache.key('a', 1) != RecordCache.key('a', 2)
+        assert RecordCache.key('a', 1) == RecordCache.key('a', 1)
+
+    def test_corrupt_entry_is_a_miss(self, cache):
+        cache.put('k', [1, 2, 3])
+        (cache.cache_dir / 'k.bin').write_bytes(b'not zlib')
+        assert cache.get('k') is None
+        assert not (cache.cache_dir / 'k.bin').exists()
+
+    def test_lru_eviction(self, tmp_path):
+        payload = os.urandom(4000)  # incompressible
+        cache = RecordCache(tmp_path / 'cache', max_bytes=10000)
+        cache.put('a', payload)
+        cache.put('b', payload)
+        os.utime(cache.cache_dir / 'a.bin', (1, 1))
+        os.utime(cache.cache_dir / 'b.bin', (2, 2))
+        cache.get('a')  # 'a' becomes most recently used
+        cache.put('c', payload)
+        assert cache.get('a') == payload
+        assert cache.get('b') is None
+        assert cache.get('c') == payload
+
+
+# ── MemoryCache ───────────────────────────────────────────────────────────
+
+class TestMemoryCache:
+    def test_round_trip_returns_copies(self):
+        cache = MemoryCache()
+        records = [{'index': 1, 'project': 'Alpha'}]
+        cache.put('k', records)
+        first = cache.get('k')
+        first[0]['index'] = 99
+        assert cache.get('k') == records
+        assert cache.get('missing') is None
+
+    def test_same_keys_as_record_cache(self):
+        assert MemoryCache.key('a', 1) == RecordCache.key('a', 1)
+
+    def test_lru_eviction(self):
+        payload = os.urandom(4000)
+        cache = MemoryCache(max_bytes=10000)
+        cache.put('a', payload)
+        cache.put('b', payload)
+        cache.get('a')  # 'a' becomes most recently used
+        cache.put('c', payload)
+        assert cache.get('a') == payload
+        assert cache.get('b') is None
+        assert cache.get('c') == payload
+
+    def test_incremental_read(self):
+        cache = MemoryCache()
+        expected = read_excel_data(str(TEST_FILE))
+        assert read_excel_data(str(TEST_FILE), cache=cache) == expected
+        assert read_excel_data(str(TEST_FILE), cache=cache) == expected
+
+
+# ── read_excel_data with a cache ──────────────────────────────────────────
+
+@pytest.mark.skipif(not TEST_FILE.exists(), reason='test_input.xlsx not found')
+class TestCachedRead:
+    def test_hit_skips_workbook(self, cache, monkeypatch):
+        expected = read_excel_data(str(TEST_FILE), cache=cache)
+
+        def fail(*args, **kwargs):
+            raise AssertionError('workbook opened on a cache hit')
+        monkeypatch.setattr(openpyxl, 'load_workbook', fail)
+
+        assert read_excel_data(str(TEST_FILE), cache=cache) == expected
+
+    def test_changed_content_misses(self, cache, tmp_path):
+        copy = tmp_path / 'copy.xlsx'
+        shutil.copy(TEST_FILE, copy)
+        read_excel_data(str(copy), cache=cache)
+        before = file_digest(copy)
+
+        with open(copy, 'ab') as f:
+            f.write(b'\0')  # trailing bytes after the zip are ignored by readers
+        assert file_digest(copy) != before
+        entries = len(list(cache.cache_dir.glob('*.bin')))
+        read_excel_data(str(copy), cache=cache)
+        # Only a new workbook entry: the sheets themselves are unchanged
+        assert len(list(cache.cache_dir.glob('*.bin'))) == entries + 1
+
+
+# ── Per-sheet incremental re-ingestion ────────────────────────────────────
+
+class TestIncrementalRead:
+    SHEETS = {
+        'Alpha': [HEADER, ['2026-01-01', 'Working Time', 'P1', 50, 0.05, 10, None],
+                  ['2026-01-02', 'PO', 'P1', None, None, None, 1000]],
+        'Beta': [HEADER, ['2026-02-01', 'Working Time', 'P2', 60, None, 5, None]],
+    }
+
+    @pytest.fixture
+    def parsed_sheets(self, monkeypatch):
+        names = []
+        read_sheet = parsers._read_sheet
+
+        def spy(workbook, sheet_name, *args):
+            names.append(sheet_name)
+            return read_sheet(workbook, sheet_name, *args)
+        monkeypatch.setattr(parsers, '_read_sheet', spy)
+        return names
+
+    def test_only_changed_sheet_is_parsed(self, cache, tmp_path, parsed_sheets):
+        path = tmp_path / 'book.xlsx'
+        write_xlsx(path, self.SHEETS)
+        read_excel_data(str(path), cache=cache)
+        assert parsed_sheets == ['Alpha', 'Beta']
+
+        # Edit Beta with a new string; the shared string table grows
+        changed = dict(self.SHEETS, Beta=self.SHEETS['Beta'] + [['2026-02-02', 'Invoice', 'P9', None, None, None, 7]])
+        write_xlsx(path, changed)
+        parsed_sheets.clear()
+        records = read_excel_data(str(path), cache=cache)
+
+        assert parsed_sheets == ['Beta']
+        assert records == read_excel_data(str(path))
+        assert [r['index'] for r in records] == [1, 2, 3, 4]
+
+    def test_memory_cache_with_jobs_across_workbooks(self, tmp_path, monkeypatch):
+        paths = [str(tmp_path / 'a.xlsx'), str(tmp_path / 'b.xlsx')]
+        for path in paths:
+            write_xlsx(path, self.SHEETS)
+        cache = MemoryCache()
+        expected = parsers.read_workbooks(paths)
+        assert parsers.read_workbooks(paths, jobs=2, cache=cache) == expected
+
+        stale = []
+        parse_sheets = parsers._parse_sheets
+
+        def spy(file_path, sheet_names, *args):
+            stale.append((Path(file_path).name, list(sheet_names)))
+            return parse_sheets(file_path, sheet_names, *args)
+        monkeypatch.setattr(parsers, '_parse_sheets', spy)
+
+        changed = dict(self.SHEETS, Beta=self.SHEETS['Beta'] + [['2026-02-02', 'Invoice', 'P9', None, None, None, 7]])
+        write_xlsx(paths[1], changed)
+        records = parsers.read_workbooks(paths, jobs=2, cache=cache)
+        assert stale == [('b.xlsx', ['Beta'])]
+        assert records == parsers.read_workbooks(paths)
+
+    def test_changed_shared_string_invalidates_sheet(self, tmp_path):
+        path = tmp_path / 'book.xlsx'
+        write_xlsx(path, self.SHEETS)
+        with zipfile.ZipFile(path) as zf:
+            before = parsers._sheet_fingerprints(zf, sheet_parts(zf))
+
+        renamed = dict(self.SHEETS, Alpha=[HEADER] + [row[:2] + ['Renamed'] + row[3:] for row in self.SHEETS['Alpha'][1:]])
+        write_xlsx(path, renamed)
+        with zipfile.ZipFile(path) as zf:
+            after = parsers._sheet_fingerprints(zf, sheet_parts(zf))
+
+        assert before['Alpha'] != after['Alpha']
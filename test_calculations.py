@@ -1,9 +1,22 @@
 #!/usr/bin/env python3
 """Tests for calculations.py"""
 
+import base64
+import gzip
+import io
 import json
+import math
+import os
+import struct
+import tracemalloc
+import zlib
 import pytest
-from calculations import calculate_statistics, calculate_date_range, prepare_json_data
+from datetime import date, timedelta
+from records import FIELDS, Record
+from calculations import (
+    Categories, CompressedWriter, RecordStats, calculate_statistics, calculate_date_range, prepare_json_data,
+    write_json_data,
+)
 
 
 def _make_record(**overrides):
@@ -20,12 +33,18 @@ def _make_record(**overrides):
         'billable_amount': 525.0,
         'comment': '',
         'sheet': 'Sheet1',
+        'source': None,
         'year_month': '2026-01'
     }
     record.update(overrides)
     return record
 
 
+def _make_full_record(**overrides):
+    """_make_record as a records.Record, for the JSON writers."""
+    return Record(**_make_record(**overrides))
+
+
 # ── calculate_statistics ──────────────────────────────────────────────────
 
 class TestCalculateStatistics:
@@ -112,3 +131,224 @@ class TestPrepareJsonData:
     def test_empty_records(self):
         parsed = json.loads(prepare_json_data([]))
         assert parsed == []
+
+
+# ── Categorical dictionaries ──────────────────────────────────────────────
+
+class TestCategories:
+    def test_codes_in_first_seen_order(self):
+        categories = Categories()
+        assert [categories.code('project', p) for p in ['B', 'A', 'B', 'C', 'A']] == [0, 1, 0, 2, 1]
+        assert categories.values['project'] == ['B', 'A', 'C']
+        assert categories.values['event_type'] == []
+
+    def test_json_carries_codes(self):
+        records = [_make_full_record(event_type='PO', project='P1'),
+                   _make_full_record(event_type='Invoice', project='P1'),
+                   _make_full_record(event_type='PO', project='P2')]
+        categories = Categories()
+        result = json.loads(prepare_json_data(records, categories=categories))
+        assert [(r['event_type'], r['project'], r['sheet']) for r in result] == [(0, 0, 0), (1, 0, 0), (0, 1, 0)]
+        assert categories.values == {'event_type': ['PO', 'Invoice'], 'project': ['P1', 'P2'], 'sheet': ['Sheet1']}
+        # Decoding restores the records
+        for row in result:
+            for field, values in categories.values.items():
+                row[field] = values[row[field]]
+        assert result == [r.to_dict() for r in records]
+
+    @pytest.mark.parametrize('batch_size', [1, 2, 1000])
+    def test_write_json_matches_prepare(self, batch_size):
+        records = [_make_full_record(event_type=et) for et in ['PO', 'Invoice', 'PO', 'T&L']]
+        buffer = io.StringIO()
+        write_json_data(iter(records), buffer, batch_size=batch_size, categories=Categories())
+        assert buffer.getvalue() == prepare_json_data(records, categories=Categories())
+
+
+# ── Columnar encoding ─────────────────────────────────────────────────────
+
+def _decode_columnar(payload):
+    """Rebuild record dicts from a columnar payload, as the dashboard's decodePayload does."""
+    result = []
+    for batch in payload['batches']:
+        columns = batch['columns']
+        for i in range(batch['length']):
+            row = {}
+            for field in payload['fields']:
+                if field not in columns:
+                    row[field] = batch['index_start'] + i if field == 'index' else (row['date'] or '')[:7]
+                    continue
+                column = columns[field]
+                if isinstance(column, dict):
+                    row[field] = _typed_column(column)[i]
+                    continue
+                value = column[i] if isinstance(column, list) else column
+                row[field] = payload['dictionaries'][field][value] if field in payload['dictionaries'] else value
+            result.append(row)
+    return result
+
+
+def _typed_column(column):
+    """Values of a typed-encoding column: float64 (NaN for null) or int32 day numbers."""
+    (kind, packed), = column.items()
+    if kind == 'float64':
+        values = struct.unpack(f'<{len(base64.b64decode(packed)) // 8}d', base64.b64decode(packed))
+        return [None if math.isnan(v) else v for v in values]
+    days = struct.unpack(f'<{len(base64.b64decode(packed)) // 4}i', base64.b64decode(packed))
+    return ['' if d == -2 ** 31 else (date(1970, 1, 1) + timedelta(days=d)).isoformat() for d in days]
+
+
+def _workbook_records(n):
+    """n records shaped like a tracking sheet: sequential, dates spread over two years."""
+    for i in range(n):
+        working = i % 3 == 0
+        yield _make_full_record(index=i + 1, date=f'202{5 + i % 2}-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+                                event_type=['Working Time', 'PO', 'Invoice'][i % 3], project=f'Project_{i % 40}',
+                                surcharge_rate=0.05 if working else None,
+                                hours=float(i % 9 + 1) if working else None,
+                                amount=0.0 if working else float(i * 37 % 100000),
+                                billable_amount=(i % 9 + 1) * 52.5 if working else float(i * 37 % 100000),
+                                comment='note' if i % 7 == 0 else '', year_month=f'202{5 + i % 2}-{i % 12 + 1:02d}')
+
+
+class TestColumnar:
+    RECORDS = [
+        _make_full_record(index=3, year_month='2026-01'),
+        _make_full_record(index=4, date='2026-02-01', year_month='2026-02', project='Ünïcode €', billing_rate=None),
+        _make_full_record(index=9, date='', year_month='', comment='multi\nline "quoted"', hours=2.5, source='a.xlsx'),
+    ]
+
+    @pytest.mark.parametrize('batch_size', [1, 2, 1000])
+    def test_round_trip(self, batch_size):
+        out = io.StringIO()
+        write_json_data(iter(self.RECORDS), out, batch_size, encoding='columnar')
+        payload = json.loads(out.getvalue())
+        assert payload['fields'] == list(FIELDS)
+        assert _decode_columnar(payload) == [r.to_dict() for r in self.RECORDS]
+
+    def test_write_json_matches_prepare(self):
+        out = io.StringIO()
+        write_json_data(iter(self.RECORDS), out, encoding='columnar')
+        assert out.getvalue() == prepare_json_data(self.RECORDS, encoding='columnar')
+
+    def test_compact_columns(self):
+        payload = json.loads(prepare_json_data(list(_workbook_records(10)), encoding='columnar'))
+        batch = payload['batches'][0]
+        assert batch['index_start'] == 1
+        assert 'index' not in batch['columns'] and 'year_month' not in batch['columns']
+        assert batch['columns']['project'][:3] == [0, 1, 2]
+        assert batch['columns']['sheet'] == 0
+        assert payload['dictionaries']['event_type'] == ['Working Time', 'PO', 'Invoice']
+        assert '\n' not in prepare_json_data(list(_workbook_records(10)), encoding='columnar')
+
+    def test_irregular_rows_keep_their_columns(self):
+        payload = json.loads(prepare_json_data(self.RECORDS, encoding='columnar'))
+        assert payload['batches'][0]['columns']['index'] == [3, 4, 9]
+        records = self.RECORDS[:1] + [_make_full_record(year_month='2025-12')]
+        assert 'year_month' in json.loads(prepare_json_data(records, encoding='columnar'))['batches'][0]['columns']
+
+    def test_order_of_magnitude_smaller(self):
+        records = list(_workbook_records(20000))
+        rows = prepare_json_data(records)
+        columnar = prepare_json_data(records, encoding='columnar')
+        assert len(rows) / len(columnar) >= 10
+        assert _decode_columnar(json.loads(columnar)) == json.loads(rows)
+
+    @pytest.mark.parametrize('batch_size', [1, 2, 1000])
+    def test_typed_round_trip(self, batch_size):
+        records = self.RECORDS + list(_workbook_records(50))
+        out = io.StringIO()
+        write_json_data(iter(records), out, batch_size, encoding='typed')
+        payload = json.loads(out.getvalue())
+        assert payload['encoding'] == 'typed'
+        assert _decode_columnar(payload) == [r.to_dict() for r in records]
+
+    def test_typed_columns(self):
+        records = [_make_full_record(index=1, date='2026-01-15', hours=1.5),
+                   _make_full_record(index=2, date='1969-12-31', hours=None)]
+        columns = json.loads(prepare_json_data(records, encoding='typed'))['batches'][0]['columns']
+        assert base64.b64decode(columns['date']['days']) == struct.pack('<2i', 20468, -1)
+        assert base64.b64decode(columns['hours']['float64'])[:8] == struct.pack('<d', 1.5)
+        assert columns['billing_rate'] == 50
+
+    def test_typed_falls_back_for_text_dates(self):
+        records = [_make_full_record(date='2026-01-15'), _make_full_record(date='sometime', year_month='')]
+        payload = json.loads(prepare_json_data(records, encoding='typed'))
+        assert payload['batches'][0]['columns']['date'] == [0, 1]
+        assert _decode_columnar(payload) == [r.to_dict() for r in records]
+
+    def test_unknown_encoding(self):
+        with pytest.raises(ValueError):
+            prepare_json_data([], encoding='xml')
+
+
+# ── Compression ───────────────────────────────────────────────────────────
+
+class TestCompressedWriter:
+    @pytest.mark.parametrize('compression, decompress', [('gzip', gzip.decompress), ('deflate', zlib.decompress)])
+    def test_round_trip(self, compression, decompress):
+        records = list(_workbook_records(2000))
+        out = io.StringIO()
+        writer = CompressedWriter(out, compression)
+        write_json_data(iter(records), writer, batch_size=7, encoding='columnar')
+        writer.finish()
+        packed = out.getvalue()
+        plain = io.StringIO()
+        write_json_data(iter(records), plain, batch_size=7, encoding='columnar')
+        columnar = plain.getvalue()
+        assert decompress(base64.b64decode(packed)).decode('utf-8') == columnar
+        assert len(packed) * 3 < len(columnar)
+
+    def test_unknown_compression(self):
+        with pytest.raises(ValueError):
+            CompressedWriter(io.StringIO(), 'brotli')
+
+
+# ── Streaming consumers ───────────────────────────────────────────────────
+
+def _stream(n):
+    """Generate n distinct records without ever holding them all."""
+    for i in range(n):
+        yield _make_record(index=i + 1, date=f'2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+                           event_type=['Working Time', 'PO', 'Invoice'][i % 3], project=f'P{i % 40}')
+
+
+class TestStreaming:
+    def test_stats_from_a_generator(self):
+        stats = RecordStats()
+        for _ in stats.track(_stream(100)):
+            pass
+        assert stats.count == 100
+        assert sorted(stats.statistics()['event_types']) == ['Invoice', 'PO', 'Working Time']
+        assert stats.date_range() == calculate_date_range(list(_stream(100)))
+        assert stats.date_range() == {'date_from': '2026-01-01', 'date_to': '2026-12-28'}
+
+    def test_calculations_accept_generators(self):
+        assert calculate_date_range(_stream(10)) == calculate_date_range(list(_stream(10)))
+        assert sorted(calculate_statistics(_stream(10))['event_types']) == ['Invoice', 'PO', 'Working Time']
+
+    @pytest.mark.parametrize('records', [
+        [],
+        [_make_record()],
+        [_make_record(comment='multi\nline "quoted"'), _make_record(billing_rate=None, project='Ünïcode €')],
+    ])
+    @pytest.mark.parametrize('batch_size', [1, 2, 1000])
+    def test_write_json_matches_prepare(self, records, batch_size):
+        out = io.StringIO()
+        write_json_data(iter(records), out, batch_size)
+        assert out.getvalue() == prepare_json_data(records)
+
+    def test_memory_stays_flat(self):
+        """Peak memory of stats + JSON writing does not grow with the stream."""
+        def peak(n):
+            stats = RecordStats()
+            with open(os.devnull, 'w', encoding='utf-8') as sink:
+                tracemalloc.start()
+                try:
+                    write_json_data(stats.track(_stream(n)), sink)
+                    return tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+
+        small, large = peak(2000), peak(20000)
+        assert large < small * 1.5
+        assert large < 4 * 1024 * 1024
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Tests for duplicates.py"""
+
+import json
+import pytest
+from datetime import datetime
+
+from conftest import HEADER, write_xlsx
+from duplicates import DuplicateFinder, diff_records, duplicate_key, find_duplicates
+from generate_dashboard import generate_html, main
+from parsers import read_excel_data
+from records import Record
+
+
+def _record(index=1, date='2026-01-05', event_type='Working Time', project='Alpha', hours=2.0, amount=0.0,
+            comment='', sheet='Jan', source='book.xlsx', row=2):
+    return Record(index=index, date=date, event_type=event_type, project=project, billing_rate=50.0,
+                  surcharge_rate=None, hours=hours, amount=amount, billable_amount=100.0, comment=comment,
+                  sheet=sheet, source=source, year_month=date[:7], row=row)
+
+
+def _row(day, project, hours, comment=None):
+    return [datetime(2026, 1, day), 'Working Time', project, 50, None, hours, None, comment]
+
+
+# ── Duplicates ────────────────────────────────────────────────────────────
+
+class TestDuplicates:
+    def test_key_is_normalized(self):
+        assert duplicate_key(_record(project='Alpha ', hours=2.0)) == duplicate_key(_record(project='alpha',
+                                                                                            hours=2.001))
+        assert duplicate_key(_record()) != duplicate_key(_record(hours=3.0))
+
+    def test_exact_and_near(self):
+        groups = find_duplicates([
+            _record(index=1, sheet='Jan', row=2),
+            _record(index=2, sheet='Feb', row=5),
+            _record(index=3, project='Beta', row=3),
+            _record(index=4, project='Beta', comment='retyped', row=4),
+            _record(index=5, project='Gamma', row=6),
+        ])
+        assert [(g['kind'], g['project'], [loc['index'] for loc in g['rows']]) for g in groups] == [
+            ('exact', 'alpha', [1, 2]),
+            ('near', 'beta', [3, 4]),
+        ]
+        assert groups[0]['rows'][1] == {'index': 2, 'source': 'book.xlsx', 'sheet': 'Feb', 'row': 5}
+
+    def test_no_duplicates(self):
+        assert find_duplicates([_record(index=1), _record(index=2, date='2026-01-06')]) == []
+
+    def test_track_passes_records_through(self):
+        records = [_record(index=1), _record(index=2)]
+        finder = DuplicateFinder()
+        assert list(finder.track(iter(records))) == records
+        assert finder.count == 2
+        assert len(finder.groups()) == 1
+
+
+# ── Diff ──────────────────────────────────────────────────────────────────
+
+class TestDiff:
+    def test_added_removed_changed(self):
+        old = [_record(index=1, row=2), _record(index=2, project='Beta', row=3),
+               _record(index=3, project='Gamma', row=4)]
+        new = [_record(index=1, project='Beta', row=2), _record(index=2, row=3, hours=5.0),
+               _record(index=3, project='Delta', row=4)]
+        diff = diff_records(old, new)
+        assert diff['unchanged'] == 1
+        assert [r['project'] for r in diff['added']] == ['Delta']
+        assert [r['project'] for r in diff['removed']] == ['Gamma']
+        assert len(diff['changed']) == 1
+        change = diff['changed'][0]
+        assert change['fields'] == ['hours']
+        assert (change['old']['row'], change['new']['row']) == (2, 3)
+
+    def test_ignores_moves_and_source_names(self):
+        old = [_record(index=1, row=2, source='v1.xlsx'), _record(index=2, project='Beta', row=3, source='v1.xlsx')]
+        new = [_record(index=1, project='Beta', row=2, source='v2.xlsx'), _record(index=2, row=3, source='v2.xlsx')]
+        assert diff_records(old, new) == {'added': [], 'removed': [], 'changed': [], 'unchanged': 2}
+
+    def test_sheets_are_compared(self):
+        diff = diff_records([_record(sheet='Jan')], [_record(sheet='Feb')])
+        assert [r['sheet'] for r in diff['added']] == ['Feb']
+        assert [r['sheet'] for r in diff['removed']] == ['Jan']
+
+
+# ── Command line and dashboard ────────────────────────────────────────────
+
+class TestCli:
+    @pytest.fixture
+    def books(self, tmp_path):
+        header = HEADER + ['Comment']
+        old, new = tmp_path / 'v1.xlsx', tmp_path / 'v2.xlsx'
+        write_xlsx(old, {'Jan': [header, _row(5, 'Alpha', 2), _row(6, 'Beta', 3)]})
+        write_xlsx(new, {
+            'Jan': [header, _row(5, 'Alpha', 2), _row(6, 'Beta', 4)],
+            'Copy': [header, _row(5, 'Alpha', 2), _row(6, 'Beta', 4, 'pasted')],
+        })
+        return old, new
+
+    def test_duplicates_json(self, books, capsys):
+        with pytest.raises(SystemExit) as exc:
+            main([str(books[1]), '--duplicates', '--duplicates-format', 'json'])
+        assert exc.value.code == 1
+        groups = json.loads(capsys.readouterr().out)
+        assert [g['kind'] for g in groups] == ['exact', 'near']
+        assert [(loc['sheet'], loc['row']) for loc in groups[0]['rows']] == [('Jan', 2), ('Copy', 2)]
+
+    def test_duplicates_text_clean(self, books, capsys):
+        with pytest.raises(SystemExit) as exc:
+            main(['--duplicates', str(books[0])])
+        assert exc.value.code == 0
+        assert '0 duplicate groups' in capsys.readouterr().out
+
+    def test_diff(self, books, capsys):
+        with pytest.raises(SystemExit) as exc:
+            main([str(books[1]), '--diff', str(books[0]), '--diff-format', 'json'])
+        assert exc.value.code == 1
+        diff = json.loads(capsys.readouterr().out)
+        assert (len(diff['added']), len(diff['removed']), len(diff['changed']), diff['unchanged']) == (2, 0, 1, 1)
+        assert diff['changed'][0]['fields'] == ['hours', 'billable_amount']
+
+        with pytest.raises(SystemExit):
+            main([str(books[1]), '--diff', str(books[0])])
+        assert '2 added, 0 removed, 1 changed, 1 unchanged' in capsys.readouterr().out
+
+    def test_dashboard_panel(self, books):
+        records = read_excel_data(str(books[1]))
+        assert 'sectionDuplicates' not in generate_html(records)
+        html = generate_html(records, duplicates=DuplicateFinder())
+        assert 'id="sectionDuplicates"' in html
+        assert '(2 groups)' in html
+        assert 'v2.xlsx › Copy row 3' in html
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Tests for filters.py"""
+
+from filters import RecordFilter
+
+
+# ── RecordFilter ──────────────────────────────────────────────────────────
+
+class TestRecordFilter:
+    def test_empty_filter_matches_everything(self):
+        row_filter = RecordFilter()
+        assert not row_filter.filters_rows
+        assert row_filter.wants_sheet('anything')
+        assert row_filter.matches('', '', 'P1')
+
+    def test_date_window_is_inclusive(self):
+        row_filter = RecordFilter(date_from='2026-01-01', date_to='2026-03-31')
+        assert row_filter.matches('2026-01-01', 'PO', 'P1')
+        assert row_filter.matches('2026-03-31', 'PO', 'P1')
+        assert not row_filter.matches('2025-12-31', 'PO', 'P1')
+        assert not row_filter.matches('2026-04-01', 'PO', 'P1')
+
+    def test_open_ended_window(self):
+        assert RecordFilter(date_from='2026-01-01').matches('2099-01-01', 'PO', 'P1')
+        assert RecordFilter(date_to='2026-01-01').matches('1999-01-01', 'PO', 'P1')
+
+    def test_rows_without_a_date_fall_outside_a_window(self):
+        row_filter = RecordFilter(date_from='2026-01-01')
+        assert not row_filter.matches('', 'PO', 'P1')
+        assert not row_filter.matches('garbage', 'PO', 'P1')
+
+    def test_projects_and_event_types(self):
+        row_filter = RecordFilter(projects=['P1', 'P2'], event_types=['PO'])
+        assert row_filter.matches('2026-01-01', 'PO', 'P2')
+        assert not row_filter.matches('2026-01-01', 'Invoice', 'P2')
+        assert not row_filter.matches('2026-01-01', 'PO', 'P3')
+
+    def test_sheet_globs(self):
+        row_filter = RecordFilter(sheets=['FY2026', 'Q*'])
+        assert row_filter.wants_sheet('FY2026')
+        assert row_filter.wants_sheet('Q1')
+        assert not row_filter.wants_sheet('FY2025')
+        assert not row_filter.wants_sheet('q1')
+        assert not row_filter.filters_rows
+
+    def test_key_is_canonical(self):
+        assert RecordFilter(projects=['b', 'a']).key() == RecordFilter(projects=['a', 'b']).key()
+        assert RecordFilter(projects=['a']).key() != RecordFilter(event_types=['a']).key()
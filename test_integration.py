@@ -1,14 +1,38 @@
 #!/usr/bin/env python3
 """Integration tests using test_input.xlsx"""
 
+import base64
+import gzip
+import io
 import os
+import re
+import csv
 import json
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
 import pytest
+from datetime import datetime
+import pandas as pd
 from pathlib import Path
 
-from parsers import read_excel_data
-from calculations import calculate_statistics, calculate_date_range, prepare_json_data
-from generate_dashboard import generate_html
+import parsers
+from parsers import (
+    read_excel_data, read_workbooks, iter_records, iter_workbooks, scan_schema, scan_schemas,
+    parse_amount, parse_hours, parse_rate, source_names
+)
+from calculations import NUMERIC_FIELDS, calculate_statistics, calculate_date_range, prepare_json_data
+from cache import MemoryCache, RecordCache
+from filters import RecordFilter
+from records import Record
+import generate_dashboard
+import templates
+from generate_dashboard import (
+    generate_html, expand_inputs, parse_args, build_filter, main, input_signature, write_html, write_output,
+)
+from conftest import HEADER, Formula, write_xlsx
 
 
 TEST_FILE = Path(__file__).parent / 'test_input.xlsx'
@@ -35,11 +59,11 @@ class TestReadExcelData:
         required = {
             'index', 'date', 'event_type', 'project', 'billing_rate',
             'surcharge_rate', 'hours', 'amount', 'billable_amount',
-            'comment', 'sheet', 'year_month'
+            'comment', 'sheet', 'source', 'year_month'
         }
         for record in records:
-            assert required.issubset(record.keys()), \
-                f"Missing fields: {required - record.keys()}"
+            assert required.issubset(record.to_dict().keys()), \
+                f"Missing fields: {required - record.to_dict().keys()}"
 
     def test_indexes_are_sequential(self, records):
         indexes = [r['index'] for r in records]
@@ -96,6 +120,575 @@ class TestReadExcelData:
                     f"Unknown event type: {r['event_type']}"
 
 
+# ── Parity with the pandas reader ─────────────────────────────────────────
+
+class TestStreamingParity:
+    """The single-pass reader must match what pd.read_excel sees per sheet."""
+
+    @pytest.fixture(scope='class')
+    def frames(self):
+        frames = pd.read_excel(str(TEST_FILE), sheet_name=None)
+        for df in frames.values():
+            df.columns = df.columns.str.strip()
+        return frames
+
+    def test_sheet_order_and_counts(self, records, frames):
+        expected = []
+        for sheet_name, df in frames.items():
+            projects = df['Project'].dropna().astype(str).str.strip()
+            expected += [sheet_name] * int((projects != '').sum())
+        assert [r['sheet'] for r in records] == expected
+
+    def test_values_match_pandas(self, records, frames):
+        rows = []
+        for df in frames.values():
+            rows += [row for _, row in df.iterrows()
+                     if pd.notna(row['Project']) and str(row['Project']).strip()]
+        assert len(rows) == len(records)
+        for r, row in zip(records, rows):
+            assert r['project'] == str(row['Project']).strip()
+            assert r['event_type'] == str(row['Event Type']).strip()
+            assert r['date'] == row['Date'].strftime('%Y-%m-%d')
+            assert r['hours'] == parse_hours(row['Hours'])
+            assert r['amount'] == parse_amount(row['Amount'])
+            assert r['billing_rate'] == parse_rate(row['Hourly Rate'])
+            assert r['surcharge_rate'] == parse_rate(row['Additional Rate'])
+
+    def test_first_record(self, records):
+        assert records[0].to_dict() == {
+            'index': 1,
+            'date': '2026-01-01',
+            'event_type': 'Working Time',
+            'project': 'Project_1',
+            'billing_rate': 50.0,
+            'surcharge_rate': 0.05,
+            'hours': 100.0,
+            'amount': 0.0,
+            'billable_amount': 5250.0,
+            'comment': 'Hourly Rate: Standard contractor rate',
+            'sheet': 'FY2026',
+            'source': 'test_input.xlsx',
+            'year_month': '2026-01'
+        }
+
+    def test_comment_column_and_cell_comment_combined(self, records):
+        po = next(r for r in records if r['event_type'] == 'PO' and r['sheet'] == 'FY2026')
+        assert po['comment'] == 'Initial PO | Amount: Approved by finance dept'
+
+
+class TestCellValues:
+    def test_formulas_use_cached_values(self, tmp_path):
+        """Formula cells yield the value Excel cached on save, as pd.read_excel did."""
+        path = tmp_path / 'formulas.xlsx'
+        write_xlsx(path, {'Data': [
+            HEADER,
+            [datetime(2026, 3, 1), 'Working Time', 'P1', 50, 0.05, Formula('4*2', 8), None],
+            [datetime(2026, 3, 2), 'Invoice', 'P1', None, None, None, Formula('SUM(1,2)', 3)],
+        ]})
+        records = read_excel_data(str(path))
+        assert [r['date'] for r in records] == ['2026-03-01', '2026-03-02']
+        assert records[0]['hours'] == 8.0
+        assert records[0]['billable_amount'] == 8 * 50 * 1.05
+        assert records[1]['amount'] == 3.0
+
+
+class TestHeaderDetection:
+    ROWS = [
+        ['Project Tracking Export'],
+        ['Generated', datetime(2026, 1, 31)],
+        [],
+        HEADER + ['Comment'],
+        [datetime(2026, 1, 2), 'Working Time', 'P1', 50, 0.1, 4, None, 'first'],
+        [datetime(2026, 1, 3), 'Invoice', 'P1', None, None, None, 200, None],
+    ]
+
+    @pytest.mark.parametrize('engine', ['openpyxl', 'stdlib'])
+    def test_title_block_is_skipped(self, tmp_path, engine):
+        path = tmp_path / 'titled.xlsx'
+        write_xlsx(path, {'Titled': self.ROWS, 'Plain': [HEADER + ['Comment']] + self.ROWS[4:]})
+        records = read_excel_data(str(path), engine=engine)
+        titled = [r.to_dict() for r in records if r.sheet == 'Titled']
+        plain = [r.to_dict() for r in records if r.sheet == 'Plain']
+        assert [r['date'] for r in titled] == ['2026-01-02', '2026-01-03']
+        assert [r['comment'] for r in titled] == ['first', '']
+        for record in titled + plain:
+            del record['index'], record['sheet']
+        assert titled == plain
+
+    def test_scan_reports_header_row(self, tmp_path):
+        path = tmp_path / 'titled.xlsx'
+        write_xlsx(path, {'Titled': self.ROWS})
+        [result] = scan_schema(str(path))
+        assert result['header_row'] == 4
+        assert result['ok']
+
+
+class TestParallelParsing:
+    def test_jobs_match_serial(self, records):
+        assert read_excel_data(str(TEST_FILE), jobs=2) == records
+
+
+# ── Record streaming ──────────────────────────────────────────────────────
+
+class TestIterRecords:
+    def test_matches_read_excel_data(self, records):
+        assert list(iter_records(str(TEST_FILE))) == records
+        assert list(iter_records(str(TEST_FILE), engine='stdlib')) == records
+
+    def test_yields_before_later_sheets_are_read(self, monkeypatch):
+        sheets_read = []
+        iter_sheet = parsers._iter_sheet
+
+        def spy(workbook, sheet_name, *args):
+            sheets_read.append(sheet_name)
+            return iter_sheet(workbook, sheet_name, *args)
+        monkeypatch.setattr(parsers, '_iter_sheet', spy)
+
+        stream = iter_records(str(TEST_FILE))
+        first = next(stream)
+        assert sheets_read == [first['sheet']]
+        stream.close()
+
+    def test_iter_workbooks_numbers_across_files(self):
+        files = [str(TEST_FILE), str(TEST_FILE)]
+        assert list(iter_workbooks(files)) == read_workbooks(files)
+
+    def test_generate_html_from_stream(self, records):
+        strip_timestamp = lambda html: re.sub(r'Generated on [\d:\- ]+', '', html)
+        streamed = generate_html(iter_records(str(TEST_FILE)))
+        assert strip_timestamp(streamed) == strip_timestamp(generate_html(records))
+
+
+# ── Ingestion-time filters ────────────────────────────────────────────────
+
+def _without_index(records):
+    return [{k: v for k, v in r.to_dict().items() if k != 'index'} for r in records]
+
+
+class TestRowFilter:
+    FILTERS = [
+        RecordFilter(date_from='2026-02-01', date_to='2026-06-30'),
+        RecordFilter(event_types=['Working Time', 'Invoice']),
+        RecordFilter(projects=['Project_1'], date_to='2026-03-31'),
+        RecordFilter(sheets=['FY2026']),
+    ]
+
+    def _expected(self, records, row_filter):
+        return [r for r in records if row_filter.wants_sheet(r.sheet)
+                and row_filter.matches(r.date, r.event_type, r.project)]
+
+    @pytest.mark.parametrize('row_filter', FILTERS)
+    @pytest.mark.parametrize('engine', ['openpyxl', 'stdlib'])
+    def test_same_as_filtering_afterwards(self, records, row_filter, engine):
+        filtered = read_excel_data(str(TEST_FILE), engine=engine, row_filter=row_filter)
+        expected = self._expected(records, row_filter)
+        assert 0 < len(filtered) < len(records)
+        assert _without_index(filtered) == _without_index(expected)
+        assert [r.index for r in filtered] == list(range(1, len(filtered) + 1))
+
+    def test_streaming_jobs_and_cache_agree(self, tmp_path):
+        row_filter = RecordFilter(date_from='2026-02-01', sheets=['FY*'])
+        expected = read_excel_data(str(TEST_FILE), row_filter=row_filter)
+        cache = RecordCache(tmp_path / 'cache')
+        assert list(iter_records(str(TEST_FILE), row_filter=row_filter)) == expected
+        assert read_excel_data(str(TEST_FILE), jobs=2, row_filter=row_filter) == expected
+        assert read_excel_data(str(TEST_FILE), cache=cache, row_filter=row_filter) == expected
+        # A different filter must not be served from the same cache entries
+        assert read_excel_data(str(TEST_FILE), cache=cache) == read_excel_data(str(TEST_FILE))
+
+    def test_excluded_sheets_are_not_read(self, records, monkeypatch):
+        sheets_read = []
+        read_sheet = parsers._read_sheet
+
+        def spy(workbook, sheet_name, *args):
+            sheets_read.append(sheet_name)
+            return read_sheet(workbook, sheet_name, *args)
+        monkeypatch.setattr(parsers, '_read_sheet', spy)
+
+        read_excel_data(str(TEST_FILE), row_filter=RecordFilter(sheets=['FY2026']))
+        assert sheets_read == ['FY2026']
+
+    def test_cli_options(self):
+        args = parse_args(['data.xlsx', '--date-from', '2026-01-01', '--project', 'A', '--project', 'B',
+                           '--event-type', 'PO', '--sheet', 'FY*'])
+        row_filter = build_filter(args)
+        assert row_filter.date_from == '2026-01-01'
+        assert row_filter.date_to is None
+        assert row_filter.projects == {'A', 'B'}
+        assert row_filter.event_types == {'PO'}
+        assert row_filter.sheets == ('FY*',)
+        assert build_filter(parse_args(['data.xlsx'])) is None
+
+    def test_cli_rejects_bad_dates(self):
+        with pytest.raises(SystemExit):
+            parse_args(['data.xlsx', '--date-to', '2026-02-30'])
+
+
+# ── Schema scan ───────────────────────────────────────────────────────────
+
+class TestSchemaScan:
+    @pytest.fixture
+    def books(self, tmp_path):
+        good = tmp_path / 'good.xlsx'
+        bad = tmp_path / 'bad.xlsx'
+        broken = tmp_path / 'broken.xlsx'
+        write_xlsx(good, {'Data': [HEADER, ['2026-01-01', 'PO', 'P1', None, None, None, 5]]})
+        write_xlsx(bad, {
+            'Renamed': [['Date', 'Type', 'Project', 'Hourly Rate', 'Hours', 'Notes']],
+            'Empty': [],
+        })
+        broken.write_bytes(b'not a zip')
+        return good, bad, broken
+
+    def test_real_workbook(self, records):
+        results = scan_schema(str(TEST_FILE))
+        assert [r['sheet'] for r in results] == list(dict.fromkeys(r['sheet'] for r in records))
+        assert all(r['ok'] and r['header_row'] == 1 and not r['missing'] for r in results)
+
+    def test_diagnostics(self, books):
+        renamed, empty = scan_schema(str(books[1]))
+        assert renamed == {
+            'source': 'bad.xlsx', 'sheet': 'Renamed', 'header_row': 1,
+            'columns': ['Date', 'Type', 'Project', 'Hourly Rate', 'Hours', 'Notes'],
+            'mapped': {'Date': 0, 'Project': 2, 'Hourly Rate': 3, 'Hours': 4},
+            'missing': ['Event Type', 'Additional Rate', 'Amount'],
+            'extra': ['Type', 'Notes'],
+            'ok': False,
+        }
+        assert empty['columns'] == [] and empty['missing'] == HEADER
+
+    def test_unreadable_file(self, books):
+        [result] = scan_schema(str(books[2]))
+        assert result['sheet'] is None and not result['ok'] and result['error']
+
+    def test_several_files(self, books):
+        assert [r['source'] for r in scan_schemas([str(p) for p in books])] == \
+            ['good.xlsx', 'bad.xlsx', 'bad.xlsx', 'broken.xlsx']
+
+    def test_cli_json(self, books, capsys):
+        with pytest.raises(SystemExit) as exit_info:
+            main([str(books[0]), '--scan', '--scan-format', 'json'])
+        assert exit_info.value.code == 0
+        assert json.loads(capsys.readouterr().out) == scan_schema(str(books[0]))
+
+    def test_cli_flag_before_inputs(self, books, capsys):
+        with pytest.raises(SystemExit) as exit_info:
+            main(['--scan', str(books[0])])
+        assert exit_info.value.code == 0
+        assert capsys.readouterr().out == 'good.xlsx [Data] row 1: OK\n'
+
+    def test_cli_text_fails_on_missing_columns(self, books, capsys):
+        with pytest.raises(SystemExit) as exit_info:
+            main([str(books[0]), str(books[1]), '--scan'])
+        assert exit_info.value.code == 1
+        out = capsys.readouterr().out.splitlines()
+        assert out[0] == 'good.xlsx [Data] row 1: OK'
+        assert out[1] == ('bad.xlsx [Renamed] row 1: missing Event Type, Additional Rate, Amount; '
+                          'extra columns: Type, Notes')
+
+
+# ── stdlib engine ─────────────────────────────────────────────────────────
+
+class TestStdlibEngine:
+    def test_matches_openpyxl_engine(self, records):
+        assert read_excel_data(str(TEST_FILE), engine='stdlib') == records
+
+    def test_dates_formulas_and_shared_strings(self, tmp_path):
+        path = tmp_path / 'book.xlsx'
+        write_xlsx(path, {
+            'Data': [
+                HEADER + ['Comment'],
+                [datetime(2026, 3, 1), 'Working Time', 'P1', '€50', '5%', Formula('4*2', 8), None, ' note '],
+                ['03/02/2026', 'Invoice', 'P1', None, None, None, '$1,234.50', None],
+                [None, 'PO', None, None, None, None, 10, None],
+                ['2026-03-04', 'Working Time', 'P2', 60, None, 0, None, None],
+            ],
+            'Other': [HEADER, [datetime(2026, 4, 1, 9, 30), 'Working Time', 'P3', 70, 0.1, 2, None]],
+        })
+        assert read_excel_data(str(path), engine='stdlib') == read_excel_data(str(path))
+
+    def test_jobs_and_multiple_files(self, records):
+        files = [str(TEST_FILE), str(TEST_FILE)]
+        assert read_workbooks(files, jobs=2, engine='stdlib') == read_workbooks(files)
+
+    def test_does_not_import_pandas_or_openpyxl(self):
+        script = (
+            'import sys; from parsers import read_excel_data; '
+            f'records = read_excel_data({str(TEST_FILE)!r}, engine="stdlib"); '
+            'print(len(records), "pandas" in sys.modules, "openpyxl" in sys.modules, "numpy" in sys.modules)'
+        )
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, check=True)
+        count, *imported = result.stdout.split()
+        assert int(count) > 0
+        assert imported == ['False', 'False', 'False']
+
+    def test_engine_argument(self):
+        assert parse_args(['data.xlsx']).engine == 'openpyxl'
+        assert parse_args(['data.xlsx', '--engine', 'stdlib']).engine == 'stdlib'
+
+
+# ── CSV/TSV input ─────────────────────────────────────────────────────────
+
+def _export_sheets(path, out_dir, suffix):
+    """Write each sheet of a workbook to its own CSV/TSV file, as a spreadsheet export would."""
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    files = {}
+    for ws in wb.worksheets:
+        out = out_dir / f'{ws.title}{suffix}'
+        with open(out, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f, delimiter='\t' if suffix == '.tsv' else ',')
+            for row in ws.iter_rows(values_only=True):
+                writer.writerow(['' if v is None else v for v in row])
+        files[ws.title] = out
+    wb.close()
+    return files
+
+
+def _values(records):
+    # Cell comments only exist in workbooks; everything else must match
+    return [(r.row,) + tuple(getattr(r, f) for f in ('date', 'event_type', 'project', 'billing_rate',
+                                                       'surcharge_rate', 'hours', 'amount', 'billable_amount',
+                                                       'year_month'))
+            for r in records]
+
+
+class TestDelimitedInput:
+    @pytest.mark.parametrize('suffix', ['.csv', '.tsv'])
+    @pytest.mark.parametrize('engine', ['openpyxl', 'stdlib'])
+    def test_same_records_as_workbook(self, records, tmp_path, suffix, engine):
+        for sheet_name, path in _export_sheets(TEST_FILE, tmp_path, suffix).items():
+            from_text = read_excel_data(str(path), engine=engine)
+            assert _values(from_text) == _values(r for r in records if r.sheet == sheet_name)
+            assert {(r.sheet, r.source) for r in from_text} == {(sheet_name, path.name)}
+
+    def test_batches_stream_in_order(self, records, tmp_path, monkeypatch):
+        path = _export_sheets(TEST_FILE, tmp_path, '.csv')['FY2026']
+        expected = read_excel_data(str(path))
+        monkeypatch.setattr(parsers, 'DELIMITED_BATCH_ROWS', 7)
+        batches = list(parsers._iter_sheet(parsers._open_workbook(str(path)), 'FY2026'))
+        assert len(batches) > 2
+        assert _without_index(r for batch in batches for r in batch) == [
+            dict(r, source=None) for r in _without_index(expected)]
+        assert list(iter_records(str(path), engine='stdlib')) == expected
+
+    def test_title_rows_filters_and_scan(self, tmp_path):
+        path = tmp_path / 'export.csv'
+        path.write_text('Ledger export\n\n' + ','.join(HEADER) + '\n'
+                        '2026-01-05,Working Time,Alpha,"€1,050.00",5%,2,\n'
+                        '06/01/2026,Invoice,Beta,,,,"$1,234.50"\n', encoding='utf-8')
+        records = read_excel_data(str(path), engine='stdlib')
+        assert [(r.row, r.date, r.project, r.billing_rate, r.amount) for r in records] == [
+            (4, '2026-01-05', 'Alpha', 1050.0, 0.0), (5, '2026-01-06', 'Beta', None, 1234.5)]
+        assert read_excel_data(str(path)) == records
+        assert [r.project for r in read_excel_data(str(path), row_filter=RecordFilter(projects=['Beta']))] == ['Beta']
+        [result] = parsers.scan_schema(str(path))
+        assert (result['sheet'], result['header_row'], result['ok']) == ('export', 3, True)
+
+    def test_cached(self, tmp_path, capsys):
+        path = _export_sheets(TEST_FILE, tmp_path, '.csv')['FY2026']
+        expected = read_excel_data(str(path))
+        cache = MemoryCache()
+        assert read_excel_data(str(path), cache=cache) == expected
+        assert read_excel_data(str(path), cache=cache) == expected
+        out = tmp_path / 'out.html'
+        main([str(path), '--cache-dir', str(tmp_path / 'cache'), '-o', str(out)])
+        assert f'Found {len(expected)} records' in capsys.readouterr().out
+
+    def test_directories_include_text_exports(self, tmp_path):
+        _export_sheets(TEST_FILE, tmp_path, '.csv')
+        (tmp_path / 'notes.txt').write_text('ignored')
+        files = expand_inputs([str(tmp_path)])
+        assert files and all(f.endswith('.csv') for f in files)
+
+
+# ── Chunked ingestion ─────────────────────────────────────────────────────
+
+# Streams a workbook into the JSON serializer in a fresh interpreter and
+# prints its peak RSS in KB. VmHWM, unlike ru_maxrss, is not inherited from
+# the forking test process.
+PEAK_RSS_SCRIPT = """
+import os, sys
+from calculations import write_json_data
+from parsers import iter_records
+with open(os.devnull, 'w') as f:
+    write_json_data(iter_records(sys.argv[1], engine=sys.argv[3], batch_size=int(sys.argv[2])), f)
+with open('/proc/self/status') as status:
+    print(next(line.split()[1] for line in status if line.startswith('VmHWM:')))
+"""
+
+
+def _ledger(rows):
+    return {'Ledger': [HEADER] + [
+        [datetime(2026, 1, 1 + i % 28), 'Invoice' if i % 3 == 0 else 'Working Time', f'Project_{i % 40}',
+         50, 0.05, i % 8 + 1, 1000 + i % 50 if i % 3 == 0 else None]
+        for i in range(rows)
+    ]}
+
+
+class TestChunkedIngestion:
+    @pytest.mark.parametrize('engine', ['openpyxl', 'stdlib'])
+    def test_batches_match_whole_sheets(self, records, engine):
+        assert list(iter_records(str(TEST_FILE), engine=engine, batch_size=7)) == records
+        assert read_excel_data(str(TEST_FILE), engine=engine, batch_size=7) == records
+        assert read_workbooks([str(TEST_FILE)] * 2, jobs=2, engine=engine, batch_size=7) == \
+            read_workbooks([str(TEST_FILE)] * 2)
+
+    @pytest.mark.parametrize('engine', ['openpyxl', 'stdlib'])
+    def test_numeric_text_column_is_read_alike_in_every_batch(self, tmp_path, engine):
+        path = tmp_path / 'numbered.xlsx'
+        write_xlsx(path, {'Ledger': [HEADER] + [
+            [datetime(2026, 1, 1 + i), 'Working Time', None if i == 3 else 1001, 50, 0.05, 1, None]
+            for i in range(20)
+        ]})
+        whole = read_excel_data(str(path), engine=engine)
+        assert {r.project for r in whole} == {'1001'}
+        assert read_excel_data(str(path), engine=engine, batch_size=10) == whole
+
+    def test_batch_boundaries_keep_comments_and_filters(self, records):
+        row_filter = RecordFilter(date_from='2026-02-01', event_types=['Working Time'])
+        for batch_size in (1, 2, 5):
+            assert list(iter_records(str(TEST_FILE), row_filter=row_filter, batch_size=batch_size)) == \
+                read_excel_data(str(TEST_FILE), row_filter=row_filter)
+
+    @pytest.mark.skipif(not Path('/proc/self/status').exists(), reason='needs /proc')
+    @pytest.mark.parametrize('engine', ['openpyxl', 'stdlib'])
+    def test_peak_rss_does_not_grow_with_sheet_length(self, tmp_path, engine):
+        peaks = []
+        for rows in (5000, 30000):
+            path = tmp_path / f'ledger_{rows}.xlsx'
+            write_xlsx(path, _ledger(rows))
+            result = subprocess.run([sys.executable, '-c', PEAK_RSS_SCRIPT, str(path), '1000', engine],
+                                    capture_output=True, text=True, cwd=Path(__file__).parent, check=True)
+            peaks.append(int(result.stdout.split()[-1]))
+        # Unbatched, the longer sheet peaks 16-18 MB higher with either engine
+        assert peaks[1] < peaks[0] + 4 * 1024
+
+    def test_cli_option(self):
+        assert parse_args(['data.xlsx']).batch_size is None
+        assert parse_args(['data.xlsx', '--batch-size', '5000']).batch_size == 5000
+        with pytest.raises(SystemExit):
+            parse_args(['data.xlsx', '--batch-size', '0'])
+
+
+# ── Multiple workbooks ────────────────────────────────────────────────────
+
+class TestMultiWorkbook:
+    @pytest.fixture
+    def unit_dir(self, tmp_path):
+        for name in ('unit_a.xlsx', 'unit_b.xlsx'):
+            shutil.copy(TEST_FILE, tmp_path / name)
+        (tmp_path / '~$unit_a.xlsx').write_bytes(b'lock')
+        (tmp_path / 'notes.txt').write_text('not a workbook')
+        return tmp_path
+
+    def test_expand_directory(self, unit_dir):
+        assert [Path(p).name for p in expand_inputs([str(unit_dir)])] == ['unit_a.xlsx', 'unit_b.xlsx']
+
+    def test_expand_glob_and_dedupe(self, unit_dir):
+        files = expand_inputs([str(unit_dir / 'unit_b.xlsx'), str(unit_dir / 'unit_*.xlsx')])
+        assert [Path(p).name for p in files] == ['unit_b.xlsx', 'unit_a.xlsx']
+
+    def test_expand_missing(self, unit_dir):
+        with pytest.raises(FileNotFoundError):
+            expand_inputs([str(unit_dir / 'missing.xlsx')])
+
+    @pytest.mark.parametrize('jobs', [1, 2])
+    def test_records_merged_and_tagged(self, unit_dir, records, jobs):
+        files = expand_inputs([str(unit_dir)])
+        merged = read_workbooks(files, jobs=jobs)
+        assert len(merged) == 2 * len(records)
+        assert [r['index'] for r in merged] == list(range(1, len(merged) + 1))
+        assert [r['source'] for r in merged] == ['unit_a.xlsx'] * len(records) + ['unit_b.xlsx'] * len(records)
+        assert [r['sheet'] for r in merged] == [r['sheet'] for r in records] * 2
+
+    @pytest.mark.parametrize('jobs', [1, 2])
+    def test_same_named_workbooks_are_told_apart(self, tmp_path, records, jobs):
+        files = []
+        for year in ('2024', '2025'):
+            (tmp_path / year).mkdir()
+            files.append(str(shutil.copy(TEST_FILE, tmp_path / year / 'units.xlsx')))
+        expected = ['2024/units.xlsx'] * len(records) + ['2025/units.xlsx'] * len(records)
+        assert [r.source for r in read_workbooks(files, jobs=jobs)] == expected
+        assert [r.source for r in iter_workbooks(files)] == expected
+        assert source_names(files + [str(TEST_FILE), files[0]]) == \
+            ['2024/units.xlsx', '2025/units.xlsx', 'test_input.xlsx', '2024/units.xlsx']
+
+    def test_legacy_output_argument(self):
+        args = parse_args(['data.xlsx', 'out.html'])
+        assert args.inputs == ['data.xlsx']
+        assert args.output_file == 'out.html'
+
+    def test_legacy_output_argument_of_any_name(self, tmp_path):
+        report = tmp_path / 'report.txt'
+        assert parse_args(['data.xlsx', str(report)]).output_file == str(report)
+        report.write_text('old report')
+        args = parse_args(['data.xlsx', str(report)])
+        assert (args.inputs, args.output_file) == (['data.xlsx'], str(report))
+        args = parse_args(['a.xlsx', 'b.csv'])
+        assert (args.inputs, args.output_file) == (['a.xlsx', 'b.csv'], 'dashboard.html')
+        assert parse_args(['a.xlsx', str(tmp_path)]).inputs == ['a.xlsx', str(tmp_path)]
+
+    def test_several_inputs_and_output_option(self):
+        args = parse_args(['a.xlsx', 'b.xlsx', '-o', 'out.html'])
+        assert args.inputs == ['a.xlsx', 'b.xlsx']
+        assert args.output_file == 'out.html'
+
+
+# ── Watch mode ────────────────────────────────────────────────────────────
+
+def _wait_for(predicate, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestWatch:
+    def _book(self, project):
+        return {'Data': [HEADER, [datetime(2026, 1, 5), 'Working Time', project, 50, None, 2, None]],
+                'Other': [HEADER, [datetime(2026, 2, 5), 'PO', 'P2', None, None, None, 100]]}
+
+    def test_input_signature(self, tmp_path):
+        path = tmp_path / 'book.xlsx'
+        write_xlsx(path, self._book('P1'))
+        before = input_signature([str(tmp_path)])
+        assert list(before) == [str(path)]
+        write_xlsx(path, self._book('Changed'))
+        os.utime(path, ns=(1, 1))
+        assert input_signature([str(tmp_path)]) != before
+        assert input_signature([str(tmp_path / 'missing.xlsx')]) is None
+
+    def test_regenerates_on_change(self, tmp_path):
+        path = tmp_path / 'book.xlsx'
+        output = tmp_path / 'out.html'
+        write_xlsx(path, self._book('First_Project'))
+        proc = subprocess.Popen(
+            [sys.executable, 'generate_dashboard.py', str(path), '-o', str(output), '--watch', '--interval', '0.05'],
+            cwd=Path(__file__).parent, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        try:
+            def output_has(text):
+                return output.exists() and text in output.read_text(encoding='utf-8')
+
+            assert _wait_for(lambda: output_has('First_Project'))
+
+            path.write_bytes(b'not a workbook yet')
+            time.sleep(0.5)
+            assert output_has('First_Project')  # a broken input keeps the last dashboard
+
+            write_xlsx(path, self._book('Second_Project'))
+            assert _wait_for(lambda: output_has('Second_Project'))
+            assert not output_has('First_Project')
+        finally:
+            proc.terminate()
+            log = proc.communicate(timeout=10)[0]
+        assert 'Dashboard not updated' in log
+        assert log.count('Dashboard updated in') == 2
+
+
 # ── Calculations on parsed data ───────────────────────────────────────────
 
 class TestCalculationsIntegration:
@@ -123,6 +716,19 @@ class TestCalculationsIntegration:
 
 # ── Full HTML generation ──────────────────────────────────────────────────
 
+def _decode_in_node(html, expression='allData'):
+    """Run the page's embedded-data script in Node and return the expression (allData)."""
+    script = html.split('// Embedded data', 1)[1].split('const generationDate', 1)[0]
+    script += f'\ndataReady.then(() => process.stdout.write(JSON.stringify({expression})));\n'
+    result = subprocess.run(['node', '-'], input=script, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def _embedded_payload(html):
+    """The uncompressed payload embedded in a dashboard page."""
+    return json.loads(re.search(r'loadPayload\((.*), null\)', html).group(1))
+
+
 class TestHTMLGeneration:
     @pytest.fixture(scope='class')
     def html(self, records):
@@ -133,7 +739,62 @@ class TestHTMLGeneration:
         assert '</html>' in html
 
     def test_contains_alldata_json(self, html):
-        assert 'const allData =' in html
+        assert 'allData = decodePayload(payload)' in html
+
+    def test_plain_dict_records(self, html, records):
+        assert strip_timestamp(generate_html([r.to_dict() for r in records])) == strip_timestamp(html)
+
+    def test_categorical_fields_are_coded(self, html, records):
+        payload = _embedded_payload(html)
+        assert payload['encoding'] == 'columnar'
+        assert payload['dictionaries']['event_type'] == list(dict.fromkeys(r.event_type for r in records))
+        assert '"project": "' not in html
+        assert '"project":[0,' in html
+
+    @pytest.mark.skipif(shutil.which('node') is None, reason='node not installed')
+    def test_embedded_data_decodes_to_records(self, html, records):
+        decoded = _decode_in_node(html)
+        assert [{k: v for k, v in row.items() if not k.endswith('_id')} for row in decoded] == \
+            [r.to_dict() for r in records]
+        event_types = list(dict.fromkeys(r.event_type for r in records))
+        assert [row['event_type_id'] for row in decoded] == [event_types.index(r.event_type) for r in records]
+
+    @pytest.mark.skipif(shutil.which('node') is None, reason='node not installed')
+    @pytest.mark.parametrize('compression', [None, 'gzip'])
+    def test_typed_arrays_decode_in_node(self, records, compression):
+        html = generate_html(records, compression=compression, encoding='typed')
+        decoded = _decode_in_node(html)
+        assert [{k: v for k, v in row.items() if not k.endswith('_id')} for row in decoded] == \
+            [r.to_dict() for r in records]
+
+    @pytest.mark.skipif(shutil.which('node') is None, reason='node not installed')
+    @pytest.mark.parametrize('encoding', ['columnar', 'typed'])
+    def test_numbers_are_summed_from_typed_columns(self, records, encoding):
+        html = generate_html(records, encoding=encoding)
+        columns = _decode_in_node(html, 'Object.entries(dataColumns).map(([field, values]) => '
+                                        '[field, values.constructor.name, values.reduce((sum, v) => sum + (v || 0), 0)])')
+        assert [field for field, _, _ in columns] == list(NUMERIC_FIELDS)
+        for field, kind, total in columns:
+            assert kind == 'Float64Array'
+            assert total == pytest.approx(sum(r[field] or 0 for r in records))
+
+    @pytest.mark.skipif(shutil.which('node') is None, reason='node not installed')
+    def test_page_script_is_valid_javascript(self, html, tmp_path):
+        script = tmp_path / 'page.js'
+        script.write_text(html.split('<script>', 1)[1].split('</script>', 1)[0])
+        subprocess.run(['node', '--check', str(script)], capture_output=True, text=True, check=True)
+
+    def test_static_segments_are_built_once(self, records, monkeypatch):
+        monkeypatch.setattr(templates, 'get_css', lambda: pytest.fail('template re-rendered'))
+        html = generate_html(records)
+        assert '--color-primary' in html
+        assert '\x00' not in html
+
+    def test_page_values_are_inserted_verbatim(self):
+        head, tail = templates.get_html_parts(['PO'], '2026-01-01', None, duplicates_html='{date_to} \x00date_to\x00')
+        assert 'value="2026-01-01"' in head and 'value="None"' in head
+        assert '{date_to} \x00date_to\x00' in head
+        assert tail.startswith(', null).then(')
 
     def test_no_stale_pre_computed_json(self, html):
         """The cleaned-up version should NOT embed projectFinancials or monthlyWorkingTime."""
@@ -172,3 +833,119 @@ class TestHTMLGeneration:
         assert '{total_hours' not in html
         assert '{financials_json}' not in html
         assert '{monthly_summary_json}' not in html
+
+
+class TestPayloadOptions:
+    @pytest.mark.skipif(shutil.which('node') is None, reason='node not installed')
+    @pytest.mark.parametrize('compression', ['gzip', 'deflate'])
+    def test_decompresses_in_node(self, records, compression):
+        html = generate_html(records, compression=compression)
+        assert f'"{compression}")' in html
+        assert '"dictionaries"' not in html
+        decoded = _decode_in_node(html)
+        assert [{k: v for k, v in row.items() if not k.endswith('_id')} for row in decoded] == \
+            [r.to_dict() for r in records]
+
+    def test_non_finite_numbers_parse_as_strict_json(self, tmp_path):
+        path = tmp_path / 'export.csv'
+        path.write_text(','.join(HEADER) + '\n'
+                        '2026-01-05,Invoice,Alpha,,,,inf\n'
+                        '2026-01-06,Working Time,Alpha,50,,2,\n', encoding='utf-8')
+        records = read_excel_data(str(path))
+        assert records[0].amount == float('inf')
+        html = generate_html(records, compression='gzip')
+        packed = re.search(r'loadPayload\("(.*)", "gzip"\)', html).group(1)
+
+        def reject(constant):
+            raise ValueError(constant)
+        payload = json.loads(gzip.decompress(base64.b64decode(packed)), parse_constant=reject)
+        assert payload['batches'][0]['columns']['amount'] == [None, 0]
+        if shutil.which('node'):
+            assert [row['amount'] for row in _decode_in_node(html)] == [None, 0]
+            typed = generate_html(records, compression='gzip', encoding='typed')
+            assert [row['amount'] for row in _decode_in_node(typed)] == [None, 0]
+
+    def test_smaller_page(self, tmp_path):
+        path = tmp_path / 'long.xlsx'
+        write_xlsx(path, {'Ledger': [HEADER] + [
+            [datetime(2025 + i // 365 % 2, i % 12 + 1, i % 28 + 1), 'Working Time' if i % 3 else 'Invoice',
+             f'Project_{i % 40}', 50, None, i % 9 + 1, None if i % 3 else i * 37 % 10000]
+            for i in range(5000)
+        ]})
+        records = read_excel_data(str(path))
+        plain = generate_html(records)
+        compressed = generate_html(records, compression='gzip')
+        payload = len(json.dumps(_embedded_payload(plain), separators=(',', ':')))
+        assert payload > 3 * (len(compressed) - len(plain) + payload)
+
+    def test_cli(self, tmp_path, capsys):
+        out = tmp_path / 'out.html'
+        main([str(TEST_FILE), '-o', str(out), '--compress'])
+        assert 'loadPayload("' in out.read_text()
+        assert '"gzip")' in out.read_text()
+
+    def test_cli_compress_format(self, tmp_path):
+        out = tmp_path / 'out.html'
+        main(['--compress', '--compress-format', 'deflate', str(TEST_FILE), '-o', str(out)])
+        assert '"deflate")' in out.read_text()
+
+    def test_cli_typed_encoding(self, tmp_path):
+        out = tmp_path / 'out.html'
+        main([str(TEST_FILE), '-o', str(out), '--encoding', 'typed'])
+        assert _embedded_payload(out.read_text())['encoding'] == 'typed'
+
+
+def strip_timestamp(html):
+    return re.sub(r'Generated on [\d:\- ]+', '', html)
+
+
+class TestStreamingOutput:
+    def _records(self, n):
+        for i in range(n):
+            yield Record(index=i + 1, date=f'2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}', event_type='Working Time',
+                         project=f'Project_{i % 40}', billing_rate=50.0, surcharge_rate=None, hours=float(i % 9 + 1),
+                         amount=0.0, billable_amount=(i % 9 + 1) * 50.0, comment=f'note {i % 100}', sheet='Ledger',
+                         source=None, year_month=f'2026-{i % 12 + 1:02d}')
+
+    @pytest.mark.parametrize('compression', [None, 'gzip'])
+    def test_same_page_as_generate_html(self, records, compression):
+        out = io.StringIO()
+        write_html(out, iter(records), compression=compression)
+        assert strip_timestamp(out.getvalue()) == strip_timestamp(generate_html(records, compression=compression))
+
+    def test_payload_is_never_one_string(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(generate_dashboard, 'SPOOL_MAX_CHARS', 64 * 1024)
+        path = tmp_path / 'out.html'
+
+        def peak(n):
+            with open(path, 'w', encoding='utf-8') as f:
+                tracemalloc.start()
+                try:
+                    write_html(f, self._records(n))
+                    return tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+
+        small, large = peak(20000), peak(100000)
+        assert path.stat().st_size > 1.5 * 1024 * 1024
+        assert large < small * 1.5
+        assert large < path.stat().st_size
+
+    def test_failed_build_keeps_previous_page(self, tmp_path):
+        out = tmp_path / 'out.html'
+        out.write_text('previous')
+
+        def failing():
+            yield from self._records(10)
+            raise ValueError('unreadable sheet')
+
+        with pytest.raises(ValueError):
+            write_output(str(out), failing())
+        assert out.read_text() == 'previous'
+        assert os.listdir(tmp_path) == ['out.html']
+
+    def test_missing_output_directory_reports_the_open_error(self, tmp_path):
+        with pytest.raises(FileNotFoundError, match='out.html.tmp') as excinfo:
+            write_output(str(tmp_path / 'missing' / 'out.html'), self._records(10))
+        # Raised by open itself, not by the cleanup of a file that never existed
+        assert excinfo.value.__context__ is None
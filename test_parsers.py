@@ -2,9 +2,14 @@
 """Tests for parsers.py"""
 
 import math
+import random
+from datetime import date, datetime, time
 import pytest
 import pandas as pd
-from parsers import parse_amount, parse_hours, parse_rate
+from parsers import (
+    parse_amount, parse_hours, parse_rate, clean_amounts, clean_hours, clean_rates, clean_text,
+    normalize_dates, _clean_dates, _normalize_date, _find_header, HEADER_SEARCH_ROWS
+)
 
 
 # ── parse_amount ──────────────────────────────────────────────────────────
@@ -118,6 +123,145 @@ class TestParseRate:
         assert parse_rate('abc%') is None
 
 
+# ── Vectorized cleaning ───────────────────────────────────────────────────
+
+RAW_VALUES = [
+    100, 99.5, 0, -500, '1234', '€1234', '$1234', '1,234,567', '€1,234.56',
+    '  1234  ', '', '   ', float('nan'), None, 'abc', '5%', '12.5%', 'abc%', 0.05,
+]
+
+
+def _series(values):
+    return pd.Series(values, dtype=object)
+
+
+class TestVectorizedCleaning:
+    """Column cleaners must agree with the scalar parse_* functions."""
+
+    def test_amounts_match_scalar(self):
+        assert clean_amounts(_series(RAW_VALUES)).tolist() == [parse_amount(v) for v in RAW_VALUES]
+
+    def test_hours_match_scalar(self):
+        assert clean_hours(_series(RAW_VALUES)).tolist() == [parse_hours(v) for v in RAW_VALUES]
+
+    def test_rates_match_scalar(self):
+        cleaned = clean_rates(_series(RAW_VALUES)).tolist()
+        expected = [parse_rate(v) for v in RAW_VALUES]
+        assert [None if math.isnan(v) else v for v in cleaned] == expected
+
+    def test_bool_cells_match_scalar(self):
+        values = [True, False, 1, '2%', None]
+        assert clean_amounts(_series(values)).tolist() == [parse_amount(v) for v in values]
+        assert clean_hours(_series(values)).tolist() == [parse_hours(v) for v in values]
+        cleaned = clean_rates(_series(values)).tolist()
+        assert [None if math.isnan(v) else v for v in cleaned] == [parse_rate(v) for v in values]
+        assert clean_rates(pd.Series([True, False])).isna().all()
+
+    def test_numeric_column(self):
+        assert clean_amounts(pd.Series([1, 2, None])).tolist() == [1.0, 2.0, 0.0]
+
+    def test_text(self):
+        assert clean_text(_series([' a ', None, 5, float('nan')])).tolist() == ['a', '', '5', '']
+
+
+# ── Date normalization ────────────────────────────────────────────────────
+
+RAW_DATES = [
+    datetime(2026, 1, 5), datetime(2026, 1, 5, 13, 45), date(2026, 2, 1), time(6, 30),
+    pd.Timestamp('2026-03-04 10:00'), pd.NaT, None, float('nan'), 45000, 45000.5,
+    '2026-01-05', ' 2026-01-05 10:00 ', '2026-1-5', '05/01/2026', '12/25/2026', '1/2/2026',
+    '2026/02/03', '31/02/2026', '2026-13-01', '2026-02-30', '0999-01-01', '2026-01-01T10:00',
+    '٢٠٢٦-٠١-٠٥', 'garbage', '', '   ', '2026-01-05x', '13/13/2026', '00/01/2026',
+]
+
+
+def _random_date_strings(n, seed=0):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        y = rng.choice(['2026', '1999', '0999', '26', '20266'])
+        m = rng.choice(['1', '01', '12', '13', '00', '7'])
+        d = rng.choice(['1', '01', '12', '29', '30', '31', '32', '0'])
+        fmt = rng.choice(['{y}-{m}-{d}', '{d}/{m}/{y}', '{m}/{d}/{y}', '{y}/{m}/{d}', '{y}.{m}.{d}'])
+        out.append(fmt.format(y=y, m=m, d=d) + rng.choice(['', ' 00:00:00', ' ']))
+    return out
+
+
+class TestNormalizeDates:
+    """normalize_dates must agree with the scalar _normalize_date."""
+
+    def test_mixed_values_match_scalar(self):
+        assert normalize_dates(RAW_DATES) == [_normalize_date(v) for v in RAW_DATES]
+
+    @pytest.mark.parametrize('seed', range(4))
+    def test_random_strings_match_scalar(self, seed):
+        values = _random_date_strings(500, seed)
+        assert normalize_dates(values) == [_normalize_date(v) for v in values]
+
+    @pytest.mark.parametrize('fmt', ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d'])
+    def test_dominant_format_columns(self, fmt):
+        values = [datetime(2026, m, d).strftime(fmt) for m in range(1, 13) for d in (1, 9, 13, 28)]
+        assert normalize_dates(values) == [_normalize_date(v) for v in values]
+
+    def test_datetime_column_in_bulk(self):
+        values = pd.Series([datetime(2026, 1, 5, 8), None, datetime(1999, 12, 31)])
+        assert values.dtype.kind == 'M'
+        assert _clean_dates(values) == ['2026-01-05', '', '1999-12-31']
+
+    def test_object_column(self):
+        values = _series(RAW_DATES)
+        assert _clean_dates(values) == [_normalize_date(v) for v in RAW_DATES]
+
+
+# ── Header detection ──────────────────────────────────────────────────────
+
+HEADER = ('Date', 'Event Type', 'Project', 'Hourly Rate', 'Additional Rate', 'Hours', 'Amount')
+
+
+def _rows(*rows):
+    return iter(enumerate(rows, start=1))
+
+
+class TestFindHeader:
+    def test_first_row(self):
+        row_number, header, rest = _find_header(_rows(HEADER, ('2026-01-01',)))
+        assert (row_number, header) == (1, HEADER)
+        assert list(rest) == [(2, ('2026-01-01',))]
+
+    def test_after_title_block(self):
+        rows = _rows(('Project tracking',), (), ('Exported 2026-01-01',), HEADER, ('a',), ('b',))
+        row_number, header, rest = _find_header(rows)
+        assert (row_number, header) == (4, HEADER)
+        assert list(rest) == [(5, ('a',)), (6, ('b',))]
+
+    def test_best_partial_header(self):
+        partial = ('Date', 'Project', 'Amount')
+        rows = _rows(('Title',), ('Project',), partial, ('2026-01-01', 'P1', 5))
+        row_number, header, rest = _find_header(rows)
+        assert (row_number, header) == (3, partial)
+        assert list(rest) == [(4, ('2026-01-01', 'P1', 5))]
+
+    def test_no_header_in_window_keeps_row_one(self):
+        rows = [('Title',)] + [(i,) for i in range(HEADER_SEARCH_ROWS)] + [HEADER]
+        row_number, header, rest = _find_header(_rows(*rows))
+        assert (row_number, header) == (1, ('Title',))
+        assert len(list(rest)) == len(rows) - 1
+
+    def test_empty_sheet(self):
+        row_number, header, rest = _find_header(iter([]))
+        assert (row_number, header, list(rest)) == (1, (), [])
+
+    def test_stops_reading_at_a_full_header(self):
+        consumed = []
+
+        def rows():
+            for item in _rows(('Title',), HEADER, ('a',), ('b',)):
+                consumed.append(item[0])
+                yield item
+        _find_header(rows())
+        assert consumed == [1, 2]
+
+
 # ── Billable amount calculation (tested via read_excel_data) ──────────────
 
 class TestBillableAmount:
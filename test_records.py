@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Tests for records.py"""
+
+import json
+import pickle
+import pytest
+from pathlib import Path
+from records import FIELDS, Record, json_default
+from parsers import read_excel_data
+
+
+TEST_FILE = Path(__file__).parent / 'test_input.xlsx'
+
+
+def _record(**overrides):
+    values = dict.fromkeys(FIELDS)
+    values.update(index=1, date='2026-01-15', event_type='PO', project='Alpha', hours=0.0,
+                  amount=100.0, comment='', sheet='FY2026', source='a.xlsx', year_month='2026-01')
+    values.update(overrides)
+    return Record(**values)
+
+
+# ── Record ────────────────────────────────────────────────────────────────
+
+class TestRecord:
+    def test_no_instance_dict(self):
+        assert not hasattr(_record(), '__dict__')
+
+    def test_item_access(self):
+        record = _record()
+        assert record['project'] == record.project == 'Alpha'
+        with pytest.raises(KeyError):
+            record['missing']
+
+    def test_to_dict_keeps_field_order(self):
+        assert list(_record().to_dict()) == list(FIELDS)
+
+    def test_equality(self):
+        assert _record() == _record()
+        assert _record() != _record(project='Beta')
+
+    def test_pickle_round_trip(self):
+        record = _record(billing_rate=50.0)
+        assert pickle.loads(pickle.dumps(record)) == record
+
+    def test_json_default(self):
+        assert json.loads(json.dumps([_record()], default=json_default)) == [_record().to_dict()]
+        with pytest.raises(TypeError):
+            json.dumps(object(), default=json_default)
+
+
+@pytest.mark.skipif(not TEST_FILE.exists(), reason='test_input.xlsx not found')
+class TestParsedRecords:
+    def test_repeated_strings_are_shared(self):
+        records = read_excel_data(str(TEST_FILE))
+        for field in ('project', 'event_type', 'sheet', 'source', 'year_month'):
+            by_value = {}
+            for record in records:
+                assert by_value.setdefault(record[field], record[field]) is record[field]
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Tests for store.py"""
+
+import json
+import re
+import pytest
+from datetime import datetime
+from pathlib import Path
+
+from conftest import HEADER, write_xlsx
+from filters import RecordFilter
+from generate_dashboard import generate_html, main
+from parsers import read_excel_data, read_workbooks
+from store import RecordStore
+
+
+TEST_FILE = Path(__file__).parent / 'test_input.xlsx'
+
+
+def _row(day, event_type, project, hours):
+    return [datetime(2026, 1, day), event_type, project, 50, None, hours, None]
+
+
+@pytest.fixture
+def book(tmp_path):
+    path = tmp_path / 'book.xlsx'
+    write_xlsx(path, {
+        'Jan': [HEADER, _row(5, 'Working Time', 'Alpha', 2), _row(6, 'Working Time', 'Beta', 3)],
+        'Feb': [HEADER, _row(7, 'Invoice', 'Alpha', 0)],
+    })
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    with RecordStore(str(tmp_path / 'records.db')) as store:
+        yield store
+
+
+@pytest.fixture(scope='module')
+def records():
+    return read_excel_data(str(TEST_FILE))
+
+
+def _fields(records):
+    return [r.to_dict() for r in records]
+
+
+# ── Upsert ────────────────────────────────────────────────────────────────
+
+class TestUpsert:
+    def test_records_carry_excel_rows(self, book):
+        records = read_excel_data(str(book), engine='stdlib')
+        assert [(r.sheet, r.row) for r in records] == [('Jan', 2), ('Jan', 3), ('Feb', 2)]
+        assert read_excel_data(str(book)) == records
+
+    def test_round_trip(self, store, book):
+        records = read_excel_data(str(book))
+        assert store.upsert(records) == 3
+        assert list(store.query()) == records
+        assert store.sources() == ['book.xlsx']
+
+    def test_upsert_updates_in_place(self, store, book):
+        store.upsert(read_excel_data(str(book)))
+        write_xlsx(book, {
+            'Jan': [HEADER, _row(5, 'Working Time', 'Alpha', 4), _row(6, 'Working Time', 'Beta', 3)],
+            'Feb': [HEADER, _row(7, 'Invoice', 'Alpha', 0)],
+        })
+        store.upsert(read_excel_data(str(book)))
+        stored = list(store.query())
+        assert len(stored) == 3
+        assert stored[0].hours == 4
+
+    def test_replace_drops_removed_rows(self, store, book):
+        store.upsert(read_excel_data(str(book)))
+        write_xlsx(book, {'Jan': [HEADER, _row(5, 'Working Time', 'Alpha', 2)]})
+        store.upsert(read_excel_data(str(book)))
+        assert len(list(store.query())) == 3
+        store.upsert(read_excel_data(str(book)), replace=True)
+        assert [(r.sheet, r.row) for r in store.query()] == [('Jan', 2)]
+
+    def test_sources_are_kept_apart(self, store, book, tmp_path):
+        other = tmp_path / 'other.xlsx'
+        write_xlsx(other, {'Jan': [HEADER, _row(9, 'Working Time', 'Gamma', 1)]})
+        store.upsert(read_workbooks([str(book), str(other)]), replace=True)
+        store.upsert(read_excel_data(str(other)), replace=True)
+        assert store.sources() == ['book.xlsx', 'other.xlsx']
+        assert [r.index for r in store.query()] == [1, 2, 3, 4]
+        assert store.delete_source('book.xlsx') == 3
+        assert [r.project for r in store.query()] == ['Gamma']
+
+    def test_same_named_workbooks_by_path(self, store, book, tmp_path):
+        archive = tmp_path / '2025' / 'book.xlsx'
+        archive.parent.mkdir()
+        write_xlsx(archive, {'Jan': [HEADER, _row(5, 'Working Time', 'Gamma', 1)]})
+        assert store.upsert(read_excel_data(str(book)), replace=True, path=str(book)) == 3
+        assert store.upsert(read_excel_data(str(archive)), replace=True, path=str(archive)) == 1
+        assert len(list(store.query())) == 4
+        assert store.sources() == sorted([str(book), str(archive)])
+        assert {r.source for r in store.query()} == {f'{tmp_path.name}/book.xlsx', '2025/book.xlsx'}
+        assert [r.project for r in store.query(sources=[str(archive)])] == ['Gamma']
+
+    def test_replace_empties_a_workbook_without_records(self, store, book):
+        store.upsert(read_excel_data(str(book)), path=str(book))
+        store.upsert([], replace=True, path=str(book))
+        assert list(store.query()) == []
+
+    def test_rejects_records_without_rows(self, store, book):
+        records = read_excel_data(str(book))
+        records[1].row = None
+        with pytest.raises(ValueError):
+            store.upsert(records)
+
+
+# ── Query ─────────────────────────────────────────────────────────────────
+
+@pytest.mark.skipif(not TEST_FILE.exists(), reason='test_input.xlsx not found')
+class TestQuery:
+    FILTERS = [
+        RecordFilter(date_from='2026-02-01', date_to='2026-06-30'),
+        RecordFilter(event_types=['Working Time', 'Invoice']),
+        RecordFilter(projects=['Project_1'], date_to='2026-03-31'),
+        RecordFilter(sheets=['FY2026']),
+        RecordFilter(sheets=['FY*'], date_from='2026-02-01'),
+    ]
+
+    @pytest.mark.parametrize('row_filter', FILTERS)
+    def test_same_as_filtering_while_parsing(self, store, records, row_filter):
+        store.upsert(records)
+        assert _fields(store.query(row_filter)) == _fields(read_excel_data(str(TEST_FILE), row_filter=row_filter))
+
+    def test_uses_indexes(self, store):
+        plan = ' '.join(str(row) for row in store.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM records WHERE project = 'Project_1'"))
+        assert 'records_project' in plan
+
+    def test_dashboard_from_store(self, store, records):
+        store.upsert(records)
+        strip = lambda html: re.sub(r'Generated on [^<]*', '', html)
+        assert strip(generate_html(store.query())) == strip(generate_html(records))
+
+
+# ── Command line ──────────────────────────────────────────────────────────
+
+class TestCli:
+    def test_ingest_then_query_store_alone(self, tmp_path, book, capsys):
+        db, out = str(tmp_path / 'records.db'), tmp_path / 'out.html'
+        main([str(book), '--store', db, '-o', str(out)])
+        assert 'Stored 3 records' in capsys.readouterr().out
+        main(['--store', db, '--project', 'Beta', '-o', str(out)])
+        assert 'Found 1 records' in capsys.readouterr().out
+        payload = json.loads(re.search(r'loadPayload\((.*), null\)', out.read_text()).group(1))
+        assert payload['dictionaries']['project'] == ['Beta']
+
+    def test_yearly_archives_with_the_same_name(self, tmp_path, capsys):
+        db, out = str(tmp_path / 'records.db'), tmp_path / 'out.html'
+        books = []
+        for year, project in (('2024', 'Alpha'), ('2025', 'Beta')):
+            path = tmp_path / year / 'units.xlsx'
+            path.parent.mkdir()
+            write_xlsx(path, {'Jan': [HEADER, _row(5, 'Working Time', project, 2)]})
+            books.append(str(path))
+        main(books + ['--store', db, '-o', str(out)])
+        assert 'Stored 2 records' in capsys.readouterr().out
+        with RecordStore(db) as store:
+            assert [(r.source, r.project) for r in store.query()] == [('2024/units.xlsx', 'Alpha'),
+                                                                      ('2025/units.xlsx', 'Beta')]
+
+    def test_inputs_required_without_store(self):
+        with pytest.raises(SystemExit):
+            main([])
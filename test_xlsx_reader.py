@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Tests for xlsx_reader.py"""
+
+import zipfile
+import pytest
+from datetime import datetime, time
+import openpyxl
+from openpyxl.comments import Comment
+from xlsx_reader import (
+    XlsxReader, extract_comments, from_excel, is_date_format, sheet_parts, split_cell_ref, MAC_EPOCH
+)
+from conftest import HEADER, Formula, write_xlsx
+
+
+# ── Cell comments from the xlsx package ───────────────────────────────────
+
+class TestExtractComments:
+    COL_MAP = {'#': 0, 'Date': 1, 'Hours': 6, 'Amount': 7}
+
+    @pytest.fixture
+    def workbook(self, tmp_path):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = 'Data'
+        ws.append(['#', 'Date', 'Event Type', 'Project', 'Hourly Rate', 'Additional Rate', 'Hours', 'Amount'])
+        ws['A1'].comment = Comment('header note', 'me')
+        ws['H3'].comment = Comment('  approved  ', 'me')
+        ws['G3'].comment = Comment('overtime', 'me')
+        ws['D5'].comment = Comment('unmapped column', 'me')
+        wb.create_sheet('Empty')
+        # Formatted-but-empty rows far below the data
+        ws.cell(row=50000, column=1).number_format = '0.00'
+        path = tmp_path / 'comments.xlsx'
+        wb.save(path)
+        return path
+
+    def _comments(self, path, sheet):
+        with zipfile.ZipFile(path) as zf:
+            return extract_comments(zf, sheet_parts(zf)[sheet], self.COL_MAP, 1)
+
+    def test_comments_keyed_by_row_and_column(self, workbook):
+        assert self._comments(workbook, 'Data') == {3: {'Hours': 'overtime', 'Amount': 'approved'}}
+
+    def test_column_order_follows_col_map(self, workbook):
+        assert list(self._comments(workbook, 'Data')[3]) == ['Hours', 'Amount']
+
+    def test_sheet_without_comments(self, workbook):
+        assert self._comments(workbook, 'Empty') == {}
+
+    def testsheet_parts_in_workbook_order(self, workbook):
+        with zipfile.ZipFile(workbook) as zf:
+            assert list(sheet_parts(zf)) == ['Data', 'Empty']
+
+    def testsplit_cell_ref(self):
+        assert split_cell_ref('A1') == (0, 1)
+        assert split_cell_ref('H12') == (7, 12)
+        assert split_cell_ref('AA100') == (26, 100)
+
+
+# ── Cell values ───────────────────────────────────────────────────────────
+
+class TestCellValues:
+    def test_date_formats(self):
+        assert is_date_format('yyyy-mm-dd')
+        assert is_date_format('[$-409]d-mmm-yy')
+        assert not is_date_format('0.00')
+        assert not is_date_format('"days"0')
+        assert not is_date_format(None)
+
+    def test_from_excel(self):
+        assert from_excel(46023) == datetime(2026, 1, 1)
+        assert from_excel(46023.5) == datetime(2026, 1, 1, 12)
+        assert from_excel(0.25) == time(6)
+        assert from_excel(1) == datetime(1900, 1, 1)  # before the phantom leap day
+        assert from_excel(0, MAC_EPOCH) == time(0)
+        assert from_excel(1, MAC_EPOCH) == datetime(1904, 1, 2)
+
+
+class TestXlsxReader:
+    def _rows(self, path, sheet):
+        with XlsxReader(path) as reader:
+            return list(reader.iter_rows(sheet))
+
+    def _openpyxl_rows(self, path, sheet):
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = wb[sheet]
+            ws.reset_dimensions()
+            return [(r, tuple(values)) for r, values in enumerate(ws.iter_rows(values_only=True), start=1)]
+        finally:
+            wb.close()
+
+    def test_shared_strings_dates_and_formulas(self, tmp_path):
+        path = tmp_path / 'book.xlsx'
+        write_xlsx(path, {'Data': [HEADER, [datetime(2026, 3, 4), 'Working Time', 'P1', 50, None, Formula('2*4', 8), None]]})
+        assert self._rows(path, 'Data') == [
+            (1, tuple(HEADER)),
+            (2, (datetime(2026, 3, 4), 'Working Time', 'P1', 50, None, 8)),
+        ]
+
+    def test_matches_openpyxl(self, tmp_path):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = 'Mixed'
+        ws.append(['text', 1, 2.5, True, datetime(2026, 1, 2, 3, 4, 5), None, '=1+1'])
+        ws.cell(row=4, column=3, value='after a gap')
+        ws['B5'] = 0.5
+        ws['B5'].number_format = 'hh:mm'
+        ws['C5'] = 12
+        ws['C5'].number_format = 'dd/mm/yyyy'
+        path = tmp_path / 'mixed.xlsx'
+        wb.save(path)
+        # Formula cells saved by openpyxl carry no cached value, so both read None
+        assert self._rows(path, 'Mixed') == self._openpyxl_rows(path, 'Mixed')
+
+    def test_date1904(self, tmp_path):
+        wb = openpyxl.Workbook()
+        wb.epoch = openpyxl.utils.datetime.CALENDAR_MAC_1904
+        wb.active.append([datetime(2026, 5, 6)])
+        path = tmp_path / 'mac.xlsx'
+        wb.save(path)
+        assert self._rows(path, 'Sheet') == [(1, (datetime(2026, 5, 6),))]
+        assert self._rows(path, 'Sheet') == self._openpyxl_rows(path, 'Sheet')
+
+    def test_sheetnames(self, tmp_path):
+        path = tmp_path / 'book.xlsx'
+        write_xlsx(path, {'One': [HEADER], 'Two': [HEADER]})
+        with XlsxReader(path) as reader:
+            assert reader.sheetnames == ['One', 'Two']
+
+    def test_shared_strings_read_on_demand(self, tmp_path):
+        path = tmp_path / 'book.xlsx'
+        write_xlsx(path, {'Data': [HEADER] + [[f'value {i}'] for i in range(500)]})
+        with XlsxReader(path) as reader:
+            rows = reader.iter_rows('Data')
+            assert next(rows) == (1, tuple(HEADER))
+            rows.close()
+            assert len(reader._shared_strings) == len(HEADER)
+            assert reader.shared_string(len(HEADER) + 499) == 'value 499'
+            with pytest.raises(IndexError):
+                reader.shared_string(10_000)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Streaming xlsx reading with the standard library only (zipfile + iterparse).
+"""
+
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+DOC_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+_ROW = f'{{{MAIN_NS}}}row'
+_CELL = f'{{{MAIN_NS}}}c'
+_VALUE = f'{{{MAIN_NS}}}v'
+_INLINE = f'{{{MAIN_NS}}}is'
+_TEXT = f'{{{MAIN_NS}}}t'
+_RUN = f'{{{MAIN_NS}}}r'
+_SHEET_DATA = f'{{{MAIN_NS}}}sheetData'
+
+WINDOWS_EPOCH = datetime(1899, 12, 30)
+MAC_EPOCH = datetime(1904, 1, 1)
+
+# Built-in number formats that openpyxl treats as dates (ECMA-376 18.8.30)
+DATE_BUILTIN_FORMATS = {14, 15, 16, 17, 18, 19, 20, 21, 22, 45, 46, 47}
+TIMEDELTA_BUILTIN_FORMATS = {46}
+
+# Same rules as openpyxl.styles.numbers.is_date_format / is_timedelta_format
+_FORMAT_STRIP_RE = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+_DATE_TOKEN_RE = re.compile(r'(?<![_\\])[dmhysDMHYS]')
+_TIMEDELTA_RE = re.compile(r'\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?', re.I)
+
+
+# ── Package structure ─────────────────────────────────────────────────────
+
+def part_rels_path(part):
+    """Return the relationships part path for a package part."""
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, '_rels', name + '.rels')
+
+
+def read_rels(zf, part):
+    """Read a part's relationships as (id, type, resolved target) tuples."""
+    rels_path = part_rels_path(part)
+    if rels_path not in zf.NameToInfo:
+        return []
+    rels = []
+    for rel in ET.fromstring(zf.read(rels_path)).iter(f'{{{PKG_REL_NS}}}Relationship'):
+        target = rel.get('Target', '')
+        if rel.get('TargetMode') == 'External':
+            continue
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+        rels.append((rel.get('Id'), rel.get('Type', ''), target))
+    return rels
+
+
+def workbook_part(zf):
+    """Return the path of the workbook part."""
+    return next((target for _, rel_type, target in read_rels(zf, '')
+                 if rel_type.endswith('/officeDocument')), 'xl/workbook.xml')
+
+
+def related_part(zf, part, rel_suffix):
+    """Return the first existing part related to ``part`` by a type ending in ``rel_suffix``."""
+    target = next((target for _, rel_type, target in read_rels(zf, part)
+                   if rel_type.endswith(rel_suffix)), None)
+    return target if target in zf.NameToInfo else None
+
+
+def sheet_parts(zf):
+    """Map each worksheet name to its XML part inside the xlsx package."""
+    wb_part = workbook_part(zf)
+    targets = {rel_id: target for rel_id, _, target in read_rels(zf, wb_part)}
+    sheets = ET.fromstring(zf.read(wb_part)).find(f'{{{MAIN_NS}}}sheets')
+    parts = {}
+    for sheet in sheets if sheets is not None else []:
+        target = targets.get(sheet.get(f'{{{DOC_REL_NS}}}id'))
+        if target:
+            parts[sheet.get('name')] = target
+    return parts
+
+
+def split_cell_ref(ref):
+    """Split an A1-style reference into a 0-based column index and 1-based row."""
+    col = 0
+    for pos, char in enumerate(ref):
+        if char.isdigit():
+            return col - 1, int(ref[pos:])
+        col = col * 26 + (ord(char.upper()) - 64)
+    raise ValueError(f"Invalid cell reference: {ref}")
+
+
+def rich_text(element):
+    """Concatenate the text of a string item: a plain <t> and/or <r> runs."""
+    if element is None:
+        return ''
+    parts = []
+    for node in element:
+        if node.tag == _TEXT:
+            parts.append(node.text or '')
+        elif node.tag == _RUN:
+            t = node.find(_TEXT)
+            if t is not None:
+                parts.append(t.text or '')
+    return ''.join(parts)
+
+
+# ── Cell comments ─────────────────────────────────────────────────────────
+
+def extract_comments(zf, sheet_part, col_map, header_row_idx):
+    """Extract all cell comments from a worksheet, keyed by (row, col_name).
+
+    Reads the sheet's comments part straight from the xlsx package, so only
+    cells that actually carry a comment are visited.
+    """
+    comment_part = related_part(zf, sheet_part, '/comments')
+    if comment_part is None:
+        return {}
+
+    col_names = {idx: name for name, idx in col_map.items()}
+    found = {}
+    for comment in ET.fromstring(zf.read(comment_part)).iter(f'{{{MAIN_NS}}}comment'):
+        col_idx, row_idx = split_cell_ref(comment.get('ref', ''))
+        if row_idx <= header_row_idx or col_idx not in col_names:
+            continue
+        found.setdefault(row_idx, {})[col_idx] = rich_text(comment.find(f'{{{MAIN_NS}}}text')).strip()
+
+    # Keep the column order of col_map within each row
+    comments = {}
+    for row_idx in sorted(found):
+        row_comments = found[row_idx]
+        comments[row_idx] = {name: row_comments[idx] for name, idx in col_map.items() if idx in row_comments}
+    return comments
+
+
+# ── Cell values ───────────────────────────────────────────────────────────
+
+def is_date_format(fmt):
+    """Return True if a number format code displays a date or time."""
+    if fmt is None:
+        return False
+    fmt = _FORMAT_STRIP_RE.sub('', fmt.split(';')[0])
+    return _DATE_TOKEN_RE.search(fmt) is not None
+
+
+def is_timedelta_format(fmt):
+    """Return True if a number format code displays an elapsed duration."""
+    return fmt is not None and _TIMEDELTA_RE.search(fmt.split(';')[0]) is not None
+
+
+def from_excel(value, epoch=WINDOWS_EPOCH):
+    """Convert an Excel date serial to a datetime (or time for pure fractions)."""
+    day, fraction = divmod(value, 1)
+    diff = timedelta(milliseconds=round(fraction * 86400 * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        return (datetime.min + diff).time()
+    if 0 < value < 60 and epoch == WINDOWS_EPOCH:
+        day += 1  # Excel's phantom 1900-02-29
+    return epoch + timedelta(days=day) + diff
+
+
+def _cast_number(text):
+    """Convert a numeric cell value to int or float, as openpyxl does."""
+    if '.' in text or 'E' in text or 'e' in text:
+        return float(text)
+    return int(text)
+
+
+class XlsxReader:
+    """Read cell values from an xlsx workbook without openpyxl or pandas.
+
+    Worksheets are streamed with iterparse, and processed rows are dropped
+    from the tree as soon as they have been yielded, so memory stays
+    constant for very long sheets. Values follow openpyxl's read-only,
+    data-only conventions: shared and inline strings are resolved, numbers
+    become int or float, date-formatted numbers become datetimes, and
+    formula cells give their cached value.
+    """
+
+    def __init__(self, file_path):
+        self.zf = zipfile.ZipFile(file_path)
+        self.sheet_parts = sheet_parts(self.zf)
+        self._workbook_part = workbook_part(self.zf)
+
+        props = ET.fromstring(self.zf.read(self._workbook_part)).find(f'{{{MAIN_NS}}}workbookPr')
+        date1904 = props is not None and props.get('date1904', '').lower() in ('1', 'true')
+        self.epoch = MAC_EPOCH if date1904 else WINDOWS_EPOCH
+
+        self._shared_strings = None
+        self._shared_strings_left = None
+        self._styles = None
+
+    @property
+    def sheetnames(self):
+        return list(self.sheet_parts)
+
+    def close(self):
+        if self._shared_strings_left is not None:
+            self._shared_strings_left.close()
+        self.zf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _iter_shared_strings(self):
+        part = related_part(self.zf, self._workbook_part, '/sharedStrings')
+        if part is None:
+            return
+        with self.zf.open(part) as f:
+            for _, elem in ET.iterparse(f):
+                if elem.tag == f'{{{MAIN_NS}}}si':
+                    yield rich_text(elem).replace('x005F_', '')
+                    elem.clear()
+
+    def shared_string(self, idx):
+        """Return a shared string, reading the table only as far as ``idx``.
+
+        A header-only scan touches the first few entries and never parses
+        the rest of a large table.
+        """
+        if self._shared_strings is None:
+            self._shared_strings = []
+            self._shared_strings_left = self._iter_shared_strings()
+        strings = self._shared_strings
+        while idx >= len(strings):
+            item = next(self._shared_strings_left, None)
+            if item is None:
+                raise IndexError(f"Shared string {idx} out of range")
+            strings.append(item)
+        return strings[idx]
+
+    @property
+    def styles(self):
+        """(date style indexes, timedelta style indexes), loaded on first use."""
+        if self._styles is None:
+            date_styles, timedelta_styles = set(), set()
+            part = related_part(self.zf, self._workbook_part, '/styles')
+            if part is not None:
+                root = ET.fromstring(self.zf.read(part))
+                custom = {int(fmt.get('numFmtId')): fmt.get('formatCode')
+                          for fmt in root.iter(f'{{{MAIN_NS}}}numFmt')}
+                cell_xfs = root.find(f'{{{MAIN_NS}}}cellXfs')
+                for idx, xf in enumerate(cell_xfs if cell_xfs is not None else []):
+                    fmt_id = int(xf.get('numFmtId', 0))
+                    if fmt_id in custom:
+                        is_date = is_date_format(custom[fmt_id])
+                        is_delta = is_timedelta_format(custom[fmt_id])
+                    else:
+                        is_date = fmt_id in DATE_BUILTIN_FORMATS
+                        is_delta = fmt_id in TIMEDELTA_BUILTIN_FORMATS
+                    if is_date:
+                        date_styles.add(idx)
+                    if is_delta:
+                        timedelta_styles.add(idx)
+            self._styles = (date_styles, timedelta_styles)
+        return self._styles
+
+    def _cell_value(self, cell):
+        data_type = cell.get('t', 'n')
+        if data_type == 'inlineStr':
+            inline = cell.find(_INLINE)
+            return rich_text(inline) if inline is not None else None
+
+        text = cell.findtext(_VALUE) or None
+        if text is None:
+            return None
+        if data_type == 'n':
+            value = _cast_number(text)
+            style = int(cell.get('s', 0))
+            date_styles, timedelta_styles = self.styles
+            if style in date_styles:
+                if style in timedelta_styles:
+                    return timedelta(days=value)
+                try:
+                    return from_excel(value, self.epoch)
+                except (OverflowError, ValueError):
+                    return '#VALUE!'
+            return value
+        if data_type == 's':
+            idx = int(text)
+            strings = self._shared_strings
+            if strings is not None and idx < len(strings):
+                return strings[idx]
+            return self.shared_string(idx)
+        if data_type == 'b':
+            return bool(int(text))
+        if data_type == 'd':
+            return datetime.fromisoformat(text)
+        return text  # 'str' (formula result) and 'e' (error)
+
+    def iter_rows(self, sheet_name):
+        """Yield (row number, tuple of values) for each row of a sheet.
+
+        Rows missing from the XML are yielded as empty tuples so that row
+        numbers stay contiguous, as openpyxl does.
+        """
+        expected_row = 1
+        sheet_data = None
+        with self.zf.open(self.sheet_parts[sheet_name]) as f:
+            for event, elem in ET.iterparse(f, events=('start', 'end')):
+                if event == 'start':
+                    if elem.tag == _SHEET_DATA:
+                        sheet_data = elem
+                    continue
+                if elem.tag != _ROW:
+                    continue
+
+                row_idx = int(elem.get('r', expected_row))
+                while expected_row < row_idx:
+                    yield expected_row, ()
+                    expected_row += 1
+
+                values = []
+                col = -1
+                for cell in elem.iter(_CELL):
+                    ref = cell.get('r')
+                    col = split_cell_ref(ref)[0] if ref else col + 1
+                    if col >= len(values):
+                        values.extend([None] * (col + 1 - len(values)))
+                    values[col] = self._cell_value(cell)
+
+                yield row_idx, tuple(values)
+                expected_row = row_idx + 1
+                if sheet_data is not None:
+                    sheet_data.clear()  # drop processed rows to keep memory flat